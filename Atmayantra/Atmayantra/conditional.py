@@ -0,0 +1,129 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+from .response_cache import list_version
+from .utils import api_response
+
+
+def row_etag(pk, version):
+    return quote_etag(f'{pk}.{version}')
+
+
+class ConditionalRequestMixin:
+    """
+    ETag and Last-Modified support for viewsets of `VersionedModel`s.
+
+    Viewsets implement `get_row_state_queryset` (the row named by the URL) and
+    may override `get_list_version`. The row state query only reads the
+    primary key, `version` and `updated_at`, which the models' version indexes
+    cover, and list ETags come from a version counter in the cache, so a 304
+    or 412 is answered without loading or parsing anything else.
+    """
+
+    def get_row_state_queryset(self):
+        raise NotImplementedError
+
+    def get_list_version(self):
+        return list_version(self.queryset.model)
+
+    def get_row_state(self, lock=False):
+        """
+        Returns (etag, last_modified timestamp) of the row in the URL, or None if it does not exist.
+
+        With `lock` the row is locked until the surrounding transaction ends.
+        """
+        queryset = self.get_row_state_queryset()
+        if lock:
+            queryset = queryset.select_for_update(of=('self',))
+        state = queryset.values_list('pk', 'version', 'updated_at').first()
+        if state is None:
+            return None
+        pk, version, updated_at = state
+        return row_etag(pk, version), int(updated_at.timestamp())
+
+    def get_list_etag(self, request):
+        # Cursor and page size select different pages of the same list.
+        raw = f"{self.get_list_version()}|{request.get_full_path()}"
+        return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def _precondition_failed(etag):
+    response = api_response(False, "The resource was modified by someone else. Fetch it again and retry.", status_code=status.HTTP_412_PRECONDITION_FAILED)
+    response['ETag'] = etag
+    return response
+
+
+def _set_validators(response, etag, last_modified=None):
+    if 200 <= response.status_code < 300:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_detail(view_method):
+    """Answers If-None-Match/If-Modified-Since on a detail GET from the row's version alone."""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        state = self.get_row_state()
+        if state is None:
+            return view_method(self, request, *args, **kwargs)
+        etag, last_modified = state
+        conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if conditional is not None:
+            if conditional.status_code == status.HTTP_412_PRECONDITION_FAILED:
+                return _precondition_failed(etag)
+            return conditional
+        return _set_validators(view_method(self, request, *args, **kwargs), etag, last_modified)
+    return wrapper
+
+
+def conditional_list(view_method):
+    """Answers If-None-Match on a list GET from the list version alone."""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        conditional = get_conditional_response(request, etag=etag)
+        if conditional is not None:
+            return conditional
+        return _set_validators(view_method(self, request, *args, **kwargs), etag)
+    return wrapper
+
+
+def conditional_write(view_method):
+    """
+    Enforces If-Match/If-Unmodified-Since on PUT, PATCH and DELETE.
+
+    The check runs before the request body is read, so a stale write is
+    rejected with 412 before any upload is parsed. With
+    `settings.REQUIRE_IF_MATCH` writes without If-Match get 428.
+
+    The row stays locked from the check until the write commits, so of two
+    writes sent with the same ETag the second waits and then gets 412.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        with transaction.atomic():
+            state = self.get_row_state(lock=True)
+            if state is None:
+                return view_method(self, request, *args, **kwargs)
+            etag, last_modified = state
+            if settings.REQUIRE_IF_MATCH and 'HTTP_IF_MATCH' not in request.META:
+                response = api_response(False, "An If-Match header with the resource's ETag is required.", status_code=status.HTTP_428_PRECONDITION_REQUIRED)
+                response['ETag'] = etag
+                return response
+            if get_conditional_response(request, etag=etag, last_modified=last_modified) is not None:
+                return _precondition_failed(etag)
+
+            response = view_method(self, request, *args, **kwargs)
+            state = self.get_row_state()
+        if state is not None:
+            _set_validators(response, *state)
+        return response
+    return wrapper
@@ -0,0 +1,138 @@
+import csv
+import tempfile
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+XLSX = 'xlsx'
+EXPORT_FORMATS = {
+    NDJSON: 'application/x-ndjson',
+    CSV: 'text/csv',
+    XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Rows per sheet allowed by Excel, including the header row.
+XLSX_MAX_ROWS = 1048576
+
+# Spreadsheet apps evaluate cells starting with these as formulas.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportError(Exception):
+    pass
+
+
+class ExportDataset:
+    """
+    A flat, exportable view of a model.
+
+    `columns` maps output column names to `values_list` lookups, so rows are
+    read as tuples straight from the cursor and no model instances are built.
+    """
+
+    def __init__(self, name, queryset, columns):
+        self.name = name
+        self.queryset = queryset
+        self.columns = columns
+
+    @property
+    def headers(self):
+        return list(self.columns)
+
+    def rows(self, chunk_size=None):
+        queryset = self.queryset.all().order_by('pk').values_list(*self.columns.values())
+        # On PostgreSQL iterator() reads through a server-side cursor, so only one chunk is held at a time.
+        return queryset.iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() returns the text instead of buffering it, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _spreadsheet_safe(value):
+    # Contact messages and names are user input; keep them from running as formulas.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def ndjson_lines(dataset, chunk_size=None):
+    encoder = DjangoJSONEncoder()
+    for row in dataset.rows(chunk_size):
+        yield encoder.encode(dict(zip(dataset.headers, row))) + '\n'
+
+
+def csv_lines(dataset, chunk_size=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(dataset.headers)
+    for row in dataset.rows(chunk_size):
+        yield writer.writerow([_spreadsheet_safe(value) for value in row])
+
+
+def write_xlsx(dataset, output, chunk_size=None):
+    """
+    Writes the dataset to `output` as XLSX using openpyxl's write-only mode.
+
+    Write-only worksheets spill rows to a temporary file as they are appended,
+    so memory does not grow with the number of rows.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(dataset.name)
+    sheet.append(dataset.headers)
+    for count, row in enumerate(dataset.rows(chunk_size), start=2):
+        if count > XLSX_MAX_ROWS:
+            raise ExportError(f"Too many rows for an XLSX sheet; export more than {XLSX_MAX_ROWS - 1} rows as CSV or NDJSON.")
+        sheet.append([_xlsx_cell(value) for value in row])
+    workbook.save(output)
+
+
+def _xlsx_cell(value):
+    if isinstance(value, str):
+        return _spreadsheet_safe(ILLEGAL_CHARACTERS_RE.sub('', value))
+    if getattr(value, 'tzinfo', None) is not None:
+        # XLSX has no time zones.
+        return value.replace(tzinfo=None)
+    return value
+
+
+def export_response(dataset, export_format):
+    """
+    Returns a download of `dataset` in `export_format`.
+
+    NDJSON and CSV are streamed row by row. XLSX is a zip archive that can only
+    be written as a whole, so it is built in a temporary file first.
+    """
+    filename = f'{dataset.name}.{export_format}'
+    content_type = EXPORT_FORMATS[export_format]
+    if export_format == XLSX:
+        output = tempfile.TemporaryFile()
+        try:
+            write_xlsx(dataset, output)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=content_type)
+
+    lines = ndjson_lines(dataset) if export_format == NDJSON else csv_lines(dataset)
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_export(dataset, export_format, output, chunk_size=None):
+    """Writes `dataset` to the binary file `output`; used by the `export_directory` command."""
+    if export_format == XLSX:
+        write_xlsx(dataset, output, chunk_size)
+        return
+    lines = ndjson_lines(dataset, chunk_size) if export_format == NDJSON else csv_lines(dataset, chunk_size)
+    for line in lines:
+        output.write(line.encode())
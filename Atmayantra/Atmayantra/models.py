@@ -0,0 +1,54 @@
+from django.db import models, router, transaction
+from django.db.models import F
+from django.db.models.signals import class_prepared, post_delete, post_save
+from django.dispatch import receiver
+
+from .response_cache import bump_list_version
+
+
+class VersionedModel(models.Model):
+    """
+    Adds `updated_at` and a `version` that increases by one on every save.
+
+    Both feed the ETag and Last-Modified headers used for conditional requests.
+    The version is incremented by the database, so concurrent saves of the
+    same row, even from stale instances, each produce a new version. Every
+    save or delete also moves the model's list version, which list ETags
+    are built from.
+    Saves run in a transaction together with their post_save receivers, so
+    rows those receivers write, such as change log entries, commit or roll
+    back with the save.
+    """
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        updating = not self._state.adding
+        if updating:
+            self.version = F('version') + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version', 'updated_at'}
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+        if updating:
+            # Dropping the expression defers the field, so the stored version is loaded only if read.
+            del self.version
+
+
+def invalidate_list_version(sender, using=None, **kwargs):
+    bump_list_version(sender)
+    # Again after commit, in case a request tagged the old rows in between.
+    transaction.on_commit(lambda: bump_list_version(sender), using=using)
+
+
+@receiver(class_prepared)
+def connect_list_version(sender, **kwargs):
+    # Connected per model: a receiver for every sender would stop Django from fast-deleting any model's rows.
+    if issubclass(sender, VersionedModel):
+        post_save.connect(invalidate_list_version, sender=sender)
+        post_delete.connect(invalidate_list_version, sender=sender)
@@ -0,0 +1,43 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+from .utils import api_response
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over an indexed, unique ordering.
+
+    Each page is fetched with a `WHERE key > cursor ... LIMIT n` query, so deep
+    pages cost the same as the first one. Cursors are opaque and clients pick a
+    page size with `?page_size=`, up to `max_page_size`. Listings opt in with
+    `pagination_class`; there is no project-wide default.
+    """
+    ordering = 'pk'
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_paginated_data(self, data):
+        return {
+            'results': data,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+
+    def get_paginated_response(self, data, message="Results retrieved successfully."):
+        return api_response(True, message, self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'status': {'type': 'string'},
+                'message': {'type': 'string'},
+                'data': super().get_paginated_response_schema(schema),
+            },
+        }
+
+
+class NewestFirstPagination(KeysetPagination):
+    ordering = '-pk'
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'doctor:{contact_number}:version'
+LIST_VERSION_KEY = 'list:{model}:version'
+PAYLOAD_KEY = 'doctor:{contact_number}:{version}:{section}:{variant}'
+LOCK_KEY = 'doctor:{contact_number}:{version}:{section}:{variant}:lock'
+STATS_KEYS = {'hits': 'response_cache:hits', 'misses': 'response_cache:misses'}
+
+# How long a concurrent miss waits for the request that is already computing the payload.
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+WAIT_ATTEMPTS = 40
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def _version(key):
+    # Versions start from a timestamp, so a version key that was evicted never
+    # comes back with a value older responses were cached or tagged under.
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def doctor_version(contact_number):
+    """Returns the current cache version of a doctor."""
+    return _version(VERSION_KEY.format(contact_number=contact_number))
+
+
+def bump_doctor_version(contact_number):
+    """Invalidates every cached payload of a doctor by moving to a new version."""
+    _bump(VERSION_KEY.format(contact_number=contact_number))
+
+
+def list_version(model):
+    """Returns the current version of a model's listing, which moves on every write to one of its rows."""
+    return _version(LIST_VERSION_KEY.format(model=model._meta.label_lower))
+
+
+def bump_list_version(model):
+    _bump(LIST_VERSION_KEY.format(model=model._meta.label_lower))
+
+
+def cache_stats():
+    return {name: cache.get(key, 0) for name, key in STATS_KEYS.items()}
+
+
+def _variant(request):
+    # Payloads contain absolute URLs and depend on ?include=, so the host and query are part of the key.
+    raw = f'{request.get_host()}|{request.get_full_path()}'
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def cached_doctor_response(request, contact_number, section, compute):
+    """
+    Read-through cache for a doctor's serialized payload.
+
+    `compute` builds the DRF response on a miss; only 200 responses are
+    stored. Concurrent misses for the same payload are collapsed: one request
+    computes it while the others wait briefly for the result.
+    """
+    version = doctor_version(contact_number)
+    params = {'contact_number': contact_number, 'version': version, 'section': section, 'variant': _variant(request)}
+    key = PAYLOAD_KEY.format(**params)
+
+    cached = cache.get(key)
+    if cached is not None:
+        _incr(STATS_KEYS['hits'])
+        return Response(cached)
+
+    lock_key = LOCK_KEY.format(**params)
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        for _ in range(WAIT_ATTEMPTS):
+            time.sleep(WAIT_INTERVAL)
+            cached = cache.get(key)
+            if cached is not None:
+                _incr(STATS_KEYS['hits'])
+                return Response(cached)
+        lock_key = None
+
+    _incr(STATS_KEYS['misses'])
+    try:
+        response = compute()
+        if response.status_code == status.HTTP_200_OK and isinstance(response, Response):
+            cache.set(key, response.data, timeout=settings.DOCTOR_CACHE_TIMEOUT)
+        return response
+    finally:
+        if lock_key is not None:
+            cache.delete(lock_key)
+
+
+def cache_doctor_response(section):
+    """Decorates a viewset method so its response is cached per doctor, keyed by the `contact_number` URL kwarg."""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            return cached_doctor_response(
+                request, kwargs['contact_number'], section,
+                lambda: view_method(self, request, *args, **kwargs),
+            )
+        return wrapper
+    return decorator
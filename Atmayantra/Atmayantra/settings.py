@@ -61,6 +61,10 @@ INSTALLED_APPS = [
     'doctor_certification',
     'doctor_documents',
     'doctor_bank_details',
+    'filestore',
+    'doctor_registration',
+    'notifications',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -93,6 +97,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Atmayantra.wsgi.application'
 
+# Route downloads and the OTP endpoints to their async views. Atmayantra.asgi
+# turns this on; under WSGI every async view would need its own event loop.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False').lower() == 'true'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -105,6 +113,16 @@ DATABASES = {
     )
 }
 
+# Shared by every gunicorn worker on the host. The default per-process LocMemCache
+# would give each worker its own response cache versions and throttle counters.
+# Point CACHE_BACKEND at Redis or Memcached in production, where increments are atomic.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / '.cache'),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -153,15 +171,30 @@ AUTH_USER_MODEL = 'authapp.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authapp.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PARSER_CLASSES': (
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
-    )
+    ),
+    'EXCEPTION_HANDLER': 'Atmayantra.utils.api_exception_handler',
+    # Sliding-window limits for Atmayantra.throttling, as '<throttle_scope>:<phone|ip>'.
+    # Per-IP limits are looser since clinics share an address; set NUM_PROXIES behind a load balancer.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup:phone': os.environ.get('THROTTLE_SIGNUP_PHONE', '3/10m'),
+        'signup:ip': os.environ.get('THROTTLE_SIGNUP_IP', '20/h'),
+        'login:phone': os.environ.get('THROTTLE_LOGIN_PHONE', '5/10m'),
+        'login:ip': os.environ.get('THROTTLE_LOGIN_IP', '60/h'),
+        'contact:phone': os.environ.get('THROTTLE_CONTACT_PHONE', '3/h'),
+        'contact:ip': os.environ.get('THROTTLE_CONTACT_IP', '10/h'),
+    },
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES']) if os.environ.get('NUM_PROXIES') else None,
 }
 
+# Default page size of the listings paginated with Atmayantra.pagination.KeysetPagination.
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 20))
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -172,6 +205,94 @@ SIMPLE_JWT = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploaded doctor files are stored outside the database, keyed by SHA-256.
+BLOB_STORAGE = {
+    'BACKEND': 'filestore.storage.LocalBlobStore',
+    'OPTIONS': {
+        'location': os.environ.get('BLOB_STORAGE_ROOT', os.path.join(MEDIA_ROOT, 'blobs')),
+    },
+}
+
+# Registration uploads wait here until the final step promotes them into BLOB_STORAGE.
+UPLOAD_STAGING_ROOT = os.environ.get('UPLOAD_STAGING_ROOT', os.path.join(MEDIA_ROOT, 'staging'))
+
+# Limits for the resumable chunked upload API.
+CHUNKED_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Lifetime of cached doctor payloads. Writes invalidate them immediately through
+# per-doctor version keys; the timeout only bounds changes made with queryset.update().
+DOCTOR_CACHE_TIMEOUT = int(os.environ.get('DOCTOR_CACHE_TIMEOUT', 600))
+
+# Answer PUT, PATCH and DELETE without an If-Match header with 428 instead of
+# applying them unconditionally. Off until all clients send ETags back.
+REQUIRE_IF_MATCH = os.environ.get('REQUIRE_IF_MATCH', 'False').lower() == 'true'
+
+# Change feed entries are only served once they are this old, so transactions
+# that commit slightly out of id order are never skipped by a client's cursor.
+DOCTOR_CHANGES_SETTLE_SECONDS = int(os.environ.get('DOCTOR_CHANGES_SETTLE_SECONDS', 2))
+
+# How long the user columns behind a JWT are cached. Saving a user clears its
+# entry at once; this only bounds changes made with queryset.update().
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# OTPs live in the authapp_onetimepassword table, so any worker can verify them.
+OTP_TTL_SECONDS = 300
+OTP_MAX_ATTEMPTS = 5
+
+# Outbound SMS/email. Requests only queue messages; `manage.py send_notifications`
+# delivers them in batches through this gateway. The file gateway stands in for
+# a provider in development, appending each message to NOTIFICATION_FILE.
+NOTIFICATION_GATEWAY = {
+    'BACKEND': os.environ.get('NOTIFICATION_GATEWAY', 'notifications.gateways.FileGateway'),
+    'OPTIONS': {
+        'path': os.environ.get('NOTIFICATION_FILE', os.path.join(BASE_DIR, 'notifications.log')),
+    },
+}
+NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 100))
+# Failed sends are retried after 5s, 10s, 20s, ... up to 10 minutes apart.
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 5
+NOTIFICATION_RETRY_MAX_SECONDS = 600
+# A claimed batch that is not finished by then is picked up by another worker.
+NOTIFICATION_LEASE_SECONDS = 60
+NOTIFICATION_RETENTION_DAYS = 7
+
+# Background jobs, such as checking uploaded files. Requests only queue them;
+# `manage.py run_workers` runs them in a pool of JOB_WORKER_PROCESSES processes.
+JOB_WORKER_PROCESSES = int(os.environ.get('JOB_WORKER_PROCESSES', 2))
+# Failed jobs are retried after 10s, 20s, 40s, ... up to an hour apart.
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_SECONDS = 10
+JOB_RETRY_MAX_SECONDS = 3600
+# A job still running after this long is assumed lost and run again.
+JOB_LEASE_SECONDS = 300
+JOB_RETENTION_DAYS = 7
+
+# Rows fetched per database round trip by the streaming exports.
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Rows validated and inserted per transaction by the bulk doctor import.
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+IMPORT_MAX_SIZE = 20 * 1024 * 1024
+
+# Per-field limits checked by filestore.upload_handlers.VerifyingUploadHandler
+# while doctor uploads are streamed in; content types are matched on magic bytes.
+DOCUMENT_CONTENT_TYPES = ['application/pdf', 'image/jpeg', 'image/png']
+IMAGE_CONTENT_TYPES = ['image/jpeg', 'image/png']
+DOCTOR_UPLOAD_DEFAULT_RULE = {'max_size': 10 * 1024 * 1024, 'content_types': DOCUMENT_CONTENT_TYPES}
+DOCTOR_UPLOAD_RULES = {
+    'profile_photo_file': {'max_size': 5 * 1024 * 1024, 'content_types': IMAGE_CONTENT_TYPES},
+    'bank_qr_code_file': {'max_size': 2 * 1024 * 1024, 'content_types': IMAGE_CONTENT_TYPES},
+    'graduation_certificate': DOCTOR_UPLOAD_DEFAULT_RULE,
+    'experience_letter': DOCTOR_UPLOAD_DEFAULT_RULE,
+    'resume_cv': DOCTOR_UPLOAD_DEFAULT_RULE,
+    'license': DOCTOR_UPLOAD_DEFAULT_RULE,
+    'file': DOCTOR_UPLOAD_DEFAULT_RULE,
+    # CSV has no magic number, so import files are only size-checked and then parsed.
+    'import_file': {'max_size': IMPORT_MAX_SIZE, 'content_types': None},
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -0,0 +1,162 @@
+import math
+import re
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+COUNTER_KEY = 'throttle:{scope}:{ident}:{window}'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])')
+
+
+def parse_rate(rate):
+    """
+    Parses a rate such as `'5/m'`, `'5/10m'` or `'100/day'` into `(requests, seconds)`.
+
+    Like DRF's rates, but the period may carry a multiplier.
+    """
+    match = RATE_RE.match(rate)
+    if match is None:
+        raise ImproperlyConfigured(f"Invalid throttle rate {rate!r}.")
+    requests, multiplier, unit = match.groups()
+    return int(requests), int(multiplier or 1) * PERIODS[unit]
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=timeout):
+            return 1
+        return cache.incr(key)
+
+
+def check_rate(scope, kind, ident):
+    """
+    Counts one request for `ident` against the `<scope>:<kind>` rate.
+
+    Returns None if the request is allowed, or the seconds to wait before
+    retrying. Scopes without a configured rate are not throttled.
+    """
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}:{kind}') if scope else None
+    if rate is None or not ident:
+        return None
+
+    limit, period = parse_rate(rate)
+    now = time.time()
+    window = int(now // period)
+    elapsed = (now % period) / period
+
+    ident = f'{kind}:{ident}'
+    key = COUNTER_KEY.format(scope=scope, ident=ident, window=window)
+    current = _incr(key, timeout=2 * period)
+    previous = cache.get(COUNTER_KEY.format(scope=scope, ident=ident, window=window - 1), 0)
+
+    if previous * (1 - elapsed) + current <= limit:
+        return None
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass
+    return _wait(limit, period, elapsed, current, previous)
+
+
+def _wait(limit, period, elapsed, current, previous):
+    """Seconds until a request would fit, with `current` counting the rejected one."""
+    if limit <= 0:
+        # Nothing ever fits; ask the client to come back after a whole period.
+        return period
+    if current > limit:
+        # The current window is full on its own; wait until, as the previous
+        # window, it has slid far enough out for one more request.
+        until = 2 - (limit - 1) / (current - 1)
+    else:
+        until = 1 - (limit - current) / previous
+    return max(1, math.ceil((until - elapsed) * period))
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Limits requests per identity with a sliding window counter.
+
+    Each identity has one counter per fixed window of the rate's period. A
+    request is allowed while the current window's count plus the previous
+    window's count, weighted by how much of it still overlaps the sliding
+    window, stays within the rate. That costs two cache round trips and no
+    timestamp lists, and does not allow the burst at window boundaries that a
+    plain fixed window does.
+
+    Counting is a cache `incr`, which is atomic on Redis and Memcached, and
+    happens before the decision, so concurrent requests from several workers
+    can never all slip under the limit; a rejected request gives its count
+    back with `decr`. The file cache increments with a read and a write, so on
+    it the limits are approximate under heavy concurrency.
+
+    The rate is looked up in `DEFAULT_THROTTLE_RATES` as `<throttle_scope>:<kind>`,
+    where `throttle_scope` is set on the view or the action.
+    """
+    kind = None
+
+    def get_ident_value(self, request, view):
+        """Returns the identity to count requests against, or None to skip this throttle."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        self.wait_seconds = check_rate(scope, self.kind, self.get_ident_value(request, view) if scope else None)
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Counts requests per client address, honouring `NUM_PROXIES` like DRF's throttles."""
+    kind = 'ip'
+
+    def get_ident_value(self, request, view):
+        return self.get_ident(request)
+
+
+class PhoneNumberRateThrottle(SlidingWindowThrottle):
+    """
+    Counts requests per phone number in the request body.
+
+    The field is `throttle_phone_field` on the view, `phone_number` by default.
+    """
+    kind = 'phone'
+
+    def get_ident_value(self, request, view):
+        field = getattr(view, 'throttle_phone_field', 'phone_number')
+        return normalize_phone_number(request.data.get(field) if hasattr(request.data, 'get') else None)
+
+
+def normalize_phone_number(value):
+    # Only digits are kept, so formatting variations share one counter.
+    return re.sub(r'\D', '', str(value or ''))
+
+
+DEFAULT_THROTTLES = [PhoneNumberRateThrottle, IPRateThrottle]
+
+
+def _check_default_throttles(request, scope, phone_number):
+    waits = [
+        check_rate(scope, PhoneNumberRateThrottle.kind, normalize_phone_number(phone_number)),
+        check_rate(scope, IPRateThrottle.kind, IPRateThrottle().get_ident(request)),
+    ]
+    waits = [wait for wait in waits if wait is not None]
+    return max(waits) if waits else None
+
+
+async def acheck_default_throttles(request, scope, phone_number):
+    """
+    Applies `DEFAULT_THROTTLES` in a plain async view, which DRF's throttling does not reach.
+
+    Returns None if the request is allowed, or the seconds to wait.
+    """
+    return await sync_to_async(_check_default_throttles, thread_sensitive=False)(request, scope, phone_number)
@@ -14,8 +14,10 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
+from .views import response_cache_stats
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,4 +27,16 @@ urlpatterns = [
     path('doctors_certifications/', include('doctor_certification.urls')),
     path('doctors_Documents/', include('doctor_documents.urls')),
     path('doctors_bankdetails/', include('doctor_bank_details.urls')),
+    path('doctors_registration/', include('doctor_registration.urls')),
+    path('uploads/', include('filestore.urls')),
+    path('ops/response-cache/', response_cache_stats, name='response-cache-stats'),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Async views for the slow-client and OTP endpoints, at the same paths as
+    # the sync DRF actions they take precedence over.
+    urlpatterns = [
+        path('', include('authapp.async_urls')),
+        path('doctors_certifications/', include('doctor_certification.async_urls')),
+        path('doctors_Documents/', include('doctor_documents.async_urls')),
+    ] + urlpatterns
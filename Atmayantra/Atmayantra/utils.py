@@ -1,6 +1,8 @@
 from rest_framework.response import Response
-from django.http import FileResponse
+from django.http import FileResponse, JsonResponse
 from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.views import exception_handler
 
 def api_response(success=True, message="", data=None, status_code=None, file=None):
     """
@@ -21,6 +23,18 @@ def api_response(success=True, message="", data=None, status_code=None, file=Non
         # The browser will handle it as a download or display it if possible.
         return FileResponse(file)
 
+    response_data, status_code = _envelope(success, message, data, status_code)
+    return Response(response_data, status=status_code)
+
+def json_response(success=True, message="", data=None, status_code=None):
+    """
+    `api_response` for plain Django views, such as the async ones, which have
+    no DRF renderer to turn a `Response` into JSON.
+    """
+    response_data, status_code = _envelope(success, message, data, status_code)
+    return JsonResponse(response_data, status=status_code)
+
+def _envelope(success, message, data, status_code):
     # For JSON responses, we build a consistent structure.
     response_data = {
         "status": "success" if success else "error",
@@ -37,4 +51,33 @@ def api_response(success=True, message="", data=None, status_code=None, file=Non
             # Default to 400 for client errors.
             status_code = status.HTTP_400_BAD_REQUEST
 
-    return Response(response_data, status=status_code)
+    return response_data, status_code
+
+def requested_includes(request):
+    """
+    Returns the set of optional fields a client asked for with `?include=a,b`.
+
+    Heavy fields such as inline base64 file bodies are left out of responses
+    unless they are named here.
+    """
+    if request is None:
+        return set()
+    raw = request.query_params.get('include', '') if hasattr(request, 'query_params') else request.GET.get('include', '')
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+def api_exception_handler(exc, context):
+    """
+    DRF exception handler that wraps upload rejections and throttled requests
+    in the `api_response` envelope, keeping the `Retry-After` header.
+
+    Other exceptions keep DRF's default representation.
+    """
+    from filestore.upload_handlers import UploadRejected
+
+    response = exception_handler(exc, context)
+    if response is not None and isinstance(exc, (UploadRejected, Throttled)):
+        wrapped = api_response(False, str(exc.detail), status_code=response.status_code)
+        if response.has_header('Retry-After'):
+            wrapped['Retry-After'] = response['Retry-After']
+        return wrapped
+    return response
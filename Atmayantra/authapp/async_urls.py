@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import async_views
+
+# The paths of the AuthViewSet actions they replace.
+urlpatterns = [
+    path('auth/signup/', async_views.signup, name='auth-signup-async'),
+    path('auth/verify_signup/', async_views.verify_signup, name='auth-verify-signup-async'),
+    path('auth/login/', async_views.login, name='auth-login-async'),
+    path('auth/verify_login/', async_views.verify_login, name='auth-verify-login-async'),
+]
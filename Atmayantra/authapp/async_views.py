@@ -0,0 +1,128 @@
+"""
+Async versions of the `AuthViewSet` OTP endpoints, routed instead of the
+sync actions when `ASYNC_VIEWS` is on (see `Atmayantra.urls`).
+
+They answer with the same envelope and status codes. Single-statement
+queries go through the async ORM; the user serializer's unique validators,
+password hashing and the transactional OTP replace run in threads.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.db.models import Q
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import status
+
+from Atmayantra.throttling import acheck_default_throttles
+from Atmayantra.utils import json_response
+from .authentication import tokens_for_user
+from .models import User
+from .otp import OTPError, Purpose, aconsume_otp, aissue_otp, asend_otp
+from .serializers import UserSerializer
+from .views import register_user
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidBody(ValueError):
+    pass
+
+
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            raise InvalidBody("Request body is not valid JSON.")
+        if not isinstance(data, dict):
+            raise InvalidBody("Request body must be a JSON object.")
+        return data
+    return request.POST
+
+
+def _throttled(wait):
+    response = json_response(False, f"Request was throttled. Expected available in {wait} seconds.", status_code=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(wait)
+    return response
+
+
+def otp_endpoint(throttle_scope=None):
+    """Exempts the view from CSRF like DRF views, parses the body and applies the scope's throttles first."""
+    def decorator(view):
+        @csrf_exempt
+        @require_POST
+        async def wrapper(request):
+            try:
+                data = _request_data(request)
+            except InvalidBody as e:
+                return json_response(False, str(e), status_code=status.HTTP_400_BAD_REQUEST)
+            if throttle_scope:
+                wait = await acheck_default_throttles(request, throttle_scope, data.get('phone_number'))
+                if wait is not None:
+                    return _throttled(wait)
+            return await view(request, data)
+        return wrapper
+    return decorator
+
+
+@otp_endpoint(throttle_scope='signup')
+async def signup(request, data):
+    serializer = UserSerializer(data=data)
+    # The unique validators query the database.
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response(False, "Invalid data provided.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
+
+    validated_data = serializer.validated_data
+    phone_number = validated_data['phone_number']
+    exists = await User.objects.filter(
+        Q(phone_number=phone_number) | Q(email=validated_data['email']) | Q(username=validated_data['username'])
+    ).aexists()
+    if exists:
+        return json_response(False, "User with given phone number, email, or username already exists.", status_code=status.HTTP_400_BAD_REQUEST)
+
+    # Hashing is CPU-bound, keep it off the event loop.
+    password = await sync_to_async(make_password, thread_sensitive=False)(validated_data['password'])
+    otp = await aissue_otp(Purpose.SIGNUP, phone_number, {**validated_data, 'password': password})
+
+    await asend_otp(phone_number, otp)
+    return json_response(True, f"OTP sent to your phone (simulated): {otp}")
+
+
+@otp_endpoint()
+async def verify_signup(request, data):
+    try:
+        payload = await aconsume_otp(Purpose.SIGNUP, data.get('phone_number'), data.get('otp'))
+    except OTPError as e:
+        return json_response(False, e.message, status_code=status.HTTP_400_BAD_REQUEST)
+
+    serializer = await sync_to_async(register_user)(payload)
+    if not serializer.errors:
+        return json_response(True, "User registered successfully.", serializer.data, status_code=status.HTTP_201_CREATED)
+    return json_response(False, "An error occurred during registration.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
+
+
+@otp_endpoint(throttle_scope='login')
+async def login(request, data):
+    phone_number = data.get('phone_number')
+    user = await User.objects.filter(phone_number=phone_number).only('id').afirst()
+    if user is None:
+        return json_response(False, "User not found.", status_code=status.HTTP_404_NOT_FOUND)
+
+    otp = await aissue_otp(Purpose.LOGIN, phone_number, {'user_id': user.id})
+
+    await asend_otp(phone_number, otp)
+    return json_response(True, f"OTP sent to your phone (simulated): {otp}")
+
+
+@otp_endpoint()
+async def verify_login(request, data):
+    try:
+        payload = await aconsume_otp(Purpose.LOGIN, data.get('phone_number'), data.get('otp'))
+    except OTPError as e:
+        return json_response(False, e.message, status_code=status.HTTP_400_BAD_REQUEST)
+
+    user = await User.objects.aget(id=payload['user_id'])
+    return json_response(True, "Login successful.", tokens_for_user(user))
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+
+USER_KEY = 'auth:user:{user_id}'
+
+# The columns kept in the cache. Other fields of `request.user` are deferred
+# and cost a query only when a view reads them. Model.from_db() expects them
+# in the model's field order.
+CACHED_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in {'id', 'username', 'phone_number', 'user_type', 'is_active', 'is_staff', 'is_superuser', 'token_version'}
+)
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def tokens_for_user(user):
+    """Issues a refresh/access token pair carrying the user's type and token version."""
+    refresh = RefreshToken.for_user(user)
+    refresh['user_type'] = user.user_type
+    refresh[TOKEN_VERSION_CLAIM] = user.token_version
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(USER_KEY.format(user_id=user_id))
+
+
+def _load_user_state(user_id):
+    key = USER_KEY.format(user_id=user_id)
+    state = cache.get(key)
+    # Entries cached by a release with other columns are reloaded.
+    if state is None or state.keys() != set(CACHED_FIELDS):
+        state = User.objects.filter(pk=user_id).values(*CACHED_FIELDS).first()
+        if state is None:
+            return None
+        cache.set(key, state, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+    return state
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user from a short-lived shared cache.
+
+    The stock class loads the user row on every request. Here the columns
+    authorization needs are cached for `AUTH_USER_CACHE_TIMEOUT` seconds under
+    the user's id, so a warm request makes no query. Saving or deleting a user
+    drops the entry, so deactivation and revocation apply on the next request;
+    writes that bypass `save()`, such as `queryset.update()`, take effect
+    within the timeout.
+
+    Tokens carry the user's `token_version`; once `User.revoke_tokens()` bumps
+    it, older tokens are rejected. Tokens issued before the claim existed are
+    treated as version 0.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        state = _load_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("User not found", code='user_not_found')
+
+        user = User.from_db(router.db_for_read(User), CACHED_FIELDS, [state[name] for name in CACHED_FIELDS])
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code='user_inactive')
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+            raise AuthenticationFailed("Token has been revoked", code='token_revoked')
+        return user
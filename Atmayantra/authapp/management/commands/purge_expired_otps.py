@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from authapp.otp import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Deletes OTPs that expired without being verified."
+
+    def handle(self, *args, **options):
+        removed = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired OTP(s)."))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0004_alter_user_user_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OneTimePassword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(choices=[('signup', 'Signup'), ('login', 'Login')], max_length=10)),
+                ('phone_number', models.CharField(max_length=15)),
+                ('code_hash', models.CharField(max_length=64)),
+                ('payload', models.JSONField(default=dict)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='otp_expires_at_idx')],
+                'constraints': [models.UniqueConstraint(fields=('purpose', 'phone_number'), name='otp_purpose_phone_unique')],
+            },
+        ),
+    ]
@@ -38,6 +38,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Carried in issued JWTs; bumping it revokes every token issued before.
+    token_version = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
@@ -45,4 +47,40 @@ class User(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ['username', 'email']
 
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+    def revoke_tokens(self):
+        """Invalidates every access and refresh token issued to this user so far."""
+        self.token_version = models.F('token_version') + 1
+        self.save(update_fields=['token_version'])
+        self.refresh_from_db(fields=['token_version'])
+
+class OneTimePassword(models.Model):
+    """
+    A pending OTP, stored in the database so every worker process sees it.
+
+    Only a keyed hash of the code is kept. `authapp.otp` issues and consumes
+    these rows; see there for the concurrency guarantees.
+    """
+    class Purpose(models.TextChoices):
+        SIGNUP = 'signup', 'Signup'
+        LOGIN = 'login', 'Login'
+
+    purpose = models.CharField(max_length=10, choices=Purpose.choices)
+    phone_number = models.CharField(max_length=15)
+    code_hash = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['purpose', 'phone_number'], name='otp_purpose_phone_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='otp_expires_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.purpose} OTP for {self.phone_number}'
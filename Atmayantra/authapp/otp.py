@@ -0,0 +1,130 @@
+import secrets
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from notifications.dispatch import Channel, aenqueue, enqueue
+from .models import OneTimePassword
+
+Purpose = OneTimePassword.Purpose
+
+
+class OTPError(Exception):
+    """Raised when an OTP cannot be verified. `message` is safe to show to the client."""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def _hash(purpose, phone_number, code):
+    return salted_hmac('authapp.otp', f'{purpose}:{phone_number}:{code}', algorithm='sha256').hexdigest()
+
+
+def issue_otp(purpose, phone_number, payload=None):
+    """
+    Creates a new OTP for `phone_number`, replacing any pending one, and returns the code.
+
+    `payload` is stored with it and handed back by `consume_otp`. Reissuing
+    creates a new row, so a verification racing with a reissue can never
+    consume the new code with the old payload or vice versa.
+    """
+    code = f'{secrets.randbelow(900000) + 100000}'
+    expires_at = timezone.now() + timedelta(seconds=settings.OTP_TTL_SECONDS)
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                OneTimePassword.objects.filter(purpose=purpose, phone_number=phone_number).delete()
+                OneTimePassword.objects.create(
+                    purpose=purpose,
+                    phone_number=phone_number,
+                    code_hash=_hash(purpose, phone_number, code),
+                    payload=payload or {},
+                    expires_at=expires_at,
+                )
+            return code
+        except IntegrityError:
+            # A concurrent request issued one between the delete and the insert; replace it.
+            continue
+    raise OTPError("Could not issue an OTP, please try again.")
+
+
+def consume_otp(purpose, phone_number, code):
+    """
+    Verifies `code` and consumes the OTP, returning its payload.
+
+    Safe under concurrent verification from any number of processes:
+    - every attempt, right or wrong, first claims one of `OTP_MAX_ATTEMPTS`
+      with a conditional UPDATE, so guesses can never exceed the limit;
+    - a correct code is consumed with a conditional DELETE of that exact row,
+      and only the request whose DELETE removed it succeeds.
+
+    Raises `OTPError` if the OTP is missing, expired, exhausted or wrong.
+    """
+    now = timezone.now()
+    otp = OneTimePassword.objects.filter(purpose=purpose, phone_number=phone_number, expires_at__gt=now).first()
+    if otp is None:
+        raise OTPError("Invalid or expired OTP.")
+
+    claimed = OneTimePassword.objects.filter(pk=otp.pk, attempts__lt=settings.OTP_MAX_ATTEMPTS).update(attempts=F('attempts') + 1)
+    if not claimed:
+        raise OTPError("Too many incorrect attempts. Request a new OTP.")
+
+    if not constant_time_compare(otp.code_hash, _hash(purpose, phone_number, code or '')):
+        raise OTPError("Invalid or expired OTP.")
+
+    consumed, _ = OneTimePassword.objects.filter(pk=otp.pk, expires_at__gt=now).delete()
+    if not consumed:
+        # Another request verified the same code first.
+        raise OTPError("Invalid or expired OTP.")
+    return otp.payload
+
+
+async def aissue_otp(purpose, phone_number, payload=None):
+    """Async `issue_otp`. The async ORM cannot open transactions, so the replace runs in a thread."""
+    return await sync_to_async(issue_otp)(purpose, phone_number, payload)
+
+
+async def aconsume_otp(purpose, phone_number, code):
+    """Async `consume_otp`, with the same guarantees; each step is a single statement."""
+    now = timezone.now()
+    otp = await OneTimePassword.objects.filter(purpose=purpose, phone_number=phone_number, expires_at__gt=now).afirst()
+    if otp is None:
+        raise OTPError("Invalid or expired OTP.")
+
+    claimed = await OneTimePassword.objects.filter(pk=otp.pk, attempts__lt=settings.OTP_MAX_ATTEMPTS).aupdate(attempts=F('attempts') + 1)
+    if not claimed:
+        raise OTPError("Too many incorrect attempts. Request a new OTP.")
+
+    if not constant_time_compare(otp.code_hash, _hash(purpose, phone_number, code or '')):
+        raise OTPError("Invalid or expired OTP.")
+
+    consumed, _ = await OneTimePassword.objects.filter(pk=otp.pk, expires_at__gt=now).adelete()
+    if not consumed:
+        raise OTPError("Invalid or expired OTP.")
+    return otp.payload
+
+
+def _otp_message(code):
+    return f"{code} is your Atmayantra verification code. It expires in {settings.OTP_TTL_SECONDS // 60} minutes."
+
+
+def send_otp(phone_number, code):
+    """Queues the code for SMS delivery. It is dropped if it cannot be sent before it expires."""
+    enqueue(Channel.SMS, phone_number, _otp_message(code), ttl=settings.OTP_TTL_SECONDS)
+
+
+async def asend_otp(phone_number, code):
+    """Async `send_otp`."""
+    await aenqueue(Channel.SMS, phone_number, _otp_message(code), ttl=settings.OTP_TTL_SECONDS)
+
+
+def purge_expired():
+    """Deletes expired OTPs and returns how many were removed."""
+    deleted, _ = OneTimePassword.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
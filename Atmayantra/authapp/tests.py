@@ -1,3 +1,297 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Atmayantra.throttling import _wait
+from notifications.models import Notification
+from .authentication import tokens_for_user
+from .models import OneTimePassword, User
+from .otp import OTPError, Purpose, consume_otp, issue_otp
+
+MANAGE_PY = Path(settings.BASE_DIR) / 'manage.py'
+# Keeps throttle counters and cached users out of the project's file cache.
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'authapp-tests'}}
+
+
+class OTPStoreTests(TestCase):
+    def test_code_is_consumed_once(self):
+        code = issue_otp(Purpose.LOGIN, '9000000001', {'user_id': 7})
+        self.assertEqual(consume_otp(Purpose.LOGIN, '9000000001', code), {'user_id': 7})
+        with self.assertRaises(OTPError):
+            consume_otp(Purpose.LOGIN, '9000000001', code)
+
+    def test_reissue_replaces_the_pending_code(self):
+        first = issue_otp(Purpose.LOGIN, '9000000001')
+        second = issue_otp(Purpose.LOGIN, '9000000001')
+        if first != second:
+            with self.assertRaises(OTPError):
+                consume_otp(Purpose.LOGIN, '9000000001', first)
+        consume_otp(Purpose.LOGIN, '9000000001', second)
+
+    def test_purposes_are_separate(self):
+        code = issue_otp(Purpose.SIGNUP, '9000000001')
+        with self.assertRaises(OTPError):
+            consume_otp(Purpose.LOGIN, '9000000001', code)
+
+    def test_expired_code_is_rejected(self):
+        code = issue_otp(Purpose.LOGIN, '9000000001')
+        OneTimePassword.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.assertRaises(OTPError):
+            consume_otp(Purpose.LOGIN, '9000000001', code)
+
+    @override_settings(OTP_MAX_ATTEMPTS=3)
+    def test_attempts_are_limited(self):
+        code = issue_otp(Purpose.LOGIN, '9000000001')
+        wrong = '000000' if code != '000000' else '111111'
+        for _ in range(3):
+            with self.assertRaises(OTPError):
+                consume_otp(Purpose.LOGIN, '9000000001', wrong)
+        with self.assertRaisesMessage(OTPError, "Too many incorrect attempts"):
+            consume_otp(Purpose.LOGIN, '9000000001', code)
+
+    def test_code_is_not_stored_in_clear(self):
+        code = issue_otp(Purpose.LOGIN, '9000000001')
+        self.assertNotIn(code, OneTimePassword.objects.get().code_hash)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHES)
+class AuthFlowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def otp_from(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['message'].rsplit(' ', 1)[-1]
+
+    def test_signup_and_login(self):
+        client = APIClient()
+        signup = {'username': 'asha', 'email': 'asha@example.com', 'phone_number': '9000000001', 'password': 'secret-pw'}
+        code = self.otp_from(client.post('/auth/signup/', signup))
+        self.assertNotIn('secret-pw', str(OneTimePassword.objects.get().payload))
+        # The SMS is only queued for the notification worker.
+        sms = Notification.objects.get(recipient='9000000001')
+        self.assertEqual(sms.status, Notification.Status.PENDING)
+        self.assertIn(code, sms.body)
+
+        response = client.post('/auth/verify_signup/', {'phone_number': '9000000001', 'otp': code})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(User.objects.get(phone_number='9000000001').check_password('secret-pw'))
+
+        code = self.otp_from(client.post('/auth/login/', {'phone_number': '9000000001'}))
+        response = client.post('/auth/verify_login/', {'phone_number': '9000000001', 'otp': code})
+        self.assertIn('access', response.json()['data'])
+        self.assertEqual(client.post('/auth/verify_login/', {'phone_number': '9000000001', 'otp': code}).status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHES)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('9000000001', 'secret-pw', username='asha', email='asha@example.com')
+        self.client = APIClient()
+
+    def get_protected(self, tokens):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        return self.client.get('/auth/protected_view/')
+
+    def test_warm_requests_make_no_queries(self):
+        tokens = tokens_for_user(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_protected(tokens).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.get_protected(tokens)
+        self.assertEqual(response.json()['data']['user_type'], 'User')
+
+    def test_saving_the_user_refreshes_the_cache(self):
+        tokens = tokens_for_user(self.user)
+        self.get_protected(tokens)
+        self.user.user_type = User.UserType.YOGA_DOCTOR
+        self.user.save()
+        self.assertEqual(self.get_protected(tokens).json()['data']['user_type'], 'Yoga Doctor')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_protected(tokens).status_code, 401)
+
+    def test_revoked_tokens_are_rejected(self):
+        old = tokens_for_user(self.user)
+        self.get_protected(old)
+        self.user.revoke_tokens()
+        self.assertEqual(self.get_protected(old).status_code, 401)
+        self.assertEqual(self.get_protected(tokens_for_user(self.user)).status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHES, ROOT_URLCONF='authapp.async_urls')
+class AsyncAuthViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def post(self, path, data):
+        return await self.async_client.post(path, data, content_type='application/json')
+
+    async def test_signup_and_login(self):
+        signup = {'username': 'asha', 'email': 'asha@example.com', 'phone_number': '9000000001', 'password': 'secret-pw'}
+        response = await self.post('/auth/signup/', signup)
+        self.assertEqual(response.status_code, 200, response.content)
+        code = response.json()['message'].rsplit(' ', 1)[-1]
+
+        response = await self.post('/auth/verify_signup/', {'phone_number': '9000000001', 'otp': code})
+        self.assertEqual(response.status_code, 201, response.content)
+        user = await User.objects.aget(phone_number='9000000001')
+        self.assertTrue(user.check_password('secret-pw'))
+
+        code = (await self.post('/auth/login/', {'phone_number': '9000000001'})).json()['message'].rsplit(' ', 1)[-1]
+        response = await self.post('/auth/verify_login/', {'phone_number': '9000000001', 'otp': code})
+        self.assertIn('access', response.json()['data'])
+        self.assertEqual((await self.post('/auth/verify_login/', {'phone_number': '9000000001', 'otp': code})).status_code, 400)
+
+    async def test_rejects_bad_requests(self):
+        self.assertEqual((await self.async_client.get('/auth/login/')).status_code, 405)
+        response = await self.async_client.post('/auth/login/', b'{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((await self.post('/auth/login/', {'phone_number': '9000000009'})).status_code, 404)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'login:phone': '1/m'}})
+    async def test_login_is_throttled(self):
+        self.assertEqual((await self.post('/auth/login/', {'phone_number': '9000000009'})).status_code, 404)
+        response = await self.post('/auth/login/', {'phone_number': '9000000009'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertIn('Retry-After', response)
+
+
+THROTTLE_RATES = {'login:phone': '2/m', 'login:ip': '3/m', 'contact:phone': '1/h'}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHES, REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': THROTTLE_RATES})
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, phone_number, at=None):
+        with mock.patch('Atmayantra.throttling.time.time', return_value=at or time.time()):
+            return self.client.post('/auth/login/', {'phone_number': phone_number})
+
+    def test_phone_number_is_rejected_before_any_database_work(self):
+        self.assertEqual(self.login('9000000001').status_code, 404)
+        self.assertEqual(self.login('90000 00001').status_code, 404)
+        with self.assertNumQueries(0):
+            response = self.login('9000000001')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_ip_limit_spans_phone_numbers(self):
+        for number in ('9000000001', '9000000002', '9000000003'):
+            self.assertEqual(self.login(number).status_code, 404)
+        self.assertEqual(self.login('9000000004').status_code, 429)
+
+    def test_previous_window_weighs_less_as_it_slides_out(self):
+        start = 60 * 1000
+        self.login('9000000001', at=start + 58)
+        self.login('9000000001', at=start + 59)
+        response = self.login('9000000001', at=start + 61)
+        self.assertEqual(response.status_code, 429)
+        # 2 * (1 - 1/60) + 1 must fall to 2 or below: 29 seconds into the next window.
+        self.assertEqual(response['Retry-After'], '29')
+        self.assertEqual(self.login('9000000001', at=start + 60 + 50).status_code, 404)
+
+    def test_zero_limit_waits_a_whole_period(self):
+        self.assertEqual(_wait(0, 60, 0.5, 1, 0), 60)
+
+    def test_contact_form_is_throttled_by_phone_number(self):
+        contact = {'name': 'Asha', 'email': 'asha@example.com', 'phone_no': '9000000001', 'message': 'Hello'}
+        self.assertEqual(self.client.post('/contact-us/contacts/', contact).status_code, 201)
+        self.assertEqual(self.client.post('/contact-us/contacts/', {**contact, 'email': 'b@example.com'}).status_code, 429)
+        self.assertEqual(self.client.get('/contact-us/contacts/').status_code, 200)
+
+
+# Runs in a separate process against a file database shared with the other workers.
+WORKER = '''
+import time
+from authapp.otp import OTPError, consume_otp
+time.sleep(max(0, {start!r} - time.time()))
+try:
+    consume_otp('login', '9000000001', {code!r})
+    print('consumed')
+except OTPError as e:
+    print('rejected:', e.message)
+'''
+
+ISSUE = '''
+from authapp.otp import issue_otp
+print(issue_otp('login', '9000000001', {'user_id': 1}))
+'''
+
+
+class OTPStoreMultiProcessTests(SimpleTestCase):
+    """
+    Verifies the same OTP from several processes at once, as separate gunicorn workers would.
+
+    The test database may be in memory, which other processes cannot see, so
+    the workers share a temporary SQLite file instead.
+    """
+    workers = 8
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.env = {
+            **os.environ,
+            'DATABASE_URL': f"sqlite:///{Path(cls.directory.name) / 'otp.sqlite3'}",
+            'CACHE_LOCATION': str(Path(cls.directory.name) / 'cache'),
+            'SECRET_KEY': os.environ.get('SECRET_KEY') or settings.SECRET_KEY,
+        }
+        cls.manage('migrate', 'authapp', '--noinput')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    @classmethod
+    def manage(cls, *args):
+        return subprocess.run([sys.executable, str(MANAGE_PY), *args], env=cls.env, capture_output=True, text=True, check=True).stdout
+
+    def verify_concurrently(self, code, workers=None):
+        # Every worker waits for the same moment after Django has started, so the verifications overlap.
+        script = WORKER.format(start=time.time() + 3, code=code)
+        processes = [
+            subprocess.Popen(
+                [sys.executable, str(MANAGE_PY), 'shell', '--no-imports', '-c', script],
+                env=self.env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for _ in range(workers or self.workers)
+        ]
+        results = []
+        for process in processes:
+            out, err = process.communicate(timeout=60)
+            self.assertEqual(process.returncode, 0, err)
+            results.append(out.strip())
+        return results
+
+    def test_only_one_concurrent_verification_succeeds(self):
+        code = self.manage('shell', '--no-imports', '-c', ISSUE).strip()
+        results = self.verify_concurrently(code)
+        self.assertEqual(results.count('consumed'), 1, results)
+
+    def test_concurrent_wrong_guesses_stay_within_the_attempt_limit(self):
+        code = self.manage('shell', '--no-imports', '-c', ISSUE).strip()
+        wrong = '000000' if code != '000000' else '111111'
+        results = self.verify_concurrently(wrong)
+        self.assertNotIn('consumed', results)
+        self.assertEqual(results.count('rejected: Invalid or expired OTP.'), settings.OTP_MAX_ATTEMPTS, results)
+        self.assertEqual(self.verify_concurrently(code, workers=1), ['rejected: Too many incorrect attempts. Request a new OTP.'])
@@ -1,20 +1,34 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from django.core.cache import cache
+from django.contrib.auth.hashers import make_password
+from .authentication import tokens_for_user
+from .otp import OTPError, Purpose, consume_otp, issue_otp, send_otp
 from .serializers import UserSerializer
 from .models import User
-from random import randint
-from rest_framework_simplejwt.tokens import RefreshToken
+from Atmayantra.throttling import DEFAULT_THROTTLES
 from Atmayantra.utils import api_response
 import logging
 
 logger = logging.getLogger(__name__)
 
+def register_user(data):
+    """Creates the user from a verified signup payload and returns the serializer, with errors if it was invalid."""
+    serializer = UserSerializer(data=data)
+    if serializer.is_valid():
+        # The stored password is already hashed; set it directly instead of hashing the hash.
+        user = serializer.save(password=None)
+        user.password = data['password']
+        user.save(update_fields=['password'])
+        logger.info(f"User created with ID: {user.id}")
+    return serializer
+
 class AuthViewSet(viewsets.GenericViewSet):
     serializer_class = UserSerializer
+    # Set per action; see Atmayantra.throttling.
+    throttle_scope = None
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=DEFAULT_THROTTLES, throttle_scope='signup')
     def signup(self, request):
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
@@ -24,13 +38,11 @@ class AuthViewSet(viewsets.GenericViewSet):
                User.objects.filter(username=serializer.validated_data['username']).exists():
                 return api_response(False, "User with given phone number, email, or username already exists.", status_code=status.HTTP_400_BAD_REQUEST)
 
-            otp = str(randint(100000, 999999))
-            cache.set(f'otp_{phone_number}', {
-                'otp': otp,
-                'data': serializer.validated_data
-            }, timeout=300)  # OTP valid for 5 minutes
+            # The pending signup is stored in the database, so only the password hash is kept.
+            data = {**serializer.validated_data, 'password': make_password(serializer.validated_data['password'])}
+            otp = issue_otp(Purpose.SIGNUP, phone_number, data)
 
-            print(f"OTP for signup ({phone_number}): {otp}")
+            send_otp(phone_number, otp)
             return api_response(True, f"OTP sent to your phone (simulated): {otp}")
         return api_response(False, "Invalid data provided.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
 
@@ -38,20 +50,17 @@ class AuthViewSet(viewsets.GenericViewSet):
     def verify_signup(self, request):
         phone_number = request.data.get('phone_number')
         otp = request.data.get('otp')
-        stored = cache.get(f'otp_{phone_number}')
-
-        if not stored or stored['otp'] != otp:
-            return api_response(False, "Invalid or expired OTP.", status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            data = consume_otp(Purpose.SIGNUP, phone_number, otp)
+        except OTPError as e:
+            return api_response(False, e.message, status_code=status.HTTP_400_BAD_REQUEST)
 
-        serializer = UserSerializer(data=stored['data'])
-        if serializer.is_valid():
-            user = serializer.save()
-            logger.info(f"User created with ID: {user.id}")
-            cache.delete(f'otp_{phone_number}')
+        serializer = register_user(data)
+        if not serializer.errors:
             return api_response(True, "User registered successfully.", serializer.data, status_code=status.HTTP_201_CREATED)
         return api_response(False, "An error occurred during registration.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=DEFAULT_THROTTLES, throttle_scope='login')
     def login(self, request):
         phone_number = request.data.get('phone_number')
         try:
@@ -59,33 +68,22 @@ class AuthViewSet(viewsets.GenericViewSet):
         except User.DoesNotExist:
             return api_response(False, "User not found.", status_code=status.HTTP_404_NOT_FOUND)
 
-        otp = str(randint(100000, 999999))
-        cache.set(f'login_otp_{phone_number}', {
-            'otp': otp,
-            'user_id': user.id
-        }, timeout=300)
+        otp = issue_otp(Purpose.LOGIN, phone_number, {'user_id': user.id})
 
-        print(f"OTP for login ({phone_number}): {otp}")
+        send_otp(phone_number, otp)
         return api_response(True, f"OTP sent to your phone (simulated): {otp}")
 
     @action(detail=False, methods=['post'])
     def verify_login(self, request):
         phone_number = request.data.get('phone_number')
         otp = request.data.get('otp')
-        stored = cache.get(f'login_otp_{phone_number}')
-
-        if not stored or stored['otp'] != otp:
-            return api_response(False, "Invalid or expired OTP.", status_code=status.HTTP_400_BAD_REQUEST)
-
-        user = User.objects.get(id=stored['user_id'])
-        refresh = RefreshToken.for_user(user)
-        cache.delete(f'login_otp_{phone_number}')
+        try:
+            data = consume_otp(Purpose.LOGIN, phone_number, otp)
+        except OTPError as e:
+            return api_response(False, e.message, status_code=status.HTTP_400_BAD_REQUEST)
 
-        token_data = {
-            'refresh': str(refresh),
-            'access': str(refresh.access_token),
-        }
-        return api_response(True, "Login successful.", token_data)
+        user = User.objects.get(id=data['user_id'])
+        return api_response(True, "Login successful.", tokens_for_user(user))
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def protected_view(self, request):
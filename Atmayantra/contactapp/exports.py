@@ -0,0 +1,12 @@
+from Atmayantra.exports import ExportDataset
+from .models import Contact
+
+
+def contact_export():
+    return ExportDataset('contacts', Contact.objects.all(), {
+        'name': 'name',
+        'email': 'email',
+        'phone_no': 'phone_no',
+        'message': 'message',
+        'updated_at': 'updated_at',
+    })
@@ -1,10 +1,16 @@
 from django.db import models
+from Atmayantra.models import VersionedModel
 
-class Contact(models.Model):
+class Contact(VersionedModel):
     name = models.CharField(max_length=100)
     email = models.EmailField()
     phone_no = models.CharField(max_length=15, unique=True)
     message = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['phone_no', 'version', 'updated_at'], name='contact_version_idx'),
+        ]
+
     def __str__(self):
         return self.name
\ No newline at end of file
@@ -1,3 +1,65 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from authapp.models import User
+from .models import Contact
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ContactExportTests(TestCase):
+    url = '/contact-us/contacts/export/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(phone_number='9000000000', username='admin', email='admin@example.com', password='pw')
+        Contact.objects.create(name='Asha', email='asha@example.com', phone_no='9000000001', message='Hello')
+        Contact.objects.create(name='=HYPERLINK("x")', email='b@example.com', phone_no='9000000002', message='Line\x01break')
+
+    def export(self, output):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(self.url, {'output': output})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_ndjson_is_streamed(self):
+        response = self.export('ndjson')
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['phone_no'] for row in rows], ['9000000001', '9000000002'])
+
+    def test_csv_neutralizes_formulas(self):
+        response = self.export('csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['name', 'email', 'phone_no', 'message', 'updated_at'])
+        self.assertEqual(rows[2][0], '\'=HYPERLINK("x")')
+
+    def test_xlsx(self):
+        response = self.export('xlsx')
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)['contacts']
+        rows = list(sheet.values)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2][3], 'Linebreak')
+
+    def test_requires_admin(self):
+        self.assertEqual(APIClient().get(self.url).status_code, 401)
+
+    def test_unknown_format(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        self.assertEqual(client.get(self.url, {'output': 'pdf'}).status_code, 400)
+
+    def test_command_exports_in_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'contacts.ndjson')
+            call_command('export_directory', 'contacts', '--output', path, '--chunk-size', '1', stderr=io.StringIO())
+            with open(path) as exported:
+                self.assertEqual(len(exported.readlines()), 2)
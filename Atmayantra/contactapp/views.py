@@ -1,18 +1,54 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from .models import Contact
+from .exports import contact_export
 from .serializers import ContactSerializer
+from Atmayantra.conditional import ConditionalRequestMixin, conditional_detail, conditional_list, conditional_write
+from Atmayantra.exports import EXPORT_FORMATS, NDJSON, ExportError, export_response
+from Atmayantra.pagination import NewestFirstPagination
+from Atmayantra.throttling import DEFAULT_THROTTLES
 from Atmayantra.utils import api_response
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(ConditionalRequestMixin, viewsets.ModelViewSet):
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
     lookup_field = 'phone_no'
+    pagination_class = NewestFirstPagination
+    throttle_scope = 'contact'
+    throttle_phone_field = 'phone_no'
+
+    def get_throttles(self):
+        # Only the public contact form is throttled; reads and admin actions are not.
+        if self.action == 'create':
+            return [throttle() for throttle in DEFAULT_THROTTLES]
+        return super().get_throttles()
+
+    def get_row_state_queryset(self):
+        return Contact.objects.filter(phone_no=self.kwargs['phone_no'])
+
+    @conditional_list
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data, "Contacts retrieved successfully.")
+
+    @conditional_detail
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional_write
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    @conditional_write
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -24,6 +60,17 @@ class ContactViewSet(viewsets.ModelViewSet):
         
         return api_response(True, "Contact created successfully.", serializer.data, status_code=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        export_format = request.query_params.get('output', NDJSON)
+        if export_format not in EXPORT_FORMATS:
+            return api_response(False, f"output must be one of: {', '.join(EXPORT_FORMATS)}.", status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return export_response(contact_export(), export_format)
+        except ExportError as e:
+            return api_response(False, str(e), status_code=status.HTTP_400_BAD_REQUEST)
+
     # 4. Example: A custom action that returns a sample error (HTTP 404)
     @action(detail=False, methods=['get'])
     def sample_error(self, request):
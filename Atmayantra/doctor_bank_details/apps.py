@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DoctorBankDetailsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'doctor_bank_details'
+
+    def ready(self):
+        from . import signals  # noqa: F401
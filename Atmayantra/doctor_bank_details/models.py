@@ -1,7 +1,8 @@
 from django.db import models
+from Atmayantra.models import VersionedModel
 from doctor_personal_details.models import DoctorPersonalDetails
 
-class DoctorBankDetails(models.Model):
+class DoctorBankDetails(VersionedModel):
     doctor = models.OneToOneField(
         DoctorPersonalDetails,
         to_field='contact_number',
@@ -14,10 +15,18 @@ class DoctorBankDetails(models.Model):
     ifsc_code = models.CharField(max_length=255)
     upi_id = models.CharField(max_length=255, null=True, blank=True)
     account_type = models.CharField(max_length=50)
-    bank_qr_code = models.TextField(null=True, blank=True)  # To store base64 encoded image
+    bank_qr_code_key = models.CharField(max_length=255, null=True, blank=True)
+    bank_qr_code_size = models.PositiveBigIntegerField(null=True, blank=True)
+    bank_qr_code_content_type = models.CharField(max_length=255, null=True, blank=True)
+    bank_qr_code_sha256 = models.CharField(max_length=64, null=True, blank=True)
+    # Legacy base64 body, only set on rows written before the blob store.
+    bank_qr_code = models.TextField(null=True, blank=True)
 
     class Meta:
         db_table = 'doctor_bank_details'
+        indexes = [
+            models.Index(fields=['doctor', 'version', 'updated_at'], name='bank_details_version_idx'),
+        ]
 
     def __str__(self):
-        return f"Bank details for {self.doctor.full_name}"
\ No newline at end of file
+        return f"Bank details for {self.doctor_id}"
\ No newline at end of file
@@ -1,20 +1,12 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from .models import DoctorBankDetails
 from doctor_personal_details.models import DoctorPersonalDetails
-import base64
-
-class DoctorBankDetailsReadSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = DoctorBankDetails
-        fields = (
-            'doctor',
-            'account_holder_name',
-            'account_number',
-            'ifsc_code',
-            'upi_id',
-            'account_type',
-            'bank_qr_code',
-        )
+from Atmayantra.utils import requested_includes
+from filestore.query import has_blob
+from filestore.images import GRAPHIC
+from filestore.storage import blob_columns, read_blob_base64, store_upload
+from filestore.tasks import schedule_derivatives
 
 class DoctorBankDetailsWriteSerializer(serializers.ModelSerializer):
     doctor = serializers.SlugRelatedField(
@@ -35,14 +27,9 @@ class DoctorBankDetailsWriteSerializer(serializers.ModelSerializer):
             'ifsc_code',
             'upi_id',
             'account_type',
-            'bank_qr_code',
             'bank_qr_code_file',
         )
 
-        extra_kwargs = {
-            'bank_qr_code': {'read_only': True},
-        }
-
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.instance:
@@ -53,20 +40,73 @@ class DoctorBankDetailsWriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"confirm_account_number": "Account numbers do not match."})
         return data
 
+    def _store_qr_code(self, validated_data):
+        qr_code_file = validated_data.pop('bank_qr_code_file', None)
+        if not qr_code_file:
+            return None
+        blob = store_upload(qr_code_file)
+        validated_data.update(blob_columns('bank_qr_code', blob))
+        validated_data['bank_qr_code'] = None
+        return blob
+
     def create(self, validated_data):
         validated_data.pop('confirm_account_number', None)
-        qr_code_file = validated_data.pop('bank_qr_code_file', None)
+        blob = self._store_qr_code(validated_data)
         instance = super().create(validated_data)
-        if qr_code_file:
-            instance.bank_qr_code = base64.b64encode(qr_code_file.read()).decode('utf-8')
-            instance.save()
+        schedule_derivatives(blob, GRAPHIC)
         return instance
 
     def update(self, instance, validated_data):
         validated_data.pop('confirm_account_number', None)
-        qr_code_file = validated_data.pop('bank_qr_code_file', None)
+        blob = self._store_qr_code(validated_data)
         instance = super().update(instance, validated_data)
-        if qr_code_file:
-            instance.bank_qr_code = base64.b64encode(qr_code_file.read()).decode('utf-8')
-            instance.save()
+        schedule_derivatives(blob, GRAPHIC)
         return instance
+
+class DoctorBankDetailsSummarySerializer(serializers.ModelSerializer):
+    """Bank details with QR code metadata and a download URL instead of the image itself."""
+    has_bank_qr_code = serializers.SerializerMethodField()
+    bank_qr_code_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DoctorBankDetails
+        fields = (
+            'doctor',
+            'account_holder_name',
+            'account_number',
+            'ifsc_code',
+            'upi_id',
+            'account_type',
+            'has_bank_qr_code',
+            'bank_qr_code_url',
+            'bank_qr_code_size',
+            'bank_qr_code_content_type',
+        )
+
+    def get_has_bank_qr_code(self, obj):
+        return has_blob(obj, 'bank_qr_code')
+
+    def get_bank_qr_code_url(self, obj):
+        if not has_blob(obj, 'bank_qr_code'):
+            return None
+        return reverse('doctor-bank-qr-code', kwargs={'contact_number': obj.doctor_id}, request=self.context.get('request'))
+
+class DoctorBankDetailsReadSerializer(DoctorBankDetailsSummarySerializer):
+    """
+    Bank details with QR code metadata and a download URL.
+
+    The inline base64 QR code is only added when requested with
+    `?include=bank_qr_code`.
+    """
+    bank_qr_code = serializers.SerializerMethodField()
+
+    class Meta(DoctorBankDetailsSummarySerializer.Meta):
+        fields = DoctorBankDetailsSummarySerializer.Meta.fields + ('bank_qr_code',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'bank_qr_code' not in requested_includes(self.context.get('request')):
+            self.fields.pop('bank_qr_code')
+
+    def get_bank_qr_code(self, obj):
+        return read_blob_base64(obj.bank_qr_code_key, obj.bank_qr_code)
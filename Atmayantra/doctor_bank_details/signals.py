@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Atmayantra.response_cache import bump_doctor_version
+from doctor_personal_details.changes import record_change
+from doctor_personal_details.models import DoctorChange
+from .models import DoctorBankDetails
+
+
+@receiver(post_save, sender=DoctorBankDetails)
+@receiver(post_delete, sender=DoctorBankDetails)
+def invalidate_doctor_cache(sender, instance, **kwargs):
+    # The foreign key points at the doctor's contact number.
+    bump_doctor_version(instance.doctor_id)
+    # Again after commit, in case a request cached the old row in between.
+    transaction.on_commit(lambda: bump_doctor_version(instance.doctor_id))
+
+
+@receiver(post_save, sender=DoctorBankDetails)
+def log_bank_details_saved(sender, instance, **kwargs):
+    record_change(DoctorChange.BANK_DETAILS, instance, instance.doctor_id)
+
+
+@receiver(post_delete, sender=DoctorBankDetails)
+def log_bank_details_deleted(sender, instance, **kwargs):
+    record_change(DoctorChange.BANK_DETAILS, instance, instance.doctor_id, DoctorChange.DELETE)
@@ -1,3 +1,70 @@
-from django.test import TestCase
+import base64
+import io
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from doctor_documents.tests import use_temporary_blob_store
+from doctor_personal_details.models import DoctorChange
+from doctor_personal_details.tests import LOCAL_CACHES, create_doctor
+from filestore.storage import blob_columns, store_upload
+from .models import DoctorBankDetails
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHES)
+class BankDetailsReadTests(TestCase):
+    url = '/doctors_bankdetails/doctor-bank/9000000001/'
+
+    def setUp(self):
+        use_temporary_blob_store(self)
+        self.qr_code = png_bytes()
+        blob = store_upload(SimpleUploadedFile('qr.png', self.qr_code, content_type='image/png'))
+        DoctorBankDetails.objects.create(
+            doctor=create_doctor('9000000001', 'Asha Rao'), account_holder_name='Asha Rao', account_number='1',
+            ifsc_code='IFSC0001', account_type='savings', **blob_columns('bank_qr_code', blob),
+        )
+        self.client = APIClient()
+
+    def test_qr_code_is_described_not_inlined(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(self.url).json()['data']
+        self.assertNotIn('bank_qr_code', data)
+        self.assertTrue(data['has_bank_qr_code'])
+        self.assertEqual((data['bank_qr_code_size'], data['bank_qr_code_content_type']), (len(self.qr_code), 'image/png'))
+        self.assertTrue(data['bank_qr_code_url'].endswith('/doctors_bankdetails/doctor-bank/9000000001/qr_code/'))
+
+        # The legacy base64 column is never read for it.
+        row_query = next(query['sql'] for query in queries if 'FROM "doctor_bank_details"' in query['sql'])
+        self.assertNotIn('"doctor_bank_details"."bank_qr_code",', row_query)
+
+    def test_inline_qr_code_is_opt_in(self):
+        data = self.client.get(self.url, {'include': 'bank_qr_code'}).json()['data']
+        self.assertEqual(base64.b64decode(data['bank_qr_code']), self.qr_code)
+
+    def test_qr_code_download(self):
+        response = self.client.get(f'{self.url}qr_code/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.qr_code)
+
+    def test_update_describes_the_qr_code(self):
+        qr_code = SimpleUploadedFile('qr.png', png_bytes(), content_type='image/png')
+        response = self.client.patch(self.url, {'bank_qr_code_file': qr_code}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()['data']
+        self.assertNotIn('bank_qr_code', data)
+        self.assertTrue(data['has_bank_qr_code'])
+        self.assertEqual(data['bank_qr_code_content_type'], 'image/png')
+
+        # The QR code is written with the rest of the row, in a single save.
+        self.assertEqual(response['ETag'], '"9000000001.2"')
+        self.assertEqual(DoctorChange.objects.filter(resource=DoctorChange.BANK_DETAILS).count(), 2)
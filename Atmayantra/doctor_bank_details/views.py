@@ -1,22 +1,23 @@
-import base64
-from datetime import datetime
-from django.db import transaction
 from django.http import Http404
-from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
-from doctor_certification.models import DoctorCertification
-from doctor_documents.models import DoctorDocument
-from doctor_personal_details.models import DoctorPersonalDetails
 from .models import DoctorBankDetails
 from .serializers import DoctorBankDetailsReadSerializer, DoctorBankDetailsWriteSerializer
-from Atmayantra.utils import api_response
+from Atmayantra.conditional import ConditionalRequestMixin, conditional_detail, conditional_write
+from Atmayantra.response_cache import cache_doctor_response
+from Atmayantra.utils import api_response, requested_includes
+from doctor_registration.drafts import SESSION_KEY, Step, load_draft
+from doctor_registration.finalize import RegistrationError, finalize_registration
+from doctor_registration.serializers import RegistrationSerializer
+from filestore.query import defer_blob_fields
+from filestore.images import GRAPHIC, IMAGE_SIZES, ORIGINAL_SIZE, serve_image_field
+from filestore.upload_handlers import VerifiedUploadMixin
 import logging
 
 logger = logging.getLogger(__name__)
 
-class DoctorBankDetailsViewSet(viewsets.ModelViewSet):
+class DoctorBankDetailsViewSet(ConditionalRequestMixin, VerifiedUploadMixin, viewsets.ModelViewSet):
     parser_classes = (MultiPartParser, FormParser)
     queryset = DoctorBankDetails.objects.all()
     lookup_field = 'doctor__contact_number'
@@ -27,6 +28,16 @@ class DoctorBankDetailsViewSet(viewsets.ModelViewSet):
             return DoctorBankDetailsWriteSerializer
         return DoctorBankDetailsReadSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'qr_code':
+            # Downloads only need blob metadata, never the legacy base64 body.
+            queryset = queryset.defer('bank_qr_code')
+        elif self.action in ('list', 'retrieve') and 'bank_qr_code' not in requested_includes(self.request):
+            # Reads return QR code metadata and a download URL, not the image itself.
+            queryset = defer_blob_fields(queryset, 'bank_qr_code')
+        return queryset
+
     def get_object(self):
         queryset = self.get_queryset()
         lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
@@ -37,22 +48,15 @@ class DoctorBankDetailsViewSet(viewsets.ModelViewSet):
         self.check_object_permissions(self.request, obj)
         return obj
 
+    def get_row_state_queryset(self):
+        return DoctorBankDetails.objects.filter(doctor_id=self.kwargs['contact_number'])
+
     def create(self, request, *args, **kwargs):
         logger.info("Starting final step of doctor registration.")
-        registration_data = request.session.get('doctor_registration_data')
-        if not registration_data or 'personal_details' not in registration_data or 'certification' not in registration_data:
-            logger.warning("Attempted to create doctor bank details without completing previous steps.")
-            return api_response(False, "Previous steps must be completed first.", status_code=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            start_time = datetime.fromisoformat(registration_data['start_time'])
-            if timezone.now() - start_time > timezone.timedelta(days=1):
-                logger.warning("Doctor registration process expired.")
-                del request.session['doctor_registration_data']
-                return api_response(False, "The registration process has expired. Please start over.", status_code=status.HTTP_400_BAD_REQUEST)
-        except (ValueError, TypeError):
-            logger.error("Could not parse start_time from session data.")
-            return api_response(False, "Invalid session data. Please start over.", status_code=status.HTTP_400_BAD_REQUEST)
+        draft, error_response = load_draft(request, required_steps=(Step.PERSONAL_DETAILS, Step.CERTIFICATION))
+        if error_response:
+            logger.warning("Attempted to create doctor bank details without an active registration draft.")
+            return error_response
 
         data = request.data.copy()
         data.pop('doctor', None)
@@ -60,59 +64,42 @@ class DoctorBankDetailsViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return api_response(False, "Invalid bank details provided.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
         
-        bank_details_data = serializer.validated_data
-
         try:
-            with transaction.atomic():
-                personal_details_data = registration_data['personal_details']
-                doctor = DoctorPersonalDetails.objects.create(**personal_details_data)
-                logger.info(f"Created doctor personal details for {doctor.contact_number}")
-
-                certification_data = registration_data['certification']
-                certification_data['doctor'] = doctor
-                DoctorCertification.objects.create(**certification_data)
-                logger.info(f"Created doctor certification for {doctor.contact_number}")
-
-                documents_data = registration_data.get('documents', [])
-                for doc_data in documents_data:
-                    doc_data['doctor'] = doctor
-                    DoctorDocument.objects.create(**doc_data)
-                logger.info(f"Created {len(documents_data)} documents for {doctor.contact_number}")
-
-                bank_details_data['doctor'] = doctor
-                bank_details_data.pop('confirm_account_number', None)
-                DoctorBankDetails.objects.create(**bank_details_data)
-                logger.info(f"Created doctor bank details for {doctor.contact_number}")
-
+            registration = finalize_registration(draft, serializer.validated_data)
+        except RegistrationError as e:
+            return api_response(False, e.message, e.data, status_code=e.status_code)
         except Exception as e:
             logger.error(f"Error during doctor registration: {e}", exc_info=True)
             return api_response(False, f"An error occurred while saving data: {str(e)}", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        del request.session['doctor_registration_data']
-        logger.info(f"Successfully completed doctor registration for {doctor.contact_number}")
-        
-        read_serializer = DoctorPersonalDetailsSerializer(doctor)
-        
+        request.session.pop(SESSION_KEY, None)
+        logger.info(f"Successfully completed doctor registration for {registration.doctor.contact_number}")
+
         return api_response(
             success=True, 
             message="Step 4 of 4: Doctor registration complete! All details saved.", 
-            data=read_serializer.data,
+            data=RegistrationSerializer(registration, context={'request': request}).data,
             status_code=status.HTTP_201_CREATED
         )
 
+    @conditional_detail
+    @cache_doctor_response('bank_details')
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         return api_response(True, "Bank details retrieved successfully.", serializer.data)
 
+    @conditional_write
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
-        return api_response(True, "Bank details updated successfully.", serializer.data)
+        read_serializer = DoctorBankDetailsReadSerializer(instance, context={'request': request})
+        return api_response(True, "Bank details updated successfully.", read_serializer.data)
 
+    @conditional_write
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance)
@@ -121,12 +108,12 @@ class DoctorBankDetailsViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def qr_code(self, request, contact_number=None):
         instance = self.get_object()
-        if not instance.bank_qr_code:
+        if not instance.bank_qr_code_key and not instance.bank_qr_code:
             return api_response(False, "QR Code not found.", status_code=status.HTTP_404_NOT_FOUND)
+        if request.query_params.get('size', ORIGINAL_SIZE) not in IMAGE_SIZES:
+            return api_response(False, f"size must be one of: {', '.join(IMAGE_SIZES)}.", status_code=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # The api_response helper handles FileResponse automatically
-            decoded_file = base64.b64decode(instance.bank_qr_code)
-            return api_response(file=decoded_file)
+            return serve_image_field(request, instance, 'bank_qr_code', kind=GRAPHIC)
         except Exception as e:
             return api_response(False, f'Error processing QR code: {e}', status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
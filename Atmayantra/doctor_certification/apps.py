@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DoctorCertificationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'doctor_certification'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .async_views import download_file
+from .models import DoctorCertification
+
+# The paths of the router's download_<slot> actions.
+urlpatterns = [
+    path(f'certifications/<str:contact_number>/download_{slot}/', download_file, {'slot': slot}, name=f'certification-download-{slot}-async')
+    for slot in DoctorCertification.FILE_SLOTS
+]
@@ -0,0 +1,40 @@
+"""
+Async versions of the certificate download actions, routed instead of the
+sync ones when `ASYNC_VIEWS` is on (see `Atmayantra.urls`).
+"""
+from django.views.decorators.http import require_safe
+from rest_framework import status
+
+from Atmayantra.utils import json_response
+from filestore.downloads import aserve_blob, legacy_etag
+from .models import DoctorCertification
+
+
+@require_safe
+async def download_file(request, contact_number, slot):
+    columns = [f'{slot}_key', f'{slot}_sha256', f'{slot}_content_type', f'{slot}_filename']
+    row = await DoctorCertification.objects.filter(doctor__contact_number=contact_number).values('pk', 'version', 'updated_at', *columns).afirst()
+    if row is None:
+        return json_response(False, "No DoctorCertification matches the given query.", status_code=status.HTTP_404_NOT_FOUND)
+
+    key = row[f'{slot}_key']
+    # Rows written before the blob store still carry a base64 body; only those read it.
+    legacy_base64 = None
+    if not key:
+        legacy_base64 = await DoctorCertification.objects.filter(doctor__contact_number=contact_number).values_list(slot, flat=True).afirst()
+        if not legacy_base64:
+            return json_response(False, "File not found.", status_code=status.HTTP_404_NOT_FOUND)
+
+    try:
+        return await aserve_blob(
+            request,
+            key=key,
+            sha256=row[f'{slot}_sha256'],
+            content_type=row[f'{slot}_content_type'],
+            filename=row[f'{slot}_filename'],
+            legacy_base64=legacy_base64,
+            legacy_etag=legacy_etag(slot, row['pk'], row['version']),
+            legacy_modified=row['updated_at'],
+        )
+    except Exception as e:
+        return json_response(False, f'Error processing file: {e}', status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_certification', '0004_alter_doctorcertification_graduation_certificate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='experience_letter_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='experience_letter_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='experience_letter_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='experience_letter_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='graduation_certificate_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='graduation_certificate_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='graduation_certificate_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='graduation_certificate_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='license_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='license_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='license_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='license_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='resume_cv_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='resume_cv_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='resume_cv_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='resume_cv_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def clean_year_of_experience(apps, schema_editor):
+    """Normalises the free-text column so it can be converted to an integer; unparseable values become NULL."""
+    DoctorCertification = apps.get_model('doctor_certification', 'DoctorCertification')
+    for pk, value in DoctorCertification.objects.values_list('pk', 'year_of_experience').iterator():
+        cleaned = (value or '').strip()
+        if cleaned.isdigit():
+            if cleaned != value:
+                DoctorCertification.objects.filter(pk=pk).update(year_of_experience=cleaned)
+        else:
+            DoctorCertification.objects.filter(pk=pk).update(year_of_experience=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_certification', '0005_doctorcertification_experience_letter_content_type_and_more'),
+    ]
+
+    operations = [
+        # NULL must be allowed before unparseable values can be cleared.
+        migrations.AlterField(
+            model_name='doctorcertification',
+            name='year_of_experience',
+            field=models.CharField(max_length=2, null=True),
+        ),
+        migrations.RunPython(clean_year_of_experience, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_certification', '0006_clean_year_of_experience'),
+        ('doctor_personal_details', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='doctorcertification',
+            name='year_of_experience',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='doctorcertification',
+            index=models.Index(fields=['specialization', 'year_of_experience'], name='cert_specialization_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorcertification',
+            index=models.Index(fields=['certification_type', 'year_of_experience'], name='cert_type_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_certification', '0007_year_of_experience_integer'),
+        ('doctor_personal_details', '0009_versioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='doctorcertification',
+            index=models.Index(fields=['doctor', 'version', 'updated_at'], name='cert_version_idx'),
+        ),
+    ]
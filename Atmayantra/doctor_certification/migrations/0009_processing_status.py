@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_certification', '0008_versioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        # Files uploaded before the checks existed are not queued for them.
+        migrations.AddField(
+            model_name='doctorcertification',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='doctorcertification',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
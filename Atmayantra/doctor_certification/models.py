@@ -1,26 +1,58 @@
 from django.db import models
+from Atmayantra.models import VersionedModel
+from filestore.models import ProcessingStatus
 from doctor_personal_details.models import DoctorPersonalDetails
 
-class DoctorCertification(models.Model):
+class DoctorCertification(VersionedModel):
+    FILE_SLOTS = ('graduation_certificate', 'experience_letter', 'resume_cv', 'license')
+
     doctor = models.OneToOneField(DoctorPersonalDetails, on_delete=models.CASCADE, primary_key=True, related_name='certification')
 
     highest_degree = models.CharField(max_length=255)
     year_of_graduation = models.CharField(max_length=4)
-    year_of_experience = models.CharField(max_length=2)
+    year_of_experience = models.PositiveSmallIntegerField(null=True)
     yoga_certified = models.CharField(max_length=3)
     certification_type = models.CharField(max_length=255)
     issuing_authority = models.CharField(max_length=255)
     specialization = models.CharField(max_length=255)
     license_number = models.CharField(max_length=255)
 
+    # Each file slot keeps blob store metadata; the bare TextField is the
+    # legacy base64 body, only set on rows written before the blob store.
     graduation_certificate = models.TextField(null=True, blank=True)
     graduation_certificate_filename = models.CharField(max_length=255, null=True, blank=True)
+    graduation_certificate_key = models.CharField(max_length=255, null=True, blank=True)
+    graduation_certificate_size = models.PositiveBigIntegerField(null=True, blank=True)
+    graduation_certificate_content_type = models.CharField(max_length=255, null=True, blank=True)
+    graduation_certificate_sha256 = models.CharField(max_length=64, null=True, blank=True)
     experience_letter = models.TextField(null=True, blank=True)
     experience_letter_filename = models.CharField(max_length=255, null=True, blank=True)
+    experience_letter_key = models.CharField(max_length=255, null=True, blank=True)
+    experience_letter_size = models.PositiveBigIntegerField(null=True, blank=True)
+    experience_letter_content_type = models.CharField(max_length=255, null=True, blank=True)
+    experience_letter_sha256 = models.CharField(max_length=64, null=True, blank=True)
     resume_cv = models.TextField(null=True, blank=True)
     resume_cv_filename = models.CharField(max_length=255, null=True, blank=True)
+    resume_cv_key = models.CharField(max_length=255, null=True, blank=True)
+    resume_cv_size = models.PositiveBigIntegerField(null=True, blank=True)
+    resume_cv_content_type = models.CharField(max_length=255, null=True, blank=True)
+    resume_cv_sha256 = models.CharField(max_length=64, null=True, blank=True)
     license = models.TextField(null=True, blank=True)
     license_filename = models.CharField(max_length=255, null=True, blank=True)
+    license_key = models.CharField(max_length=255, null=True, blank=True)
+    license_size = models.PositiveBigIntegerField(null=True, blank=True)
+    license_content_type = models.CharField(max_length=255, null=True, blank=True)
+    license_sha256 = models.CharField(max_length=64, null=True, blank=True)
+    # Covers all file slots; set by the doctor_certification.check_files job.
+    processing_status = models.CharField(max_length=10, choices=ProcessingStatus.choices, default=ProcessingStatus.PENDING)
+    processing_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['specialization', 'year_of_experience'], name='cert_specialization_idx'),
+            models.Index(fields=['certification_type', 'year_of_experience'], name='cert_type_idx'),
+            models.Index(fields=['doctor', 'version', 'updated_at'], name='cert_version_idx'),
+        ]
 
     def __str__(self):
-        return f"Certification for {self.doctor.full_name}"
\ No newline at end of file
+        return f"Certification for doctor {self.doctor_id}"
\ No newline at end of file
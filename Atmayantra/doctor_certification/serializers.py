@@ -1,33 +1,47 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from .models import DoctorCertification
 from doctor_personal_details.models import DoctorPersonalDetails
-import base64
+from Atmayantra.utils import requested_includes
+from filestore.query import has_blob
+from filestore.models import ProcessingStatus
+from filestore.storage import blob_columns, read_blob_base64, store_upload
+from .tasks import schedule_file_check
+
+ALLOWED_CONTENT_TYPES = settings.DOCUMENT_CONTENT_TYPES
 
 class DoctorCertificationReadSerializer(serializers.ModelSerializer):
+    """
+    Lean certification representation.
+
+    Each file slot is described by a presence flag, size, filename, content type
+    and download URL, all read from metadata columns. The base64 body of a slot
+    is only added when requested, e.g. `?include=license,resume_cv`.
+    """
     class Meta:
         model = DoctorCertification
-        exclude = ('graduation_certificate', 'experience_letter', 'resume_cv', 'license')
+        exclude = DoctorCertification.FILE_SLOTS + tuple(f'{slot}_key' for slot in DoctorCertification.FILE_SLOTS)
 
     def to_representation(self, instance):
         request = self.context.get('request')
+        includes = requested_includes(request)
         data = super().to_representation(instance)
         contact_number = instance.doctor.contact_number
-        base_url = '/doctors_certifications'
-
-        # Add URLs for file downloads
-        if instance.graduation_certificate:
-            data['graduation_certificate_url'] = request.build_absolute_uri(f'{base_url}/download/graduation-certificate/{contact_number}/')
-            data['graduation_certificate_base64'] = instance.graduation_certificate
-        if instance.experience_letter:
-            data['experience_letter_url'] = request.build_absolute_uri(f'{base_url}/download/experience-letter/{contact_number}/')
-            data['experience_letter_base64'] = instance.experience_letter
-        if instance.resume_cv:
-            data['resume_cv_url'] = request.build_absolute_uri(f'{base_url}/download/resume-cv/{contact_number}/')
-            data['resume_cv_base64'] = instance.resume_cv
-        if instance.license:
-            data['license_url'] = request.build_absolute_uri(f'{base_url}/download/license/{contact_number}/')
-            data['license_base64'] = instance.license
-        
+
+        for slot in DoctorCertification.FILE_SLOTS:
+            present = has_blob(instance, slot)
+            data[f'has_{slot}'] = present
+            data[f'{slot}_url'] = None
+            if present:
+                data[f'{slot}_url'] = reverse(
+                    f"certification-download-{slot.replace('_', '-')}",
+                    kwargs={'contact_number': contact_number},
+                    request=request,
+                )
+                if slot in includes:
+                    data[f'{slot}_base64'] = read_blob_base64(getattr(instance, f'{slot}_key'), getattr(instance, slot))
+
         # Ensure doctor contact number is in the representation
         data['doctor'] = contact_number
 
@@ -57,20 +71,25 @@ class DoctorCertificationWriteSerializer(serializers.ModelSerializer):
             'resume_cv',
             'license',
         )
+        extra_kwargs = {
+            # Nullable only so legacy free-text values that were not numbers could be cleared.
+            'year_of_experience': {'required': True, 'allow_null': False, 'max_value': 99},
+        }
 
     def validate(self, data):
-        allowed_types = ['application/pdf', 'image/jpeg', 'image/png']
         for field_name in ['graduation_certificate', 'experience_letter', 'resume_cv', 'license']:
             if field_name in data and data[field_name] is not None:
                 uploaded_file = data[field_name]
-                if uploaded_file.content_type not in allowed_types:
+                # content_type was verified against the file's magic bytes by VerifyingUploadHandler.
+                if uploaded_file.content_type not in ALLOWED_CONTENT_TYPES:
                     raise serializers.ValidationError(f"Invalid file type for {field_name}. Only PDF, JPG, and PNG are allowed.")
         return data
 
-    def _encode_file(self, file):
-        if file:
-            return base64.b64encode(file.read()).decode('utf-8'), file.name
-        return None, None
+    def _store_file(self, slot, file):
+        values = blob_columns(slot, store_upload(file) if file else None)
+        values[slot] = None
+        values[f'{slot}_filename'] = file.name if file else None
+        return values
 
     def create(self, validated_data):
         contact_number = validated_data.pop('doctor')
@@ -84,12 +103,11 @@ class DoctorCertificationWriteSerializer(serializers.ModelSerializer):
 
         validated_data['doctor'] = doctor_instance
 
-        validated_data['graduation_certificate'], validated_data['graduation_certificate_filename'] = self._encode_file(validated_data.pop('graduation_certificate', None))
-        validated_data['experience_letter'], validated_data['experience_letter_filename'] = self._encode_file(validated_data.pop('experience_letter', None))
-        validated_data['resume_cv'], validated_data['resume_cv_filename'] = self._encode_file(validated_data.pop('resume_cv', None))
-        validated_data['license'], validated_data['license_filename'] = self._encode_file(validated_data.pop('license', None))
+        for slot in DoctorCertification.FILE_SLOTS:
+            validated_data.update(self._store_file(slot, validated_data.pop(slot, None)))
 
         certification = DoctorCertification.objects.create(**validated_data)
+        schedule_file_check(certification)
         return certification
 
     def update(self, instance, validated_data):
@@ -102,14 +120,15 @@ class DoctorCertificationWriteSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Doctor with this contact number does not exist.")
 
         # Handle file updates
-        if 'graduation_certificate' in validated_data:
-            instance.graduation_certificate, instance.graduation_certificate_filename = self._encode_file(validated_data.pop('graduation_certificate', None))
-        if 'experience_letter' in validated_data:
-            instance.experience_letter, instance.experience_letter_filename = self._encode_file(validated_data.pop('experience_letter', None))
-        if 'resume_cv' in validated_data:
-            instance.resume_cv, instance.resume_cv_filename = self._encode_file(validated_data.pop('resume_cv', None))
-        if 'license' in validated_data:
-            instance.license, instance.license_filename = self._encode_file(validated_data.pop('license', None))
+        files_changed = False
+        for slot in DoctorCertification.FILE_SLOTS:
+            if slot in validated_data:
+                for attr, value in self._store_file(slot, validated_data.pop(slot, None)).items():
+                    setattr(instance, attr, value)
+                files_changed = True
+        if files_changed:
+            instance.processing_status = ProcessingStatus.PENDING
+            instance.processing_error = ''
 
         # Update other fields
         instance.highest_degree = validated_data.get('highest_degree', instance.highest_degree)
@@ -122,4 +141,11 @@ class DoctorCertificationWriteSerializer(serializers.ModelSerializer):
         instance.license_number = validated_data.get('license_number', instance.license_number)
 
         instance.save()
+        if files_changed:
+            schedule_file_check(instance)
         return instance
+
+class DoctorCertificationCommitSerializer(serializers.Serializer):
+    """Stores a completed chunked upload in one of the certification's file slots."""
+    upload_id = serializers.UUIDField()
+    slot = serializers.ChoiceField(choices=DoctorCertification.FILE_SLOTS)
@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Atmayantra.response_cache import bump_doctor_version
+from doctor_personal_details.changes import record_change
+from doctor_personal_details.models import DoctorChange, DoctorPersonalDetails
+from .models import DoctorCertification
+
+
+def _contact_number(instance):
+    # The certification's key is the doctor's id, not its contact number, so
+    # the views and jobs that save certifications load the doctor with them.
+    try:
+        return instance.doctor.contact_number
+    except DoctorPersonalDetails.DoesNotExist:
+        # Deleted together with the doctor, whose own signals cover it.
+        return None
+
+
+@receiver(post_save, sender=DoctorCertification)
+@receiver(post_delete, sender=DoctorCertification)
+def invalidate_doctor_cache(sender, instance, **kwargs):
+    contact_number = _contact_number(instance)
+    if contact_number:
+        bump_doctor_version(contact_number)
+        # Again after commit, in case a request cached the old row in between.
+        transaction.on_commit(lambda: bump_doctor_version(contact_number))
+
+
+@receiver(post_save, sender=DoctorCertification)
+def log_certification_saved(sender, instance, **kwargs):
+    record_change(DoctorChange.CERTIFICATION, instance, _contact_number(instance))
+
+
+@receiver(post_delete, sender=DoctorCertification)
+def log_certification_deleted(sender, instance, **kwargs):
+    contact_number = _contact_number(instance)
+    if contact_number:
+        record_change(DoctorChange.CERTIFICATION, instance, contact_number, DoctorChange.DELETE)
@@ -0,0 +1,52 @@
+from django.db import transaction
+
+from filestore.inspection import InvalidFile, inspect_blob
+from filestore.models import ProcessingStatus
+from jobs.queue import enqueue, task
+from .models import DoctorCertification
+
+
+def _file_hashes(certification):
+    return {slot: getattr(certification, f'{slot}_sha256') for slot in DoctorCertification.FILE_SLOTS}
+
+
+@task('doctor_certification.check_files')
+def check_files(certification_id, file_hashes):
+    """Checks every file of a certification end to end."""
+    certification = DoctorCertification.objects.filter(pk=certification_id).first()
+    if certification is None or _file_hashes(certification) != file_hashes:
+        # Deleted, or a file was replaced and a newer job handles that.
+        return
+
+    errors = []
+    for slot in DoctorCertification.FILE_SLOTS:
+        key = getattr(certification, f'{slot}_key')
+        if not key:
+            continue
+        try:
+            inspect_blob(key, getattr(certification, f'{slot}_content_type'))
+        except InvalidFile as e:
+            errors.append(f"{slot}: {e}")
+
+    with transaction.atomic():
+        certification = (
+            DoctorCertification.objects.select_for_update(of=('self',))
+            .select_related('doctor').defer('doctor__profile_photo')
+            .filter(pk=certification_id).first()
+        )
+        if certification is None or _file_hashes(certification) != file_hashes:
+            return
+        certification.processing_status = ProcessingStatus.FAILED if errors else ProcessingStatus.READY
+        certification.processing_error = '\n'.join(errors)
+        certification.save(update_fields=['processing_status', 'processing_error'])
+
+
+def file_check_job(certification):
+    """Returns the `(name, payload)` of the job checking a certification's files."""
+    return 'doctor_certification.check_files', {'certification_id': certification.pk, 'file_hashes': _file_hashes(certification)}
+
+
+def schedule_file_check(certification):
+    """Queues the checks of a certification whose files were just stored."""
+    name, payload = file_check_job(certification)
+    enqueue(name, **payload)
@@ -1,3 +1,91 @@
-from django.test import TestCase
+import base64
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from doctor_personal_details.models import DoctorPersonalDetails
+from doctor_personal_details.tests import LOCAL_CACHES
+from filestore.models import ProcessingStatus, UploadSession
+from filestore.tests import PDF, sha256, use_temporary_storage
+from filestore.uploads import start_session
+from jobs.models import Job
+from jobs.queue import run_pending
+from .models import DoctorCertification
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHES)
+class CertificationTests(TestCase):
+    url = '/doctors_certifications/certifications/9000000001/'
+
+    def setUp(self):
+        use_temporary_storage(self)
+        doctor = DoctorPersonalDetails.objects.create(
+            contact_number='9000000001', full_name='Asha Rao', specialization='Yoga', experience=5,
+            hospital='City Hospital', gender='F', email='asha@example.com', address='Address',
+        )
+        DoctorCertification.objects.create(
+            doctor=doctor, highest_degree='BNYS', year_of_graduation='2010', year_of_experience=5, yoga_certified='yes',
+            certification_type='QCI', issuing_authority='Board', specialization='Hatha', license_number='L-1',
+        )
+        self.client = APIClient()
+
+    def upload_license(self, content=PDF):
+        response = self.client.patch(self.url, {'license': SimpleUploadedFile('license.pdf', content, content_type='application/pdf')}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.json())
+        return response.json()['data']
+
+    def test_files_are_described_and_inlined_on_request(self):
+        self.upload_license()
+        data = self.client.get(self.url).json()
+        self.assertTrue(data['has_license'])
+        self.assertFalse(data['has_resume_cv'])
+        self.assertTrue(data['license_url'].endswith('/doctors_certifications/certifications/9000000001/download_license/'))
+        self.assertEqual((data['license_size'], data['license_filename']), (len(PDF), 'license.pdf'))
+        self.assertNotIn('license_base64', data)
+        self.assertEqual(data['doctor'], '9000000001')
+
+        data = self.client.get(self.url, {'include': 'license'}).json()
+        self.assertEqual(base64.b64decode(data['license_base64']), PDF)
+
+    def test_download(self):
+        self.upload_license()
+        response = self.client.get(f'{self.url}download_license/')
+        self.assertEqual(b''.join(response.streaming_content), PDF)
+        self.assertEqual(response['ETag'], f'"{sha256(PDF)}"')
+        self.assertEqual(self.client.get(f'{self.url}download_resume_cv/').status_code, 404)
+
+    def test_uploaded_files_are_checked_in_the_background(self):
+        data = self.upload_license()
+        self.assertEqual(data['processing_status'], 'pending')
+        self.assertEqual(Job.objects.filter(name='doctor_certification.check_files').count(), 1)
+
+        run_pending()
+        certification = DoctorCertification.objects.get(doctor__contact_number='9000000001')
+        self.assertEqual(certification.processing_status, ProcessingStatus.READY)
+
+    def test_reads_see_writes_through_the_response_cache(self):
+        self.assertFalse(self.client.get(self.url).json()['has_license'])
+        self.upload_license()
+        self.assertTrue(self.client.get(self.url).json()['has_license'])
+
+    def test_commit_chunked_upload_into_a_slot(self):
+        session = start_session('resume.pdf', 'application/pdf', len(PDF))
+        response = self.client.put(
+            f'/uploads/sessions/{session.pk}/chunk/?offset=0', PDF,
+            content_type='application/octet-stream', HTTP_X_CHUNK_SHA256=sha256(PDF),
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(f'{self.url}commit_upload/', {'upload_id': str(session.pk), 'slot': 'resume_cv'}, format='json')
+        self.assertEqual(response.status_code, 200, response.json())
+        data = response.json()['data']
+        self.assertEqual((data['has_resume_cv'], data['resume_cv_filename'], data['processing_status']), (True, 'resume.pdf', 'pending'))
+        self.assertEqual(DoctorCertification.objects.get().resume_cv_sha256, sha256(PDF))
+
+    def test_commit_rejects_disallowed_types(self):
+        session = start_session('notes.txt', 'text/plain', 4)
+        UploadSession.objects.filter(pk=session.pk).update(received=4)
+        response = self.client.post(f'{self.url}commit_upload/', {'upload_id': str(session.pk), 'slot': 'license'}, format='json')
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(DoctorCertification.objects.get().license_key)
@@ -1,14 +1,23 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django.shortcuts import get_object_or_404
-import base64
-from django.utils import timezone
 from .models import DoctorCertification
-from .serializers import DoctorCertificationReadSerializer, DoctorCertificationWriteSerializer
-from Atmayantra.utils import api_response
-
-class DoctorCertificationViewSet(viewsets.ModelViewSet):
+from .serializers import ALLOWED_CONTENT_TYPES, DoctorCertificationCommitSerializer, DoctorCertificationReadSerializer, DoctorCertificationWriteSerializer
+from .tasks import schedule_file_check
+from Atmayantra.conditional import ConditionalRequestMixin, conditional_detail, conditional_write
+from Atmayantra.response_cache import cache_doctor_response
+from Atmayantra.utils import api_response, requested_includes
+from doctor_registration.drafts import Step, load_draft, save_step
+from filestore.downloads import serve_blob_field
+from filestore.models import ProcessingStatus
+from filestore.query import defer_blob_fields
+from filestore.staging import stage_upload
+from filestore.storage import blob_columns
+from filestore.uploads import UploadError, commit_session, get_open_session
+from filestore.upload_handlers import VerifiedUploadMixin
+
+class DoctorCertificationViewSet(ConditionalRequestMixin, VerifiedUploadMixin, viewsets.ModelViewSet):
     queryset = DoctorCertification.objects.all()
     parser_classes = (MultiPartParser, FormParser)
     lookup_field = 'contact_number'
@@ -18,6 +27,21 @@ class DoctorCertificationViewSet(viewsets.ModelViewSet):
             return DoctorCertificationWriteSerializer
         return DoctorCertificationReadSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action and self.action.startswith('download_'):
+            # Downloads only need blob metadata, never the legacy base64 bodies.
+            queryset = queryset.defer(*DoctorCertification.FILE_SLOTS)
+        elif self.action in ('list', 'retrieve'):
+            # Slot metadata is enough for the lean representation; only requested bodies are loaded.
+            includes = requested_includes(self.request)
+            lean_slots = [slot for slot in DoctorCertification.FILE_SLOTS if slot not in includes]
+            queryset = defer_blob_fields(queryset.select_related('doctor').defer('doctor__profile_photo'), *lean_slots)
+        else:
+            # Saves are logged under the doctor's contact number, so the doctor comes along.
+            queryset = queryset.select_related('doctor').defer('doctor__profile_photo')
+        return queryset
+
     def get_object(self):
         queryset = self.get_queryset()
         contact_number = self.kwargs.get(self.lookup_field)
@@ -25,28 +49,27 @@ class DoctorCertificationViewSet(viewsets.ModelViewSet):
         self.check_object_permissions(self.request, obj)
         return obj
 
-    def _get_file_response(self, file_content):
-        if not file_content:
+    def get_row_state_queryset(self):
+        return DoctorCertification.objects.filter(doctor__contact_number=self.kwargs['contact_number'])
+
+    @conditional_detail
+    @cache_doctor_response('certification')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def _get_file_response(self, certification, slot):
+        if not getattr(certification, f'{slot}_key') and not getattr(certification, slot):
             return api_response(False, "File not found.", status_code=status.HTTP_404_NOT_FOUND)
-        
+
         try:
-            decoded_file = base64.b64decode(file_content)
-            return api_response(file=decoded_file)
+            return serve_blob_field(self.request, certification, slot, filename=getattr(certification, f'{slot}_filename'))
         except Exception as e:
             return api_response(False, f'Error processing file: {e}', status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def create(self, request, *args, **kwargs):
-        registration_data = request.session.get('doctor_registration_data')
-        if not registration_data or 'personal_details' not in registration_data:
-            return api_response(False, "Step 1 (personal details) must be completed first.", status_code=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            start_time = timezone.datetime.fromisoformat(registration_data['start_time'])
-            if timezone.now() - start_time > timezone.timedelta(days=1):
-                del request.session['doctor_registration_data']
-                return api_response(False, "The registration process has expired. Please start over.", status_code=status.HTTP_400_BAD_REQUEST)
-        except (ValueError, TypeError):
-             return api_response(False, "Invalid session data. Please start over.", status_code=status.HTTP_400_BAD_REQUEST)
+        draft, error_response = load_draft(request)
+        if error_response:
+            return error_response
 
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
@@ -54,22 +77,16 @@ class DoctorCertificationViewSet(viewsets.ModelViewSet):
         
         validated_data = serializer.validated_data
 
-        def _encode_file(file):
-            if file:
-                return {"name": file.name, "content": base64.b64encode(file.read()).decode('utf-8')}
-            return None
+        # Only short staging references go into the draft, never the files themselves.
+        for slot in DoctorCertification.FILE_SLOTS:
+            uploaded_file = validated_data.pop(slot, None)
+            validated_data[slot] = stage_upload(uploaded_file) if uploaded_file else None
 
-        validated_data['graduation_certificate'] = _encode_file(validated_data.pop('graduation_certificate', None))
-        validated_data['experience_letter'] = _encode_file(validated_data.pop('experience_letter', None))
-        validated_data['resume_cv'] = _encode_file(validated_data.pop('resume_cv', None))
-        validated_data['license'] = _encode_file(validated_data.pop('license', None))
-
-        registration_data['certification'] = validated_data
-        request.session['doctor_registration_data'] = registration_data
-        request.session.modified = True
+        save_step(draft, Step.CERTIFICATION, dict(validated_data))
 
         return api_response(True, "Step 2 of 4 complete: Certification details received. Proceed to document submission.", validated_data)
 
+    @conditional_write
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -79,6 +96,7 @@ class DoctorCertificationViewSet(viewsets.ModelViewSet):
         read_serializer = DoctorCertificationReadSerializer(instance, context={'request': request})
         return api_response(True, "Certification details updated successfully.", read_serializer.data)
 
+    @conditional_write
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance)
@@ -87,19 +105,49 @@ class DoctorCertificationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def download_graduation_certificate(self, request, contact_number=None):
         certification = self.get_object()
-        return self._get_file_response(certification.graduation_certificate)
+        return self._get_file_response(certification, 'graduation_certificate')
 
     @action(detail=True, methods=['get'])
     def download_experience_letter(self, request, contact_number=None):
         certification = self.get_object()
-        return self._get_file_response(certification.experience_letter)
+        return self._get_file_response(certification, 'experience_letter')
 
     @action(detail=True, methods=['get'])
     def download_resume_cv(self, request, contact_number=None):
         certification = self.get_object()
-        return self._get_file_response(certification.resume_cv)
+        return self._get_file_response(certification, 'resume_cv')
 
     @action(detail=True, methods=['get'])
     def download_license(self, request, contact_number=None):
         certification = self.get_object()
-        return self._get_file_response(certification.license)
\ No newline at end of file
+        return self._get_file_response(certification, 'license')
+
+    @action(detail=True, methods=['post'], parser_classes=(JSONParser, FormParser, MultiPartParser))
+    def commit_upload(self, request, contact_number=None):
+        serializer = DoctorCertificationCommitSerializer(data=request.data)
+        if not serializer.is_valid():
+            return api_response(False, "Invalid data provided.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
+
+        certification = self.get_object()
+        slot = serializer.validated_data['slot']
+        session = get_open_session(serializer.validated_data['upload_id'])
+        if session is None:
+            return api_response(False, "Upload session not found, expired or already committed.", status_code=status.HTTP_404_NOT_FOUND)
+        if session.content_type not in ALLOWED_CONTENT_TYPES:
+            return api_response(False, f"Invalid file type for {slot}. Only PDF, JPG, and PNG are allowed.", status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        try:
+            with commit_session(session) as blob:
+                values = blob_columns(slot, blob)
+                values[slot] = None
+                values[f'{slot}_filename'] = session.filename
+                values.update(processing_status=ProcessingStatus.PENDING, processing_error='')
+                for attr, value in values.items():
+                    setattr(certification, attr, value)
+                certification.save(update_fields=list(values))
+        except UploadError as e:
+            return api_response(False, e.message, e.data, status_code=e.status_code)
+        schedule_file_check(certification)
+
+        read_serializer = DoctorCertificationReadSerializer(certification, context={'request': request})
+        return api_response(True, f"{slot} uploaded successfully.", read_serializer.data)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DoctorDocumentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'doctor_documents'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .async_views import file
+
+urlpatterns = [
+    path('documents/<str:contact_number>/<int:pk>/file/', file, name='document-file-async'),
+]
@@ -0,0 +1,39 @@
+"""
+Async version of the document download action, routed instead of the sync
+one when `ASYNC_VIEWS` is on (see `Atmayantra.urls`).
+"""
+from django.views.decorators.http import require_safe
+from rest_framework import status
+
+from Atmayantra.utils import json_response
+from filestore.downloads import aserve_blob, legacy_etag
+from .models import DoctorDocument
+
+
+@require_safe
+async def file(request, contact_number, pk):
+    documents = DoctorDocument.objects.filter(doctor__contact_number=contact_number, pk=pk)
+    doc = await documents.values('pk', 'version', 'updated_at', 'file_key', 'file_sha256', 'content_type', 'filename').afirst()
+    if doc is None:
+        return json_response(False, f"Document with id {pk} not found for doctor {contact_number}.", status_code=status.HTTP_404_NOT_FOUND)
+
+    # Rows written before the blob store still carry a base64 body; only those read it.
+    legacy_base64 = None
+    if not doc['file_key']:
+        legacy_base64 = await documents.values_list('file_data', flat=True).afirst()
+        if not legacy_base64:
+            return json_response(False, "File not found.", status_code=status.HTTP_404_NOT_FOUND)
+
+    try:
+        return await aserve_blob(
+            request,
+            key=doc['file_key'],
+            sha256=doc['file_sha256'],
+            content_type=doc['content_type'],
+            filename=doc['filename'],
+            legacy_base64=legacy_base64,
+            legacy_etag=legacy_etag('file', doc['pk'], doc['version']),
+            legacy_modified=doc['updated_at'],
+        )
+    except Exception as e:
+        return json_response(False, f'Error processing file: {e}', status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
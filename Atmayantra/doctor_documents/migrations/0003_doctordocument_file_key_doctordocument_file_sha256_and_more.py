@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_documents', '0002_alter_doctordocument_content_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctordocument',
+            name='file_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctordocument',
+            name='file_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctordocument',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='doctordocument',
+            name='file_data',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
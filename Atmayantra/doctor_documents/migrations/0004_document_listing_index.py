@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_documents', '0003_doctordocument_file_key_doctordocument_file_sha256_and_more'),
+        ('doctor_personal_details', '0006_doctorpersonaldetails_profile_photo_content_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctordocument',
+            index=models.Index(fields=['doctor', 'id'], name='doctor_document_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_documents', '0004_document_listing_index'),
+        ('doctor_personal_details', '0009_versioning'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='doctordocument',
+            name='doctor_document_listing_idx',
+        ),
+        migrations.AddField(
+            model_name='doctordocument',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='doctordocument',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='doctordocument',
+            index=models.Index(fields=['doctor', 'id', 'version', 'updated_at'], name='doctor_document_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_documents', '0005_versioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctordocument',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctordocument',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        # Files uploaded before the checks existed are not queued for them.
+        migrations.AddField(
+            model_name='doctordocument',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='doctordocument',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
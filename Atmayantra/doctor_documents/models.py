@@ -1,13 +1,30 @@
 from django.db import models
+from Atmayantra.models import VersionedModel
+from filestore.models import ProcessingStatus
 from doctor_personal_details.models import DoctorPersonalDetails
 
-class DoctorDocument(models.Model):
+class DoctorDocument(VersionedModel):
     doctor = models.ForeignKey(DoctorPersonalDetails, to_field='contact_number', on_delete=models.CASCADE, related_name='documents')
     doc_type = models.CharField(max_length=255)
     side = models.CharField(max_length=255, null=True, blank=True)
     filename = models.CharField(max_length=255)
     content_type = models.CharField(max_length=255)
-    file_data = models.TextField()
+    file_key = models.CharField(max_length=255, null=True, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    file_sha256 = models.CharField(max_length=64, null=True, blank=True)
+    # Legacy base64 body, only set on rows written before the blob store.
+    file_data = models.TextField(null=True, blank=True)
+    # Set by the doctor_documents.process_document job once the file was checked.
+    processing_status = models.CharField(max_length=10, choices=ProcessingStatus.choices, default=ProcessingStatus.PENDING)
+    processing_error = models.TextField(blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Serves the per-doctor document listing, which pages by id, and its
+            # conditional requests, which only need the version columns.
+            models.Index(fields=['doctor', 'id', 'version', 'updated_at'], name='doctor_document_listing_idx'),
+        ]
 
     def __str__(self):
-        return f"Document {self.filename} for {self.doctor.full_name}"
+        return f"Document {self.filename} for {self.doctor_id}"
@@ -1,7 +1,11 @@
-import base64
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from .models import DoctorDocument
 from doctor_personal_details.models import DoctorPersonalDetails
+from Atmayantra.utils import requested_includes
+from filestore.models import ProcessingStatus
+from filestore.storage import read_blob_base64, store_upload
+from .tasks import schedule_processing
 
 class DoctorDocumentSerializer(serializers.ModelSerializer):
     doctor = serializers.SlugRelatedField(
@@ -10,7 +14,8 @@ class DoctorDocumentSerializer(serializers.ModelSerializer):
         required=False
     )
     file = serializers.FileField(write_only=True, required=True)
-    file_data = serializers.CharField(read_only=True)
+    file_url = serializers.SerializerMethodField()
+    file_data = serializers.SerializerMethodField()
 
     class Meta:
         model = DoctorDocument
@@ -21,30 +26,68 @@ class DoctorDocumentSerializer(serializers.ModelSerializer):
             'side',
             'filename',
             'content_type',
+            'file_size',
+            'file_sha256',
+            'processing_status',
+            'processing_error',
+            'page_count',
+            'file_url',
             'file_data',
             'file',
         )
-        read_only_fields = ('filename', 'content_type')
+        read_only_fields = ('filename', 'content_type', 'file_size', 'file_sha256', 'processing_status', 'processing_error', 'page_count')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The inline base64 body is opt-in through `?include=file_data`.
+        if 'file_data' not in requested_includes(self.context.get('request')):
+            self.fields.pop('file_data')
+
+    def get_file_url(self, obj):
+        return reverse('document-file', kwargs={'contact_number': obj.doctor_id, 'pk': obj.pk}, request=self.context.get('request'))
+
+    def get_file_data(self, obj):
+        return read_blob_base64(obj.file_key, obj.file_data)
+
+    def _store_file(self, uploaded_file):
+        blob = store_upload(uploaded_file)
+        return {
+            'filename': uploaded_file.name,
+            'content_type': uploaded_file.content_type,
+            'file_key': blob.key,
+            'file_size': blob.size,
+            'file_sha256': blob.sha256,
+            'file_data': None,
+            'processing_status': ProcessingStatus.PENDING,
+            'processing_error': '',
+            'page_count': None,
+        }
 
     def create(self, validated_data):
         uploaded_file = validated_data.pop('file')
-        
-        validated_data['filename'] = uploaded_file.name
-        validated_data['content_type'] = uploaded_file.content_type
-        validated_data['file_data'] = base64.b64encode(uploaded_file.read()).decode('utf-8')
+        validated_data.update(self._store_file(uploaded_file))
 
-        return DoctorDocument.objects.create(**validated_data)
+        document = DoctorDocument.objects.create(**validated_data)
+        schedule_processing(document)
+        return document
 
     def update(self, instance, validated_data):
-        if 'file' in validated_data:
-            uploaded_file = validated_data.pop('file')
-            instance.filename = uploaded_file.name
-            instance.content_type = uploaded_file.content_type
-            instance.file_data = base64.b64encode(uploaded_file.read()).decode('utf-8')
+        uploaded_file = validated_data.pop('file', None)
+        if uploaded_file:
+            for attr, value in self._store_file(uploaded_file).items():
+                setattr(instance, attr, value)
 
         # Update other fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         
         instance.save()
-        return instance
\ No newline at end of file
+        if uploaded_file:
+            schedule_processing(instance)
+        return instance
+
+class DoctorDocumentCommitSerializer(serializers.Serializer):
+    """Turns a completed chunked upload into a document."""
+    upload_id = serializers.UUIDField()
+    doc_type = serializers.CharField(max_length=255)
+    side = serializers.CharField(max_length=255, required=False, allow_null=True, allow_blank=True)
@@ -0,0 +1,40 @@
+from django.db import transaction
+
+from filestore.inspection import InvalidFile, inspect_blob
+from filestore.models import ProcessingStatus
+from jobs.queue import enqueue, task
+from .models import DoctorDocument
+
+
+@task('doctor_documents.process_document')
+def process_document(document_id, file_sha256):
+    """Checks a document's file end to end and records its page count."""
+    document = DoctorDocument.objects.filter(pk=document_id, file_sha256=file_sha256).only('file_key', 'content_type').first()
+    if document is None or not document.file_key:
+        # Deleted, or its file was replaced and a newer job handles that.
+        return
+
+    try:
+        page_count, error = inspect_blob(document.file_key, document.content_type), ''
+    except InvalidFile as e:
+        page_count, error = None, str(e)
+
+    with transaction.atomic():
+        document = DoctorDocument.objects.select_for_update().filter(pk=document_id, file_sha256=file_sha256).first()
+        if document is None:
+            return
+        document.processing_status = ProcessingStatus.FAILED if error else ProcessingStatus.READY
+        document.processing_error = error
+        document.page_count = page_count
+        document.save(update_fields=['processing_status', 'processing_error', 'page_count'])
+
+
+def processing_job(document):
+    """Returns the `(name, payload)` of the job checking a document's file."""
+    return 'doctor_documents.process_document', {'document_id': document.pk, 'file_sha256': document.file_sha256}
+
+
+def schedule_processing(document):
+    """Queues the checks of a document whose file was just stored."""
+    name, payload = processing_job(document)
+    enqueue(name, **payload)
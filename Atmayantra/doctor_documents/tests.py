@@ -1,3 +1,180 @@
-from django.test import TestCase
+import base64
+import hashlib
+import io
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import AsyncRequestFactory, TestCase, override_settings
+
+from doctor_personal_details.tests import create_doctor
+from filestore.models import ProcessingStatus, UploadSession
+from filestore.storage import get_blob_store
+from filestore.uploads import session_path, start_session
+from jobs.models import Job
+from jobs.queue import run_pending
+from .async_views import file
+from .models import DoctorDocument
+from .serializers import DoctorDocumentSerializer
+
+CONTENT = b'%PDF-1.4 certificate body'
+TWO_PAGE_PDF = (
+    b'%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n'
+    b'2 0 obj << /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >> endobj\n'
+    b'3 0 obj << /Type /Page /Parent 2 0 R >> endobj\n'
+    b'4 0 obj <</Type/Page/Parent 2 0 R>> endobj\n'
+    b'trailer << /Root 1 0 R >>\n%%EOF\n'
+)
+
+
+def use_temporary_blob_store(test):
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    blob_storage = override_settings(BLOB_STORAGE={'BACKEND': 'filestore.storage.LocalBlobStore', 'OPTIONS': {'location': directory.name}})
+    blob_storage.enable()
+    test.addCleanup(blob_storage.disable)
+
+
+class AsyncDocumentDownloadTests(TestCase):
+    def setUp(self):
+        use_temporary_blob_store(self)
+
+        doctor = create_doctor('9000000001', 'Asha')
+        blob = get_blob_store().save(io.BytesIO(CONTENT))
+        self.document = DoctorDocument.objects.create(
+            doctor=doctor, doc_type='degree', filename='degree.pdf', content_type='application/pdf',
+            file_key=blob.key, file_size=blob.size, file_sha256=blob.sha256,
+        )
+        self.legacy = DoctorDocument.objects.create(
+            doctor=doctor, doc_type='licence', filename='licence.pdf', content_type='application/pdf',
+            file_data=base64.b64encode(CONTENT).decode(),
+        )
+        self.factory = AsyncRequestFactory()
+
+    async def download(self, document_id, **headers):
+        response = await file(self.factory.get('/', headers=headers), '9000000001', document_id)
+        body = b''.join([chunk async for chunk in response.streaming_content]) if response.streaming else response.content
+        return response, body
+
+    async def test_streams_the_file(self):
+        response, body = await self.download(self.document.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['ETag'], f'"{self.document.file_sha256}"')
+
+    async def test_serves_ranges_and_conditional_requests(self):
+        response, body = await self.download(self.document.pk, Range='bytes=5-7')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, CONTENT[5:8])
+
+        response, _ = await self.download(self.document.pk, **{'If-None-Match': f'"{self.document.file_sha256}"'})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_legacy_base64_rows_and_missing_documents(self):
+        response, body = await self.download(self.legacy.pk)
+        self.assertEqual(body, CONTENT)
+        self.assertEqual(response['ETag'], f'"file.{self.legacy.pk}.1"')
+        response, _ = await self.download(self.legacy.pk, **{'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        response, _ = await self.download(self.legacy.pk + 1)
+        self.assertEqual(response.status_code, 404)
+
+
+class DocumentProcessingTests(TestCase):
+    def setUp(self):
+        use_temporary_blob_store(self)
+        create_doctor('9000000001', 'Asha')
+
+    def upload(self, content, instance=None):
+        serializer = DoctorDocumentSerializer(instance, data={
+            'doctor': '9000000001',
+            'doc_type': 'degree',
+            'file': SimpleUploadedFile('degree.pdf', content, content_type='application/pdf'),
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_upload_is_checked_in_the_background(self):
+        document = self.upload(TWO_PAGE_PDF)
+        self.assertEqual(document.processing_status, ProcessingStatus.PENDING)
+        self.assertEqual(DoctorDocumentSerializer(document).data['processing_status'], 'pending')
+
+        self.assertEqual(run_pending(), 1)
+        document.refresh_from_db()
+        self.assertEqual((document.processing_status, document.page_count), (ProcessingStatus.READY, 2))
+
+    def test_truncated_pdf_fails_processing(self):
+        document = self.upload(TWO_PAGE_PDF[:-8])
+        run_pending()
+        document.refresh_from_db()
+        self.assertEqual(document.processing_status, ProcessingStatus.FAILED)
+        self.assertEqual(document.processing_error, "The PDF is truncated.")
+
+    def test_job_for_a_replaced_file_is_skipped(self):
+        document = self.upload(TWO_PAGE_PDF[:-8])
+        document = self.upload(TWO_PAGE_PDF, instance=document)
+        self.assertEqual(Job.objects.count(), 2)
+
+        run_pending()
+        document.refresh_from_db()
+        self.assertEqual((document.processing_status, document.processing_error), (ProcessingStatus.READY, ''))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DocumentCommitUploadTests(TestCase):
+    def setUp(self):
+        use_temporary_blob_store(self)
+        staging = tempfile.TemporaryDirectory()
+        self.addCleanup(staging.cleanup)
+        staging_root = override_settings(UPLOAD_STAGING_ROOT=staging.name)
+        staging_root.enable()
+        self.addCleanup(staging_root.disable)
+        create_doctor('9000000001', 'Asha')
+
+    def test_sessions_are_limited_to_document_types(self):
+        response = self.client.post('/uploads/sessions/', {'filename': 'notes.txt', 'content_type': 'text/plain', 'size': 4})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('content_type', response.json()['data'])
+
+        response = self.client.post('/uploads/sessions/', {'filename': 'scan.jpg', 'content_type': 'image/jpg', 'size': 4})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['content_type'], 'image/jpeg')
+
+    def test_disallowed_session_is_not_committed(self):
+        session = start_session('notes.txt', 'text/plain', 4)
+        UploadSession.objects.filter(pk=session.pk).update(received=4)
+
+        response = self.client.post('/doctors_Documents/documents/9000000001/commit-upload/', {'upload_id': session.pk, 'doc_type': 'degree'})
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(DoctorDocument.objects.exists())
+        self.assertTrue(UploadSession.objects.filter(pk=session.pk, status=UploadSession.Status.OPEN).exists())
+
+    def received_session(self, content, sha256=None):
+        session = start_session('degree.pdf', 'application/pdf', len(content), sha256=sha256)
+        with open(session_path(session), 'wb') as f:
+            f.write(content)
+        UploadSession.objects.filter(pk=session.pk).update(received=len(content))
+        return session
+
+    def commit(self, session):
+        return self.client.post('/doctors_Documents/documents/9000000001/commit-upload/', {'upload_id': session.pk, 'doc_type': 'degree'})
+
+    def test_checksum_is_verified_before_anything_is_stored(self):
+        session = self.received_session(CONTENT, sha256=hashlib.sha256(b'something else').hexdigest())
+        self.assertEqual(self.commit(session).status_code, 422)
+        self.assertFalse(get_blob_store().exists(hashlib.sha256(CONTENT).hexdigest()))
+
+    def test_failed_row_write_keeps_the_session_open_and_drops_the_blob(self):
+        session = self.received_session(CONTENT)
+        with mock.patch.object(DoctorDocument.objects, 'create', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                self.commit(session)
+        self.assertFalse(get_blob_store().exists(hashlib.sha256(CONTENT).hexdigest()))
+        self.assertTrue(UploadSession.objects.filter(pk=session.pk, status=UploadSession.Status.OPEN).exists())
+
+        # The upload can still be committed once the database recovers.
+        self.assertEqual(self.commit(session).status_code, 201)
+        self.assertEqual(DoctorDocument.objects.get().file_sha256, hashlib.sha256(CONTENT).hexdigest())
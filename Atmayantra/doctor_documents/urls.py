@@ -1,9 +1,11 @@
 from django.urls import path
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from .views import DoctorDocumentViewSet
 
 urlpatterns = [
     path('documents/create/', DoctorDocumentViewSet.as_view({'post': 'create'}), name='document-create'),
     path('documents/<str:contact_number>/', DoctorDocumentViewSet.as_view({'get': 'list'}), name='document-list'),
+    path('documents/<str:contact_number>/commit-upload/', DoctorDocumentViewSet.as_view({'post': 'commit_upload'}, parser_classes=(JSONParser, FormParser, MultiPartParser)), name='document-commit-upload'),
     path('documents/<str:contact_number>/<int:pk>/', DoctorDocumentViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
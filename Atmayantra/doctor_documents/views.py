@@ -1,31 +1,51 @@
+from django.conf import settings
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.http import Http404
-import base64
-from django.utils import timezone
-from datetime import datetime
 from .models import DoctorDocument
-from .serializers import DoctorDocumentSerializer
-from Atmayantra.utils import api_response
+from .serializers import DoctorDocumentCommitSerializer, DoctorDocumentSerializer
+from .tasks import schedule_processing
+from doctor_personal_details.models import DoctorPersonalDetails
+from Atmayantra.conditional import ConditionalRequestMixin, conditional_detail, conditional_list, conditional_write
+from Atmayantra.pagination import KeysetPagination
+from Atmayantra.response_cache import cache_doctor_response, doctor_version
+from Atmayantra.utils import api_response, requested_includes
+from doctor_registration.drafts import add_document, load_draft
+from filestore.downloads import legacy_etag, serve_blob
+from filestore.staging import stage_upload
+from filestore.uploads import UploadError, commit_session, get_open_session
+from filestore.upload_handlers import VerifiedUploadMixin
 
-class DoctorDocumentViewSet(viewsets.ModelViewSet):
+class DoctorDocumentViewSet(ConditionalRequestMixin, VerifiedUploadMixin, viewsets.ModelViewSet):
     queryset = DoctorDocument.objects.all()
     serializer_class = DoctorDocumentSerializer
     parser_classes = (MultiPartParser, FormParser)
+    pagination_class = KeysetPagination
 
-    def create(self, request, *args, **kwargs):
-        registration_data = request.session.get('doctor_registration_data')
-        if not registration_data or 'personal_details' not in registration_data:
-            return api_response(False, "Step 1 (personal details) must be completed first.", status_code=status.HTTP_400_BAD_REQUEST)
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'file':
+            # Downloads only need blob metadata, never the legacy base64 body.
+            queryset = queryset.defer('file_data')
+        elif self.action in ('list', 'retrieve'):
+            # The doctor is joined for its contact number; its photo is never needed here.
+            queryset = queryset.select_related('doctor').defer('doctor__profile_photo')
+            if 'file_data' not in requested_includes(self.request):
+                queryset = queryset.defer('file_data')
+        return queryset
 
-        try:
-            start_time = datetime.fromisoformat(registration_data['start_time'])
-            if timezone.now() - start_time > timezone.timedelta(days=1):
-                del request.session['doctor_registration_data']
-                return api_response(False, "The registration process has expired. Please start over.", status_code=status.HTTP_400_BAD_REQUEST)
-        except (ValueError, TypeError):
-            return api_response(False, "Invalid session data. Please start over.", status_code=status.HTTP_400_BAD_REQUEST)
+    def get_row_state_queryset(self):
+        return DoctorDocument.objects.filter(doctor_id=self.kwargs['contact_number'], pk=self.kwargs['pk'])
+
+    def get_list_version(self):
+        # Every write to a doctor's documents moves the doctor's cache version.
+        return doctor_version(self.kwargs['contact_number'])
+
+    def create(self, request, *args, **kwargs):
+        draft, error_response = load_draft(request)
+        if error_response:
+            return error_response
 
         data = request.data.copy()
         data.pop('doctor', None)
@@ -35,31 +55,25 @@ class DoctorDocumentViewSet(viewsets.ModelViewSet):
         
         validated_data = serializer.validated_data
 
-        uploaded_file = validated_data.pop('file')
-        file_data = {
-            'name': uploaded_file.name,
-            'content_type': uploaded_file.content_type,
-            'content': base64.b64encode(uploaded_file.read()).decode('utf-8')
-        }
-        validated_data['file'] = file_data
+        # Only a short staging reference goes into the draft, never the file itself.
+        validated_data['file'] = stage_upload(validated_data.pop('file'))
         
         for key, value in validated_data.items():
             if hasattr(value, 'pk'):
                 validated_data[key] = value.pk
 
-        if 'documents' not in registration_data:
-            registration_data['documents'] = []
-        registration_data['documents'].append(validated_data)
-        request.session['doctor_registration_data'] = registration_data
-        request.session.modified = True
+        add_document(draft, dict(validated_data))
 
         return api_response(True, "Step 3 of 4: Document added. Add more or proceed to bank details.", validated_data)
 
+    @conditional_list
+    @cache_doctor_response('documents')
     def list(self, request, *args, **kwargs):
         contact_number = self.kwargs.get('contact_number')
         queryset = self.get_queryset().filter(doctor__contact_number=contact_number)
-        serializer = self.get_serializer(queryset, many=True)
-        return api_response(True, "Documents retrieved successfully.", serializer.data)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data, "Documents retrieved successfully.")
 
     def get_object(self):
         queryset = self.get_queryset()
@@ -73,6 +87,15 @@ class DoctorDocumentViewSet(viewsets.ModelViewSet):
         except DoctorDocument.DoesNotExist:
             raise Http404(f"Document with id {self.kwargs.get('pk')} not found for doctor {self.kwargs.get('contact_number')}.")
 
+    @conditional_detail
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional_write
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    @conditional_write
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance)
@@ -81,8 +104,50 @@ class DoctorDocumentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def file(self, request, contact_number=None, pk=None):
         doc = self.get_object()
+        if not doc.file_key and not doc.file_data:
+            return api_response(False, "File not found.", status_code=status.HTTP_404_NOT_FOUND)
+
         try:
-            decoded_file = base64.b64decode(doc.file_data)
-            return api_response(file=decoded_file)
+            return serve_blob(
+                request,
+                key=doc.file_key,
+                sha256=doc.file_sha256,
+                content_type=doc.content_type,
+                filename=doc.filename,
+                legacy_base64=None if doc.file_key else doc.file_data,
+                legacy_etag=legacy_etag('file', doc.pk, doc.version),
+                legacy_modified=doc.updated_at,
+            )
         except Exception as e:
             return api_response(False, f'Error processing file: {e}', status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def commit_upload(self, request, contact_number=None):
+        serializer = DoctorDocumentCommitSerializer(data=request.data)
+        if not serializer.is_valid():
+            return api_response(False, "Invalid data provided.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
+
+        if not DoctorPersonalDetails.objects.filter(contact_number=contact_number).exists():
+            return api_response(False, "Doctor with this contact number does not exist.", status_code=status.HTTP_404_NOT_FOUND)
+
+        session = get_open_session(serializer.validated_data['upload_id'])
+        if session is None:
+            return api_response(False, "Upload session not found, expired or already committed.", status_code=status.HTTP_404_NOT_FOUND)
+        if session.content_type not in settings.DOCUMENT_CONTENT_TYPES:
+            return api_response(False, "Invalid file type. Only PDF, JPG, and PNG are allowed.", status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        try:
+            with commit_session(session) as blob:
+                document = DoctorDocument.objects.create(
+                    doctor_id=contact_number,
+                    doc_type=serializer.validated_data['doc_type'],
+                    side=serializer.validated_data.get('side'),
+                    filename=session.filename,
+                    content_type=session.content_type,
+                    file_key=blob.key,
+                    file_size=blob.size,
+                    file_sha256=blob.sha256,
+                )
+        except UploadError as e:
+            return api_response(False, e.message, e.data, status_code=e.status_code)
+        schedule_processing(document)
+        return api_response(True, "Document uploaded successfully.", self.get_serializer(document).data, status_code=status.HTTP_201_CREATED)
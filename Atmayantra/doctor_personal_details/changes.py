@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from doctor_bank_details.models import DoctorBankDetails
+from doctor_bank_details.serializers import DoctorBankDetailsSummarySerializer
+from doctor_certification.models import DoctorCertification
+from doctor_certification.serializers import DoctorCertificationReadSerializer
+from doctor_documents.models import DoctorDocument
+from doctor_documents.serializers import DoctorDocumentSerializer
+from filestore.query import defer_blob_fields
+from .models import DoctorChange, DoctorPersonalDetails
+from .serializers import DoctorPersonalDetailsSerializer
+
+
+def record_change(resource, instance, contact_number, action=DoctorChange.UPSERT):
+    """Appends a change log entry; called from post_save/post_delete receivers inside the write's transaction."""
+    DoctorChange.objects.create(
+        resource=resource,
+        object_id=str(instance.pk),
+        contact_number=contact_number,
+        action=action,
+    )
+
+
+def bulk_record_changes(changes):
+    """
+    Appends upserts for rows written with `bulk_create`, which sends no signals.
+
+    `changes` is a list of `(resource, instance, contact_number)`; call it in
+    the transaction of the bulk write.
+    """
+    DoctorChange.objects.bulk_create(
+        DoctorChange(resource=resource, object_id=str(instance.pk), contact_number=contact_number, action=DoctorChange.UPSERT)
+        for resource, instance, contact_number in changes
+    )
+
+
+def _current_rows():
+    """Querysets and serializers that load the current state of each resource, without file bodies."""
+    return {
+        DoctorChange.DOCTOR: (
+            defer_blob_fields(DoctorPersonalDetails.objects.all(), 'profile_photo'),
+            DoctorPersonalDetailsSerializer,
+        ),
+        DoctorChange.CERTIFICATION: (
+            defer_blob_fields(
+                DoctorCertification.objects.select_related('doctor').defer('doctor__profile_photo'),
+                *DoctorCertification.FILE_SLOTS,
+            ),
+            DoctorCertificationReadSerializer,
+        ),
+        DoctorChange.DOCUMENT: (
+            DoctorDocument.objects.defer('file_data'),
+            DoctorDocumentSerializer,
+        ),
+        DoctorChange.BANK_DETAILS: (
+            defer_blob_fields(DoctorBankDetails.objects.all(), 'bank_qr_code'),
+            DoctorBankDetailsSummarySerializer,
+        ),
+    }
+
+
+def read_changes(since, limit, context):
+    """
+    Returns the changes after cursor `since` and the cursor to resume from.
+
+    Several changes to the same record within a page are collapsed into the
+    latest one, and upserts carry the record's current state, so a page costs
+    one query for the log plus one per resource type, however many writes it
+    covers. Deletes become tombstones.
+
+    Entries younger than `DOCTOR_CHANGES_SETTLE_SECONDS` are held back: ids
+    are allocated before commit, so a transaction that commits late could
+    otherwise appear behind a cursor a client has already moved past.
+    """
+    settled = timezone.now() - timedelta(seconds=settings.DOCTOR_CHANGES_SETTLE_SECONDS)
+    entries = list(
+        DoctorChange.objects.filter(id__gt=since, created_at__lte=settled).order_by('id')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for entry in entries:
+        key = (entry.resource, entry.object_id)
+        latest.pop(key, None)
+        latest[key] = entry
+
+    pending = {}
+    for entry in latest.values():
+        if entry.action == DoctorChange.UPSERT:
+            pending.setdefault(entry.resource, []).append(entry.object_id)
+
+    current = {}
+    for resource, (queryset, serializer_class) in _current_rows().items():
+        if resource in pending:
+            rows = queryset.filter(pk__in=pending[resource])
+            current.update({(resource, str(row.pk)): serializer_class(row, context=context).data for row in rows})
+
+    changes = []
+    for key, entry in latest.items():
+        change = {
+            'cursor': str(entry.id),
+            'resource': entry.resource,
+            'id': entry.object_id,
+            'contact_number': entry.contact_number,
+            'action': entry.action,
+        }
+        if entry.action == DoctorChange.UPSERT:
+            if key not in current:
+                # Deleted since; its tombstone follows in a later entry.
+                continue
+            change['data'] = current[key]
+        changes.append(change)
+
+    return {
+        'changes': changes,
+        'next': str(entries[-1].id if entries else since),
+        'has_more': has_more,
+    }
@@ -0,0 +1,25 @@
+from Atmayantra.exports import ExportDataset
+from .models import DoctorPersonalDetails
+
+
+def doctor_export():
+    """Doctors joined with their certification metadata; file bodies are never read."""
+    return ExportDataset('doctors', DoctorPersonalDetails.objects.all(), {
+        'contact_number': 'contact_number',
+        'full_name': 'full_name',
+        'specialization': 'specialization',
+        'experience': 'experience',
+        'hospital': 'hospital',
+        'gender': 'gender',
+        'email': 'email',
+        'address': 'address',
+        'highest_degree': 'certification__highest_degree',
+        'year_of_graduation': 'certification__year_of_graduation',
+        'year_of_experience': 'certification__year_of_experience',
+        'yoga_certified': 'certification__yoga_certified',
+        'certification_type': 'certification__certification_type',
+        'issuing_authority': 'certification__issuing_authority',
+        'certification_specialization': 'certification__specialization',
+        'license_number': 'certification__license_number',
+        'updated_at': 'updated_at',
+    })
@@ -0,0 +1,233 @@
+import csv
+import io
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from openpyxl import load_workbook
+from rest_framework.serializers import ValidationError, as_serializer_error
+from rest_framework.validators import UniqueValidator
+
+from Atmayantra.response_cache import bump_list_version
+from doctor_bank_details.models import DoctorBankDetails
+from doctor_bank_details.serializers import DoctorBankDetailsWriteSerializer
+from doctor_certification.models import DoctorCertification
+from doctor_certification.serializers import DoctorCertificationWriteSerializer
+from .changes import bulk_record_changes
+from .models import DoctorChange, DoctorPersonalDetails
+from .serializers import DoctorPersonalDetailsWriteSerializer
+
+# Import columns mirror the `doctors` export, plus the bank details.
+PERSONAL_COLUMNS = ('contact_number', 'full_name', 'specialization', 'experience', 'hospital', 'gender', 'email', 'address')
+CERTIFICATION_COLUMNS = {
+    'highest_degree': 'highest_degree',
+    'year_of_graduation': 'year_of_graduation',
+    'year_of_experience': 'year_of_experience',
+    'yoga_certified': 'yoga_certified',
+    'certification_type': 'certification_type',
+    'issuing_authority': 'issuing_authority',
+    'certification_specialization': 'specialization',
+    'license_number': 'license_number',
+}
+BANK_COLUMNS = ('account_holder_name', 'account_number', 'ifsc_code', 'upi_id', 'account_type')
+
+
+class DoctorImportError(Exception):
+    pass
+
+
+class ImportPersonalDetailsSerializer(DoctorPersonalDetailsWriteSerializer):
+    """The registration rules without the per-row uniqueness queries; `DoctorImport` checks uniqueness per batch."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in ('contact_number', 'email'):
+            field = self.fields[name]
+            field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+
+
+class ImportBankDetailsSerializer(DoctorBankDetailsWriteSerializer):
+    """The registration rules without the doctor lookup; the doctor is created by the same row."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields.pop('doctor')
+        self.fields.pop('confirm_account_number')
+
+    def validate(self, data):
+        return data
+
+
+def read_rows(file, filename):
+    """
+    Yields `(row_number, row)` pairs from a CSV or XLSX upload.
+
+    Both readers stream; XLSX is opened in openpyxl's read-only mode. Blank
+    cells become empty strings and surrounding whitespace is stripped.
+    """
+    if filename.lower().endswith('.xlsx'):
+        try:
+            workbook = load_workbook(file, read_only=True, data_only=True)
+        except Exception as e:
+            raise DoctorImportError(f"Could not read the XLSX file: {e}")
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+    elif filename.lower().endswith('.csv'):
+        rows = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    else:
+        raise DoctorImportError("Only .csv and .xlsx files can be imported.")
+
+    try:
+        headers = [str(header or '').strip() for header in next(rows)]
+    except StopIteration:
+        raise DoctorImportError("The file is empty.")
+    missing = [column for column in (*PERSONAL_COLUMNS, *CERTIFICATION_COLUMNS) if column not in headers]
+    if missing:
+        raise DoctorImportError(f"Missing columns: {', '.join(missing)}.")
+
+    # Row 1 is the header, so data rows are numbered as a spreadsheet shows them.
+    for number, values in enumerate(rows, start=2):
+        row = {header: '' if value is None else str(value).strip() for header, value in zip(headers, values) if header}
+        if any(row.values()):
+            yield number, row
+
+
+def _validate_each(serializer_class, items):
+    """
+    Runs one serializer's validation over many items, returning `(data, errors)` per item.
+
+    Unlike a `many=True` serializer, which discards all validated data when any
+    item fails, this keeps the valid items. The serializer is built only once.
+    `None` items are skipped and yield `(None, None)`.
+    """
+    serializer = serializer_class()
+    results = []
+    for item in items:
+        if item is None:
+            results.append((None, None))
+            continue
+        try:
+            results.append((serializer.run_validation(item), None))
+        except ValidationError as e:
+            results.append((None, as_serializer_error(e)))
+    return results
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DoctorImport:
+    """
+    Imports doctors with their certification and, optionally, bank details.
+
+    Rows are validated a batch at a time with the registration serializers,
+    each built once per batch rather than per row. Contact numbers and emails
+    are checked for uniqueness with one query each per batch. Valid rows are
+    inserted with `bulk_create`, one transaction per batch; a failed row never
+    blocks the rest of the file.
+    """
+
+    def __init__(self, batch_size=None, dry_run=False):
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.dry_run = dry_run
+        self.errors = []
+        self.total = 0
+        self.created = 0
+        self.seen_contact_numbers = set()
+        self.seen_emails = set()
+
+    def run(self, rows):
+        started = time.monotonic()
+        for batch in _batches(rows, self.batch_size):
+            self.total += len(batch)
+            valid = self._validate(batch)
+            if valid and not self.dry_run:
+                self._insert(valid)
+        elapsed = time.monotonic() - started
+        return {
+            'total': self.total,
+            'created': self.created,
+            'failed': len(self.errors),
+            'dry_run': self.dry_run,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(self.total / elapsed) if elapsed else None,
+            'errors': self.errors,
+        }
+
+    def _fail(self, number, row, errors):
+        self.errors.append({'row': number, 'contact_number': row.get('contact_number'), 'errors': errors})
+
+    def _validate(self, batch):
+        personal = _validate_each(ImportPersonalDetailsSerializer, [{k: row.get(k) for k in PERSONAL_COLUMNS} for _, row in batch])
+        certification = _validate_each(DoctorCertificationWriteSerializer, [
+            {'doctor': row.get('contact_number'), **{field: row.get(column) for column, field in CERTIFICATION_COLUMNS.items()}}
+            for _, row in batch
+        ])
+        bank = _validate_each(ImportBankDetailsSerializer, [
+            {column: row.get(column) or None for column in BANK_COLUMNS} if any(row.get(column) for column in BANK_COLUMNS) else None
+            for _, row in batch
+        ])
+
+        contact_numbers = {row.get('contact_number') for _, row in batch}
+        emails = {row.get('email') for _, row in batch}
+        existing_numbers = set(DoctorPersonalDetails.objects.filter(contact_number__in=contact_numbers).values_list('contact_number', flat=True))
+        existing_emails = set(DoctorPersonalDetails.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        valid = []
+        for (number, row), (personal_data, personal_errors), (certification_data, certification_errors), (bank_data, bank_errors) in zip(batch, personal, certification, bank):
+            errors = dict(personal_errors or {})
+            errors.update({f'certification.{k}': v for k, v in (certification_errors or {}).items()})
+            errors.update({f'bank.{k}': v for k, v in (bank_errors or {}).items()})
+
+            contact_number, email = row.get('contact_number'), row.get('email')
+            if contact_number in existing_numbers or contact_number in self.seen_contact_numbers:
+                errors.setdefault('contact_number', []).append("A doctor with this contact number already exists.")
+            if email in existing_emails or email in self.seen_emails:
+                errors.setdefault('email', []).append("A doctor with this email already exists.")
+
+            if errors:
+                self._fail(number, row, errors)
+                continue
+            self.seen_contact_numbers.add(contact_number)
+            self.seen_emails.add(email)
+            valid.append((number, row, personal_data, certification_data, bank_data))
+        return valid
+
+    def _insert(self, valid):
+        try:
+            with transaction.atomic():
+                doctors = DoctorPersonalDetails.objects.bulk_create(
+                    DoctorPersonalDetails(**personal) for _, _, personal, _, _ in valid
+                )
+                certifications = DoctorCertification.objects.bulk_create(
+                    DoctorCertification(doctor=doctor, **{k: v for k, v in certification.items() if k != 'doctor'})
+                    for doctor, (_, _, _, certification, _) in zip(doctors, valid)
+                )
+                bank_details = DoctorBankDetails.objects.bulk_create(
+                    DoctorBankDetails(doctor=doctor, **bank)
+                    for doctor, (_, _, _, _, bank) in zip(doctors, valid) if bank is not None
+                )
+                # bulk_create sends no signals, so the change feed is written here.
+                bulk_record_changes(
+                    [(DoctorChange.DOCTOR, doctor, doctor.contact_number) for doctor in doctors]
+                    + [(DoctorChange.CERTIFICATION, certification, certification.doctor.contact_number) for certification in certifications]
+                    + [(DoctorChange.BANK_DETAILS, bank, bank.doctor_id) for bank in bank_details]
+                )
+        except IntegrityError as e:
+            # A doctor registered concurrently with one of these rows; report the batch instead of aborting the file.
+            for number, row, *_ in valid:
+                self._fail(number, row, {'non_field_errors': [f"Not imported, the batch conflicted with existing data: {e}"]})
+                self.seen_contact_numbers.discard(row['contact_number'])
+                self.seen_emails.discard(row.get('email'))
+            return
+        # bulk_create sends no signals, so the listings are invalidated here too.
+        for model in (DoctorPersonalDetails, DoctorCertification, DoctorBankDetails):
+            bump_list_version(model)
+        self.created += len(doctors)
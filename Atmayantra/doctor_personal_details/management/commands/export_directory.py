@@ -0,0 +1,38 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Atmayantra.exports import EXPORT_FORMATS, NDJSON, XLSX, ExportError, write_export
+from contactapp.exports import contact_export
+from doctor_personal_details.exports import doctor_export
+
+DATASETS = {
+    'doctors': doctor_export,
+    'contacts': contact_export,
+}
+
+
+class Command(BaseCommand):
+    help = "Exports the doctor directory or the contact-us inbox as NDJSON, CSV or XLSX, reading rows in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default=NDJSON)
+        parser.add_argument('--output', '-o', help="File to write to. Defaults to stdout, except for XLSX.")
+        parser.add_argument('--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE, help="Rows fetched from the database at a time.")
+
+    def handle(self, *args, **options):
+        dataset = DATASETS[options['dataset']]()
+        if options['output'] is None and options['export_format'] == XLSX:
+            raise CommandError("XLSX exports need --output.")
+
+        try:
+            if options['output'] is None:
+                write_export(dataset, options['export_format'], sys.stdout.buffer, options['chunk_size'])
+                return
+            with open(options['output'], 'wb') as output:
+                write_export(dataset, options['export_format'], output, options['chunk_size'])
+        except ExportError as e:
+            raise CommandError(str(e))
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['dataset']} to {options['output']}."))
@@ -0,0 +1,42 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from doctor_personal_details.imports import DoctorImport, DoctorImportError, read_rows
+
+
+class Command(BaseCommand):
+    help = "Imports doctors with their certification and bank details from a CSV or XLSX file, in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="A .csv or .xlsx file with the columns of the doctors export, plus optional bank details.")
+        parser.add_argument('--batch-size', type=int, help="Rows validated and inserted per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without inserting anything.")
+        parser.add_argument('--report', help="Write the per-row errors to this CSV file.")
+
+    def handle(self, *args, **options):
+        importer = DoctorImport(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['path'], 'rb') as file:
+                result = importer.run(read_rows(file, options['path']))
+        except (OSError, DoctorImportError) as e:
+            raise CommandError(str(e))
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as report:
+                writer = csv.writer(report)
+                writer.writerow(['row', 'contact_number', 'field', 'message'])
+                for error in result['errors']:
+                    for field, messages in error['errors'].items():
+                        for message in messages:
+                            writer.writerow([error['row'], error['contact_number'], field, message])
+        else:
+            for error in result['errors']:
+                self.stderr.write(f"Row {error['row']} ({error['contact_number']}): {error['errors']}")
+
+        verb = "Validated" if options['dry_run'] else "Imported"
+        count = result['total'] - result['failed'] if options['dry_run'] else result['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} of {result['total']} doctors in {result['seconds']}s "
+            f"({result['rows_per_second']} rows/s); {result['failed']} row(s) failed."
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_personal_details', '0005_alter_doctorpersonaldetails_profile_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorpersonaldetails',
+            name='profile_photo_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorpersonaldetails',
+            name='profile_photo_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorpersonaldetails',
+            name='profile_photo_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctorpersonaldetails',
+            name='profile_photo_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
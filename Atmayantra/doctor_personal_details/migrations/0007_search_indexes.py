@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:32
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_personal_details', '0006_doctorpersonaldetails_profile_photo_content_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctorpersonaldetails',
+            index=models.Index(django.db.models.functions.text.Lower('full_name'), name='doctor_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorpersonaldetails',
+            index=models.Index(fields=['specialization', 'experience'], name='doctor_specialization_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorpersonaldetails',
+            index=models.Index(fields=['hospital', 'experience'], name='doctor_hospital_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+INDEX_NAME = 'doctor_full_name_fts_idx'
+
+
+def create_search_index(apps, schema_editor):
+    # Full-text search is only offered on PostgreSQL; other backends fall back to prefix matching.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON "doctors - personal_details" '
+        "USING gin (to_tsvector('simple'::regconfig, COALESCE((full_name)::text, '')))"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_personal_details', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
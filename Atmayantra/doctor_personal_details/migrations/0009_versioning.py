@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_personal_details', '0008_full_name_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorpersonaldetails',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='doctorpersonaldetails',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='doctorpersonaldetails',
+            index=models.Index(fields=['contact_number', 'id', 'version', 'updated_at'], name='doctor_version_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_personal_details', '0009_versioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('resource', models.CharField(choices=[('doctor', 'Doctor'), ('certification', 'Certification'), ('document', 'Document'), ('bank_details', 'Bank details')], max_length=20)),
+                ('object_id', models.CharField(max_length=64)),
+                ('contact_number', models.CharField(max_length=15)),
+                ('action', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'doctor_changes',
+            },
+        ),
+    ]
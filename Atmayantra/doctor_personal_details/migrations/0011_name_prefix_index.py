@@ -0,0 +1,34 @@
+from django.db import migrations
+
+INDEX_NAME = 'doctor_name_prefix_idx'
+
+
+def create_prefix_index(apps, schema_editor):
+    # LIKE 'prefix%' can only use a btree index built with pattern ops, unless the database uses the C collation.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON "doctors - personal_details" '
+        '(LOWER(full_name) text_pattern_ops)'
+    )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor_personal_details', '0010_change_log'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='doctorpersonaldetails',
+            name='doctor_name_lower_idx',
+        ),
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
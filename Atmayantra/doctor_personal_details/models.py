@@ -1,6 +1,7 @@
 from django.db import models
+from Atmayantra.models import VersionedModel
 
-class DoctorPersonalDetails(models.Model):
+class DoctorPersonalDetails(VersionedModel):
     contact_number = models.CharField(max_length=15, unique=True)
     full_name = models.CharField(max_length=255)
     specialization = models.CharField(max_length=255)
@@ -9,10 +10,59 @@ class DoctorPersonalDetails(models.Model):
     gender = models.CharField(max_length=10)
     email = models.EmailField(unique=True)
     address = models.TextField()
+    profile_photo_key = models.CharField(max_length=255, null=True, blank=True)
+    profile_photo_size = models.PositiveBigIntegerField(null=True, blank=True)
+    profile_photo_content_type = models.CharField(max_length=255, null=True, blank=True)
+    profile_photo_sha256 = models.CharField(max_length=64, null=True, blank=True)
+    # Legacy base64 body, only set on rows written before the blob store.
     profile_photo = models.TextField(null=True, blank=True)
 
     class Meta:
         db_table = 'doctors - personal_details'
+        indexes = [
+            # Name prefix and full-text search use PostgreSQL-only indexes, see
+            # migrations 0008 and 0011.
+            models.Index(fields=['specialization', 'experience'], name='doctor_specialization_idx'),
+            models.Index(fields=['hospital', 'experience'], name='doctor_hospital_idx'),
+            # Lets conditional requests read a row's version without touching the table.
+            models.Index(fields=['contact_number', 'id', 'version', 'updated_at'], name='doctor_version_idx'),
+        ]
 
     def __str__(self):
-        return self.full_name
\ No newline at end of file
+        return self.full_name
+
+class DoctorChange(models.Model):
+    """
+    Append-only log of writes to doctors and their related records.
+
+    Rows are written by signal receivers inside the transaction of the write
+    they describe, so the log never disagrees with the tables. The primary key
+    doubles as the cursor of the change feed.
+    """
+    DOCTOR = 'doctor'
+    CERTIFICATION = 'certification'
+    DOCUMENT = 'document'
+    BANK_DETAILS = 'bank_details'
+    RESOURCE_CHOICES = [
+        (DOCTOR, 'Doctor'),
+        (CERTIFICATION, 'Certification'),
+        (DOCUMENT, 'Document'),
+        (BANK_DETAILS, 'Bank details'),
+    ]
+
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTION_CHOICES = [(UPSERT, 'Upsert'), (DELETE, 'Delete')]
+
+    id = models.BigAutoField(primary_key=True)
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    object_id = models.CharField(max_length=64)
+    contact_number = models.CharField(max_length=15)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'doctor_changes'
+
+    def __str__(self):
+        return f'{self.id} {self.action} {self.resource} {self.object_id}'
@@ -0,0 +1,37 @@
+from django.db.models import Prefetch
+
+from doctor_certification.models import DoctorCertification
+from doctor_documents.models import DoctorDocument
+from filestore.query import assign_related_blob_flags, defer_blob_fields
+from .models import DoctorPersonalDetails
+
+RELATED_BLOB_FIELDS = (
+    *(f'certification__{slot}' for slot in DoctorCertification.FILE_SLOTS),
+    'bank_details__bank_qr_code',
+)
+
+
+def profile_queryset(includes=()):
+    """
+    Loads doctors with everything their profile shows in two queries.
+
+    Certification and bank details are joined in; documents are prefetched in
+    one query. Base64 file columns are deferred unless named in `includes`.
+    """
+    documents = DoctorDocument.objects.order_by('id')
+    if 'file_data' not in includes:
+        documents = documents.defer('file_data')
+    blob_fields = [
+        path for path in ('profile_photo', *RELATED_BLOB_FIELDS)
+        if path.rsplit('__', 1)[-1] not in includes
+    ]
+    queryset = DoctorPersonalDetails.objects.select_related('certification', 'bank_details')
+    return defer_blob_fields(queryset, *blob_fields).prefetch_related(Prefetch('documents', queryset=documents))
+
+
+def get_profile(contact_number, includes=()):
+    """Returns the doctor with this contact number ready for `DoctorProfileSerializer`, or None."""
+    doctor = profile_queryset(includes).filter(contact_number=contact_number).first()
+    if doctor is not None:
+        assign_related_blob_flags(doctor, *(path for path in RELATED_BLOB_FIELDS if hasattr(doctor, f'has_{path}')))
+    return doctor
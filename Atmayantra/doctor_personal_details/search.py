@@ -0,0 +1,56 @@
+from django.db import connection
+from django.db.models.functions import Lower
+
+EXACT_FILTERS = {
+    'specialization': 'specialization',
+    'hospital': 'hospital',
+    'gender': 'gender',
+    'certification_specialization': 'certification__specialization',
+    'certification_type': 'certification__certification_type',
+}
+RANGE_FILTERS = {
+    'experience_min': 'experience__gte',
+    'experience_max': 'experience__lte',
+    'year_of_experience_min': 'certification__year_of_experience__gte',
+    'year_of_experience_max': 'certification__year_of_experience__lte',
+}
+
+
+def filter_name_prefix(queryset, prefix):
+    """
+    Case-insensitive prefix match on full_name.
+
+    Expressed as `LOWER(full_name) LIKE 'prefix%'`, which on PostgreSQL is served
+    by the `text_pattern_ops` index `doctor_name_prefix_idx` whatever the
+    database collation.
+    """
+    return queryset.alias(full_name_lower=Lower('full_name')).filter(full_name_lower__startswith=prefix.lower())
+
+
+def filter_full_text(queryset, text):
+    """
+    Full-text match on full_name.
+
+    On PostgreSQL this uses the `doctor_full_name_fts_idx` GIN index; other
+    backends, used in development, fall back to matching every word.
+    """
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        return queryset.alias(full_name_search=SearchVector('full_name', config='simple')).filter(
+            full_name_search=SearchQuery(text, config='simple', search_type='websearch')
+        )
+    for word in text.split():
+        queryset = queryset.filter(full_name__icontains=word)
+    return queryset
+
+
+def search_doctors(queryset, params):
+    """Applies validated `DoctorSearchSerializer` parameters to a doctor queryset."""
+    filters = {lookup: params[param] for param, lookup in {**EXACT_FILTERS, **RANGE_FILTERS}.items() if param in params}
+    queryset = queryset.filter(**filters)
+    if params.get('name'):
+        queryset = filter_name_prefix(queryset, params['name'])
+    if params.get('q'):
+        queryset = filter_full_text(queryset, params['q'])
+    return queryset
@@ -1,11 +1,40 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from .models import DoctorPersonalDetails
-import base64
+from Atmayantra.utils import requested_includes
+from doctor_bank_details.serializers import DoctorBankDetailsSummarySerializer
+from doctor_certification.serializers import DoctorCertificationReadSerializer
+from doctor_documents.serializers import DoctorDocumentSerializer
+from filestore.query import has_blob
+from filestore.images import PHOTO
+from filestore.storage import blob_columns, read_blob_base64, store_upload
+from filestore.tasks import schedule_derivatives
 
 class DoctorPersonalDetailsSerializer(serializers.ModelSerializer):
+    has_profile_photo = serializers.SerializerMethodField()
+    profile_photo_url = serializers.SerializerMethodField()
+    profile_photo = serializers.SerializerMethodField()
+
     class Meta:
         model = DoctorPersonalDetails
-        fields = '__all__'
+        exclude = ('profile_photo_key',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The inline base64 photo is opt-in through `?include=profile_photo`.
+        if 'profile_photo' not in requested_includes(self.context.get('request')):
+            self.fields.pop('profile_photo')
+
+    def get_has_profile_photo(self, obj):
+        return has_blob(obj, 'profile_photo')
+
+    def get_profile_photo_url(self, obj):
+        if not has_blob(obj, 'profile_photo'):
+            return None
+        return reverse('doctorpersonaldetails-photo', kwargs={'contact_number': obj.contact_number}, request=self.context.get('request'))
+
+    def get_profile_photo(self, obj):
+        return read_blob_base64(obj.profile_photo_key, obj.profile_photo)
 
 class DoctorPersonalDetailsWriteSerializer(serializers.ModelSerializer):
     profile_photo_file = serializers.ImageField(write_only=True, required=False)
@@ -17,20 +46,61 @@ class DoctorPersonalDetailsWriteSerializer(serializers.ModelSerializer):
             'profile_photo': {'read_only': True}
         }
 
-    def create(self, validated_data):
+    def _store_photo(self, validated_data):
         profile_photo_file = validated_data.pop('profile_photo_file', None)
-        if profile_photo_file:
-            encoded_string = base64.b64encode(profile_photo_file.read()).decode('utf-8')
-            validated_data['profile_photo'] = encoded_string
-        return super().create(validated_data)
+        if not profile_photo_file:
+            return None
+        blob = store_upload(profile_photo_file)
+        validated_data.update(blob_columns('profile_photo', blob))
+        validated_data['profile_photo'] = None
+        return blob
+
+    def create(self, validated_data):
+        blob = self._store_photo(validated_data)
+        instance = super().create(validated_data)
+        schedule_derivatives(blob, PHOTO)
+        return instance
 
     def update(self, instance, validated_data):
-        profile_photo_file = validated_data.pop('profile_photo_file', None)
-        if profile_photo_file:
-            encoded_string = base64.b64encode(profile_photo_file.read()).decode('utf-8')
-            validated_data['profile_photo'] = encoded_string
-        return super().update(instance, validated_data)
+        blob = self._store_photo(validated_data)
+        instance = super().update(instance, validated_data)
+        schedule_derivatives(blob, PHOTO)
+        return instance
 
     def validate_contact_number(self, value):
         # Strip whitespace from the contact number
         return value.strip()
+
+class DoctorSearchSerializer(serializers.Serializer):
+    """Validates the query parameters of the doctor search endpoint."""
+    name = serializers.CharField(required=False, max_length=255, help_text="Case-insensitive prefix of the full name.")
+    q = serializers.CharField(required=False, max_length=255, help_text="Full-text search on the full name.")
+    specialization = serializers.CharField(required=False)
+    hospital = serializers.CharField(required=False)
+    gender = serializers.CharField(required=False)
+    experience_min = serializers.IntegerField(required=False, min_value=0)
+    experience_max = serializers.IntegerField(required=False, min_value=0)
+    certification_specialization = serializers.CharField(required=False)
+    certification_type = serializers.CharField(required=False)
+    year_of_experience_min = serializers.IntegerField(required=False, min_value=0)
+    year_of_experience_max = serializers.IntegerField(required=False, min_value=0)
+
+class DoctorChangesSerializer(serializers.Serializer):
+    """Validates the query parameters of the change feed."""
+    since = serializers.IntegerField(min_value=0, help_text="Cursor returned as `next` by the previous call; 0 reads the log from the start.")
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=1000, default=500)
+
+class DoctorImportSerializer(serializers.Serializer):
+    import_file = serializers.FileField(help_text="A .csv or .xlsx file with the columns of the doctors export, plus optional bank details.")
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+class DoctorProfileSerializer(DoctorPersonalDetailsSerializer):
+    """
+    A doctor's full profile: personal details, certification, bank details and documents.
+
+    Expects the queryset built by `profile_queryset`, so nested objects are
+    already loaded and only file metadata is read.
+    """
+    certification = DoctorCertificationReadSerializer(read_only=True)
+    bank_details = DoctorBankDetailsSummarySerializer(read_only=True)
+    documents = DoctorDocumentSerializer(many=True, read_only=True)
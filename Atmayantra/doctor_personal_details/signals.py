@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from Atmayantra.response_cache import bump_doctor_version
+from .changes import record_change
+from .models import DoctorChange, DoctorPersonalDetails
+
+
+@receiver(pre_save, sender=DoctorPersonalDetails)
+def remember_previous_contact_number(sender, instance, update_fields=None, **kwargs):
+    instance._previous_contact_number = None
+    if instance.pk is None or (update_fields is not None and 'contact_number' not in update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('contact_number', flat=True).first()
+    if previous and previous != instance.contact_number:
+        instance._previous_contact_number = previous
+
+
+@receiver(post_save, sender=DoctorPersonalDetails)
+@receiver(post_delete, sender=DoctorPersonalDetails)
+def invalidate_doctor_cache(sender, instance, **kwargs):
+    # Payloads are cached under the contact number, so a renumbered doctor invalidates the old one too.
+    contact_numbers = [number for number in (instance.contact_number, getattr(instance, '_previous_contact_number', None)) if number]
+    for contact_number in contact_numbers:
+        bump_doctor_version(contact_number)
+    # Again after commit, in case a request cached the old row in between.
+    transaction.on_commit(lambda: [bump_doctor_version(contact_number) for contact_number in contact_numbers])
+
+
+@receiver(post_save, sender=DoctorPersonalDetails)
+def log_doctor_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_contact_number', None)
+    if previous:
+        # Clients key doctors by contact number; the old one is gone for them.
+        record_change(DoctorChange.DOCTOR, instance, previous, DoctorChange.DELETE)
+    record_change(DoctorChange.DOCTOR, instance, instance.contact_number)
+
+
+@receiver(post_delete, sender=DoctorPersonalDetails)
+def log_doctor_deleted(sender, instance, **kwargs):
+    record_change(DoctorChange.DOCTOR, instance, instance.contact_number, DoctorChange.DELETE)
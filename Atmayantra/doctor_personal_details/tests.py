@@ -1,3 +1,374 @@
-from django.test import TestCase
+import csv
+import io
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from authapp.models import User
+from doctor_bank_details.models import DoctorBankDetails
+from doctor_certification.models import DoctorCertification
+from doctor_documents.models import DoctorDocument
+from .imports import DoctorImport, read_rows
+from .models import DoctorChange, DoctorPersonalDetails
+from .search import search_doctors
+
+# Keeps cached responses and doctor versions out of the project's file cache.
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'doctor-tests'}}
+
+
+def create_doctor(contact_number, full_name, specialization='Yoga', experience=5, hospital='City Hospital', **certification):
+    doctor = DoctorPersonalDetails.objects.create(
+        contact_number=contact_number,
+        full_name=full_name,
+        specialization=specialization,
+        experience=experience,
+        hospital=hospital,
+        gender='F',
+        email=f'{contact_number}@example.com',
+        address='Address',
+    )
+    DoctorCertification.objects.create(
+        doctor=doctor,
+        highest_degree='BNYS',
+        year_of_graduation='2010',
+        year_of_experience=certification.get('year_of_experience', 5),
+        yoga_certified='yes',
+        certification_type=certification.get('certification_type', 'QCI'),
+        issuing_authority='Board',
+        specialization=certification.get('specialization', 'Hatha'),
+        license_number='L-1',
+    )
+    return doctor
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DoctorSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_doctor('9000000001', 'Asha Rao', experience=12, year_of_experience=10, certification_type='QCI')
+        create_doctor('9000000002', 'asha Verma', specialization='Ayurveda', experience=3, year_of_experience=2)
+        create_doctor('9000000003', 'Ravi Ashar', experience=8, certification_type='RYT')
+
+    def search(self, **params):
+        response = APIClient().get('/doctors_personal_details/doctors/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(doctor['contact_number'] for doctor in response.json()['data']['results'])
+
+    def test_name_prefix_is_case_insensitive(self):
+        self.assertEqual(self.search(name='ASHA'), ['9000000001', '9000000002'])
+
+    def test_name_prefix_is_matched_literally(self):
+        self.assertEqual(self.search(name='Asha Rao'), ['9000000001'])
+        self.assertEqual(self.search(name='as%'), [])
+        self.assertEqual(self.search(name='_sha'), [])
+
+    def test_filters_combine_doctor_and_certification_fields(self):
+        self.assertEqual(self.search(specialization='Yoga', experience_min=5), ['9000000001', '9000000003'])
+        self.assertEqual(self.search(certification_type='QCI', year_of_experience_min=5), ['9000000001'])
+
+    def test_invalid_parameters_are_rejected(self):
+        response = APIClient().get('/doctors_personal_details/doctors/search/', {'experience_min': 'many'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DoctorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(5):
+            create_doctor(f'900000000{number}', f'Doctor {number}')
+
+    def test_pages_follow_the_cursor(self):
+        client = APIClient()
+        url = '/doctors_personal_details/doctors/get-all-doctors/?page_size=2'
+        pages = []
+        while url:
+            # One LIMIT query, however deep the page; the list's ETag needs none.
+            with self.assertNumQueries(1):
+                data = client.get(url).json()['data']
+            pages.append([doctor['contact_number'] for doctor in data['results']])
+            url = data['next']
+        self.assertEqual(pages, [['9000000000', '9000000001'], ['9000000002', '9000000003'], ['9000000004']])
+
+    def test_page_size_is_capped(self):
+        response = APIClient().get('/doctors_personal_details/doctors/get-all-doctors/', {'page_size': 1000})
+        self.assertEqual(len(response.json()['data']['results']), 5)
+        self.assertIsNone(response.json()['data']['next'])
+
+    def test_unnamed_listings_are_not_paginated(self):
+        response = APIClient().get('/doctors_certifications/certifications/')
+        self.assertIsInstance(response.json(), list)
+
+
+class DoctorSearchQueryPlanTests(TestCase):
+    """Searches must be served by an index rather than a full table scan."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be scanned sequentially.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    @skipUnless(connection.vendor == 'postgresql', "The name prefix index only exists on PostgreSQL.")
+    def test_name_prefix_uses_pattern_index(self):
+        queryset = search_doctors(DoctorPersonalDetails.objects.all(), {'name': 'Asha'})
+        self.assertUsesIndex(queryset, 'doctor_name_prefix_idx')
+
+    def test_specialization_filter_uses_index(self):
+        queryset = search_doctors(DoctorPersonalDetails.objects.all(), {'specialization': 'Yoga', 'experience_min': 3})
+        self.assertUsesIndex(queryset, 'doctor_specialization_idx')
+
+    def test_certification_filter_uses_index(self):
+        queryset = DoctorCertification.objects.filter(certification_type='QCI', year_of_experience__gte=2)
+        self.assertUsesIndex(queryset, 'cert_type_idx')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHES)
+class DoctorProfileTests(TestCase):
+    url = '/doctors_personal_details/doctors/9000000001/profile/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = create_doctor('9000000001', 'Asha Rao')
+        DoctorBankDetails.objects.create(
+            doctor=cls.doctor, account_holder_name='Asha Rao', account_number='1', ifsc_code='IFSC0001', account_type='savings',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def add_documents(self, count):
+        DoctorDocument.objects.bulk_create(
+            DoctorDocument(doctor=self.doctor, doc_type='id', filename=f'{i}.pdf', content_type='application/pdf', file_key='0' * 64, file_size=1)
+            for i in range(count)
+        )
+        # bulk_create sends no post_save signals, so the cached profile is dropped by hand.
+        cache.clear()
+
+    def get_profile(self):
+        response = APIClient().get(self.url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['data']
+
+    def test_profile_combines_all_sections(self):
+        self.add_documents(2)
+        profile = self.get_profile()
+        self.assertEqual(profile['contact_number'], '9000000001')
+        self.assertEqual(profile['certification']['doctor'], '9000000001')
+        self.assertFalse(profile['certification']['has_license'])
+        self.assertEqual(profile['bank_details']['ifsc_code'], 'IFSC0001')
+        self.assertEqual(len(profile['documents']), 2)
+        self.assertNotIn('file_data', profile['documents'][0])
+
+    def test_query_count_does_not_grow_with_documents(self):
+        self.add_documents(1)
+        with self.assertNumQueries(2):
+            self.get_profile()
+        self.add_documents(25)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.get_profile()['documents']), 26)
+
+    def test_profile_is_cached_until_the_doctor_changes(self):
+        self.get_profile()
+        with self.assertNumQueries(0):
+            self.get_profile()
+        self.doctor.full_name = 'Asha R. Rao'
+        self.doctor.save()
+        self.assertEqual(self.get_profile()['full_name'], 'Asha R. Rao')
+
+    def test_unknown_doctor(self):
+        response = APIClient().get('/doctors_personal_details/doctors/0000000000/profile/')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCAL_CACHES)
+class ConditionalRequestTests(TestCase):
+    url = '/doctors_personal_details/doctors/9000000001/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = create_doctor('9000000001', 'Asha Rao')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_matching_etag_returns_304_from_the_version_alone(self):
+        etag = APIClient().get(self.url)['ETag']
+        self.assertEqual(etag, f'"{self.doctor.pk}.1"')
+        with self.assertNumQueries(1):
+            response = APIClient().get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_moves_the_etag(self):
+        client = APIClient()
+        etag = client.get(self.url)['ETag']
+        response = client.patch(self.url, {'hospital': 'Lake Hospital'}, format='multipart', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response['ETag'], f'"{self.doctor.pk}.2"')
+        self.assertEqual(client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_second_write_with_the_same_etag_is_rejected(self):
+        etag = APIClient().get(self.url)['ETag']
+        first = APIClient().patch(self.url, {'hospital': 'Lake Hospital'}, format='multipart', HTTP_IF_MATCH=etag)
+        second = APIClient().patch(self.url, {'hospital': 'Hill Hospital'}, format='multipart', HTTP_IF_MATCH=etag)
+        self.assertEqual((first.status_code, second.status_code), (200, 412))
+        self.doctor.refresh_from_db()
+        self.assertEqual((self.doctor.hospital, self.doctor.version), ('Lake Hospital', 2))
+
+    def test_saves_from_stale_instances_each_move_the_version(self):
+        first, second = DoctorPersonalDetails.objects.get(pk=self.doctor.pk), DoctorPersonalDetails.objects.get(pk=self.doctor.pk)
+        first.save()
+        second.save()
+        self.assertEqual(second.version, 3)
+
+    def test_stale_write_is_rejected_before_the_body_is_parsed(self):
+        # A PNG field holding non-image bytes would be rejected with 415 if it were parsed.
+        upload = SimpleUploadedFile('photo.png', b'not an image', content_type='image/png')
+        response = APIClient().patch(
+            self.url, {'profile_photo_file': upload}, format='multipart', HTTP_IF_MATCH=f'"{self.doctor.pk}.0"',
+        )
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response['ETag'], f'"{self.doctor.pk}.1"')
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.version, 1)
+
+    @override_settings(REQUIRE_IF_MATCH=True)
+    def test_if_match_can_be_required(self):
+        response = APIClient().patch(self.url, {'hospital': 'Lake Hospital'}, format='multipart')
+        self.assertEqual(response.status_code, 428)
+
+    def test_list_etag_changes_with_any_row(self):
+        url = '/doctors_personal_details/doctors/get-all-doctors/'
+        etag = APIClient().get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(APIClient().get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.doctor.save()
+        etag = APIClient().get(url, HTTP_IF_NONE_MATCH=etag)['ETag']
+        create_doctor('9000000002', 'Meera Iyer').delete()
+        self.assertEqual(APIClient().get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, DOCTOR_CHANGES_SETTLE_SECONDS=0)
+class DoctorChangeFeedTests(TestCase):
+    url = '/doctors_personal_details/doctors/changes/'
+
+    def read(self, since):
+        response = APIClient().get(self.url, {'since': since})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['data']
+
+    def test_feed_returns_only_changes_after_the_cursor(self):
+        doctor = create_doctor('9000000001', 'Asha Rao')
+        feed = self.read(0)
+        self.assertEqual([(c['resource'], c['action']) for c in feed['changes']], [('doctor', 'upsert'), ('certification', 'upsert')])
+        self.assertEqual(feed['changes'][0]['data']['full_name'], 'Asha Rao')
+
+        doctor.hospital = 'Lake Hospital'
+        doctor.save()
+        doctor.hospital = 'River Hospital'
+        doctor.save()
+        changes = self.read(feed['next'])['changes']
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]['data']['hospital'], 'River Hospital')
+
+    def test_deletes_become_tombstones(self):
+        create_doctor('9000000001', 'Asha Rao')
+        cursor = self.read(0)['next']
+        DoctorPersonalDetails.objects.get(contact_number='9000000001').delete()
+        changes = self.read(cursor)['changes']
+        # Cascaded rows get tombstones of their own.
+        self.assertEqual([(c['resource'], c['action']) for c in changes], [('certification', 'delete'), ('doctor', 'delete')])
+        self.assertEqual(changes[-1]['contact_number'], '9000000001')
+        self.assertNotIn('data', changes[-1])
+
+    def test_page_cost_does_not_grow_with_changes(self):
+        for i in range(10):
+            create_doctor(f'90000000{i:02}', f'Doctor {i}')
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.read(0)['changes']), 20)
+
+    def test_cursor_is_required(self):
+        self.assertEqual(APIClient().get(self.url).status_code, 400)
+
+
+IMPORT_HEADERS = [
+    'contact_number', 'full_name', 'specialization', 'experience', 'hospital', 'gender', 'email', 'address',
+    'highest_degree', 'year_of_graduation', 'year_of_experience', 'yoga_certified', 'certification_type',
+    'issuing_authority', 'certification_specialization', 'license_number',
+    'account_holder_name', 'account_number', 'ifsc_code', 'upi_id', 'account_type',
+]
+
+
+def import_row(contact_number, email=None, experience='5', account_number='1'):
+    return [
+        contact_number, 'Asha Rao', 'Yoga', experience, 'City Hospital', 'F', email or f'{contact_number}@example.com', 'Address',
+        'BNYS', '2010', '5', 'yes', 'QCI', 'Board', 'Hatha', 'L-1',
+        'Asha Rao' if account_number else '', account_number, 'IFSC0001' if account_number else '', '', 'savings' if account_number else '',
+    ]
+
+
+def import_csv(*rows):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(IMPORT_HEADERS)
+    writer.writerows(rows)
+    return io.BytesIO(output.getvalue().encode())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DoctorImportTests(TestCase):
+    def run_import(self, *rows, **kwargs):
+        return DoctorImport(**kwargs).run(read_rows(import_csv(*rows), 'doctors.csv'))
+
+    def test_valid_rows_are_imported_and_bad_rows_reported(self):
+        create_doctor('9000000009', 'Existing')
+        result = self.run_import(
+            import_row('9000000001'),
+            import_row('9000000002', experience='many'),
+            import_row('9000000003', account_number=''),
+            import_row('9000000001', email='other@example.com'),
+            import_row('9000000009'),
+            batch_size=2,
+        )
+        self.assertEqual((result['total'], result['created'], result['failed']), (5, 2, 3))
+        self.assertEqual([(error['row'], sorted(error['errors'])) for error in result['errors']], [
+            (3, ['experience']), (5, ['contact_number']), (6, ['contact_number', 'email']),
+        ])
+
+        doctor = DoctorPersonalDetails.objects.get(contact_number='9000000001')
+        self.assertEqual(doctor.certification.specialization, 'Hatha')
+        self.assertEqual(doctor.bank_details.ifsc_code, 'IFSC0001')
+        self.assertFalse(DoctorBankDetails.objects.filter(doctor_id='9000000003').exists())
+        self.assertEqual(DoctorChange.objects.filter(contact_number__in=['9000000001', '9000000003']).count(), 5)
+
+    def test_dry_run_inserts_nothing(self):
+        result = self.run_import(import_row('9000000001'), dry_run=True)
+        self.assertEqual((result['created'], result['failed']), (0, 0))
+        self.assertFalse(DoctorPersonalDetails.objects.exists())
+
+    def test_queries_per_batch_do_not_grow_with_rows(self):
+        # Small enough for one INSERT per table within SQLite's bind parameter limit.
+        rows = [import_row(f'90000000{i:02}') for i in range(20)]
+        # Two uniqueness lookups, three bulk inserts, the change log and the savepoint.
+        with self.assertNumQueries(8):
+            self.assertEqual(self.run_import(*rows, batch_size=20)['created'], 20)
+
+    def test_endpoint_is_admin_only(self):
+        url = '/doctors_personal_details/doctors/import/'
+        upload = lambda: io.BytesIO(import_csv(import_row('9000000001')).getvalue())
+        self.assertEqual(APIClient().post(url, {'import_file': upload()}).status_code, 401)
+
+        admin = User.objects.create_superuser(phone_number='9999999999', username='admin', email='admin@example.com', password='pw')
+        client = APIClient()
+        client.force_authenticate(admin)
+        file = upload()
+        file.name = 'doctors.csv'
+        response = client.post(url, {'import_file': file})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['data']['created'], 1)
@@ -1,22 +1,49 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from .models import DoctorPersonalDetails
-from .serializers import DoctorPersonalDetailsSerializer, DoctorPersonalDetailsWriteSerializer
+from .changes import read_changes
+from .exports import doctor_export
+from .imports import DoctorImport, DoctorImportError, read_rows
+from .profiles import get_profile
+from .search import search_doctors
+from .serializers import DoctorPersonalDetailsSerializer, DoctorChangesSerializer, DoctorImportSerializer, DoctorPersonalDetailsWriteSerializer, DoctorProfileSerializer, DoctorSearchSerializer
 from rest_framework.parsers import MultiPartParser, FormParser
-import base64
-from django.utils import timezone
-from Atmayantra.utils import api_response
+from rest_framework.permissions import IsAdminUser
+from Atmayantra.conditional import ConditionalRequestMixin, conditional_detail, conditional_list, conditional_write
+from Atmayantra.exports import EXPORT_FORMATS, NDJSON, ExportError, export_response
+from Atmayantra.pagination import KeysetPagination
+from Atmayantra.response_cache import cache_doctor_response
+from Atmayantra.utils import api_response, requested_includes
+from doctor_registration.drafts import start_draft
+from filestore.images import IMAGE_SIZES, ORIGINAL_SIZE, PHOTO, serve_image_field
+from filestore.query import defer_blob_fields
+from filestore.staging import stage_upload
+from filestore.upload_handlers import VerifiedUploadMixin
 
-class DoctorPersonalDetailsViewSet(viewsets.ModelViewSet):
+class DoctorPersonalDetailsViewSet(ConditionalRequestMixin, VerifiedUploadMixin, viewsets.ModelViewSet):
     queryset = DoctorPersonalDetails.objects.all()
     lookup_field = 'contact_number'
     parser_classes = (MultiPartParser, FormParser)
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return DoctorPersonalDetailsWriteSerializer
         return DoctorPersonalDetailsSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'photo':
+            # Downloads only need blob metadata, never the legacy base64 body.
+            queryset = queryset.defer('profile_photo')
+        elif self.action in ('list', 'retrieve', 'get_all_doctors', 'search') and 'profile_photo' not in requested_includes(self.request):
+            # Listings return photo metadata and a download URL, not the photo itself.
+            queryset = defer_blob_fields(queryset, 'profile_photo')
+        return queryset
+
+    def get_row_state_queryset(self):
+        return DoctorPersonalDetails.objects.filter(contact_number=self.kwargs['contact_number'])
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
@@ -24,47 +51,110 @@ class DoctorPersonalDetailsViewSet(viewsets.ModelViewSet):
         
         validated_data = serializer.validated_data
 
-        profile_photo_file = validated_data.pop('profile_photo', None)
-        encoded_photo = None
-        if profile_photo_file:
-            encoded_photo = base64.b64encode(profile_photo_file.read()).decode('utf-8')
+        profile_photo_file = validated_data.pop('profile_photo_file', None)
 
         for key, value in validated_data.items():
             if hasattr(value, 'pk'):
                 validated_data[key] = value.pk
 
-        validated_data['profile_photo'] = encoded_photo
+        # Only a short staging reference goes into the draft, never the file itself.
+        validated_data['profile_photo'] = stage_upload(profile_photo_file) if profile_photo_file else None
 
-        request.session['doctor_registration_data'] = {
-            'personal_details': validated_data,
-            'start_time': timezone.now().isoformat()
-        }
+        draft = start_draft(request, dict(validated_data))
 
-        return api_response(True, "Step 1 of 4 complete: Personal details received. Proceed to certification details.", validated_data)
+        return api_response(True, "Step 1 of 4 complete: Personal details received. Proceed to certification details.", {**validated_data, 'draft_id': str(draft.id)})
 
     @action(detail=False, methods=['get'], url_path='get-all-doctors')
+    @conditional_list
     def get_all_doctors(self, request):
-        queryset = self.get_queryset()
-        serializer = DoctorPersonalDetailsSerializer(queryset, many=True)
-        return api_response(True, "All doctors retrieved successfully.", serializer.data)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data, "All doctors retrieved successfully.")
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        params = DoctorSearchSerializer(data=request.query_params)
+        if not params.is_valid():
+            return api_response(False, "Invalid search parameters.", params.errors, status_code=status.HTTP_400_BAD_REQUEST)
+
+        queryset = search_doctors(self.get_queryset(), params.validated_data)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data, "Doctors retrieved successfully.")
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        params = DoctorChangesSerializer(data=request.query_params)
+        if not params.is_valid():
+            return api_response(False, "Invalid change feed parameters.", params.errors, status_code=status.HTTP_400_BAD_REQUEST)
+
+        feed = read_changes(params.validated_data['since'], params.validated_data['limit'], self.get_serializer_context())
+        return api_response(True, "Changes retrieved successfully.", feed)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        export_format = request.query_params.get('output', NDJSON)
+        if export_format not in EXPORT_FORMATS:
+            return api_response(False, f"output must be one of: {', '.join(EXPORT_FORMATS)}.", status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return export_response(doctor_export(), export_format)
+        except ExportError as e:
+            return api_response(False, str(e), status_code=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser])
+    def import_doctors(self, request):
+        serializer = DoctorImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return api_response(False, "Invalid data provided.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
+
+        import_file = serializer.validated_data['import_file']
+        importer = DoctorImport(dry_run=serializer.validated_data['dry_run'])
+        try:
+            result = importer.run(read_rows(import_file.file, import_file.name))
+        except DoctorImportError as e:
+            return api_response(False, str(e), status_code=status.HTTP_400_BAD_REQUEST)
+
+        return api_response(True, f"Processed {result['total']} rows: {result['created']} doctors created, {result['failed']} rows failed.", result)
+
+    @conditional_detail
+    @cache_doctor_response('details')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=True, methods=['get'])
+    @cache_doctor_response('profile')
+    def profile(self, request, contact_number=None):
+        doctor = get_profile(contact_number, requested_includes(request))
+        if doctor is None:
+            return api_response(False, "Doctor not found.", status_code=status.HTTP_404_NOT_FOUND)
+
+        serializer = DoctorProfileSerializer(doctor, context=self.get_serializer_context())
+        return api_response(True, "Doctor profile retrieved successfully.", serializer.data)
 
     @action(detail=True, methods=['get'])
     def photo(self, request, contact_number=None):
         doctor = self.get_object()
-        if not doctor.profile_photo:
+        if not doctor.profile_photo_key and not doctor.profile_photo:
             return api_response(False, "Photo not found.", status_code=status.HTTP_404_NOT_FOUND)
+        if request.query_params.get('size', ORIGINAL_SIZE) not in IMAGE_SIZES:
+            return api_response(False, f"size must be one of: {', '.join(IMAGE_SIZES)}.", status_code=status.HTTP_400_BAD_REQUEST)
 
         try:
-            decoded_file = base64.b64decode(doctor.profile_photo)
-            return api_response(file=decoded_file)
+            return serve_image_field(request, doctor, 'profile_photo', kind=PHOTO)
         except Exception as e:
             return api_response(False, "Error decoding photo.", str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @conditional_write
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        read_serializer = DoctorPersonalDetailsSerializer(instance)
-        return api_response(True, "Personal details updated successfully.", read_serializer.data)
\ No newline at end of file
+        read_serializer = DoctorPersonalDetailsSerializer(instance, context={'request': request})
+        return api_response(True, "Personal details updated successfully.", read_serializer.data)
+
+    @conditional_write
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class DoctorRegistrationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'doctor_registration'
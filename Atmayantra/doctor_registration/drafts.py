@@ -0,0 +1,96 @@
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from rest_framework import status
+from Atmayantra.utils import api_response
+from filestore.staging import discard
+from .models import RegistrationDraft, RegistrationDraftStep
+
+DRAFT_LIFETIME = timedelta(days=1)
+SESSION_KEY = 'doctor_registration_draft'
+Step = RegistrationDraftStep.Step
+
+
+def start_draft(request, personal_details):
+    """Creates a new draft holding step 1 and binds it to the session, replacing any earlier draft."""
+    previous_id = request.session.get(SESSION_KEY)
+    if previous_id:
+        for previous in RegistrationDraft.objects.filter(pk=previous_id):
+            discard_draft(previous)
+    draft = RegistrationDraft.objects.create(expires_at=timezone.now() + DRAFT_LIFETIME)
+    RegistrationDraftStep.objects.create(draft=draft, step=Step.PERSONAL_DETAILS, data=personal_details)
+    request.session[SESSION_KEY] = str(draft.id)
+    return draft
+
+
+def load_draft(request, required_steps=(Step.PERSONAL_DETAILS,)):
+    """
+    Finds the caller's active registration draft.
+
+    The draft id is taken from a `draft_id` query parameter or form field,
+    falling back to the one bound to the session, so a registration can be
+    resumed from another session.
+
+    Returns:
+        tuple: `(draft, None)` on success, or `(None, error_response)`.
+    """
+    draft_id = request.query_params.get('draft_id') or request.data.get('draft_id') or request.session.get(SESSION_KEY)
+    if not draft_id:
+        return None, api_response(False, "Step 1 (personal details) must be completed first.", status_code=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        draft = RegistrationDraft.objects.filter(pk=draft_id).first()
+    except ValidationError:
+        return None, api_response(False, "Invalid registration draft. Please start over.", status_code=status.HTTP_400_BAD_REQUEST)
+
+    if draft is None:
+        return None, api_response(False, "Registration draft not found. Please start over.", status_code=status.HTTP_404_NOT_FOUND)
+
+    if draft.expires_at <= timezone.now():
+        discard_draft(draft)
+        request.session.pop(SESSION_KEY, None)
+        return None, api_response(False, "The registration process has expired. Please start over.", status_code=status.HTTP_400_BAD_REQUEST)
+
+    completed = set(draft.steps.filter(step__in=required_steps).values_list('step', flat=True))
+    missing = [step for step in required_steps if step not in completed]
+    if missing:
+        labels = ', '.join(Step(step).label.lower() for step in missing)
+        return None, api_response(False, f"Previous steps must be completed first: {labels}.", status_code=status.HTTP_400_BAD_REQUEST)
+
+    request.session[SESSION_KEY] = str(draft.id)
+    return draft, None
+
+
+def save_step(draft, step, data):
+    """Writes a single-valued step, replacing any earlier submission of it."""
+    RegistrationDraftStep.objects.update_or_create(draft=draft, step=step, defaults={'data': data})
+
+
+def add_document(draft, data):
+    return RegistrationDraftStep.objects.create(draft=draft, step=Step.DOCUMENT, data=data)
+
+
+def staged_files(data):
+    """Yields the staging references held in a step's data."""
+    for value in data.values():
+        if isinstance(value, dict) and 'token' in value:
+            yield value
+
+
+def discard_draft(draft, steps=None):
+    """Deletes a draft together with the uploads it staged; pass `steps` if they are already loaded."""
+    step_datas = [step.data for step in steps] if steps is not None else draft.steps.values_list('data', flat=True)
+    for step_data in step_datas:
+        for staged in staged_files(step_data):
+            discard(staged)
+    draft.delete()
+
+
+def purge_expired_drafts():
+    """Deletes every expired draft and returns how many were removed."""
+    expired = RegistrationDraft.objects.filter(expires_at__lte=timezone.now())
+    count = 0
+    for draft in expired.iterator():
+        discard_draft(draft)
+        count += 1
+    return count
@@ -0,0 +1,153 @@
+from dataclasses import dataclass
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import status
+
+from Atmayantra.response_cache import bump_doctor_version, bump_list_version
+from doctor_bank_details.models import DoctorBankDetails
+from doctor_certification.models import DoctorCertification
+from doctor_certification.tasks import file_check_job
+from doctor_documents.models import DoctorDocument
+from doctor_documents.tasks import processing_job
+from doctor_personal_details.changes import bulk_record_changes
+from doctor_personal_details.models import DoctorChange, DoctorPersonalDetails
+from filestore.images import GRAPHIC, PHOTO
+from filestore.staging import is_staged, promote
+from filestore.storage import blob_columns, store_upload
+from filestore.tasks import derivatives_job
+from jobs.queue import enqueue_many
+from .drafts import Step, discard_draft, staged_files
+
+
+class RegistrationError(Exception):
+    """Raised when a draft cannot be turned into a doctor; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST, data=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.data = data
+
+
+@dataclass
+class Registration:
+    """The rows written by `finalize_registration`, all already in memory."""
+    doctor: DoctorPersonalDetails
+    certification: DoctorCertification
+    documents: list
+    bank_details: DoctorBankDetails
+
+
+def _single_step(steps, step):
+    matches = [s.data for s in steps if s.step == step]
+    if not matches:
+        raise RegistrationError(f"Previous steps must be completed first: {Step(step).label.lower()}.")
+    return dict(matches[0])
+
+
+def _validate(steps):
+    """Checks every step before anything is written; returns the personal, certification and document data."""
+    personal = _single_step(steps, Step.PERSONAL_DETAILS)
+    certification = _single_step(steps, Step.CERTIFICATION)
+    documents = [dict(s.data) for s in steps if s.step == Step.DOCUMENT]
+
+    errors = {}
+    if any(not document.get('file') for document in documents):
+        errors['documents'] = ["Every document must have a file."]
+    missing = [staged['name'] for data in (personal, certification, *documents) for staged in staged_files(data) if not is_staged(staged)]
+    if missing:
+        errors['files'] = [f"Uploaded files expired before registration was completed: {', '.join(missing)}. Please upload them again."]
+
+    taken = DoctorPersonalDetails.objects.filter(
+        Q(contact_number=personal.get('contact_number')) | Q(email=personal.get('email'))
+    ).values_list('contact_number', 'email')
+    for contact_number, email in taken:
+        if contact_number == personal.get('contact_number'):
+            errors['contact_number'] = ["A doctor with this contact number already exists."]
+        if email == personal.get('email'):
+            errors['email'] = ["A doctor with this email already exists."]
+
+    if errors:
+        raise RegistrationError("The registration cannot be completed.", data=errors)
+    return personal, certification, documents
+
+
+def finalize_registration(draft, bank_details_data):
+    """
+    Turns a registration draft and the validated bank details into a doctor.
+
+    All steps are checked before anything is written. Staged files are then
+    copied into the blob store outside the transaction, since identical
+    blobs are shared and an unused one is harmless. The transaction itself
+    is a fixed number of queries however many documents there are: each
+    table gets one `bulk_create`, the change log one more, and the
+    post-processing jobs one. `bulk_create` sends no signals, so the change
+    log, the doctor's cache version and the list versions are written here.
+
+    Deletes the draft with its staged files and returns a `Registration`.
+    Raises `RegistrationError`.
+    """
+    steps = list(draft.steps.all())
+    personal, certification_data, documents_data = _validate(steps)
+    bank_details_data = dict(bank_details_data)
+    bank_details_data.pop('confirm_account_number', None)
+    bank_details_data.pop('doctor', None)
+
+    staged_photo = personal.pop('profile_photo', None)
+    photo_blob = promote(staged_photo) if staged_photo else None
+    personal.update(blob_columns('profile_photo', photo_blob))
+
+    certification_data.pop('doctor', None)
+    for slot in DoctorCertification.FILE_SLOTS:
+        staged_file = certification_data.pop(slot, None)
+        certification_data.update(blob_columns(slot, promote(staged_file) if staged_file else None))
+        certification_data[f'{slot}_filename'] = staged_file['name'] if staged_file else None
+
+    documents = []
+    for doc_data in documents_data:
+        staged_file = doc_data.pop('file')
+        doc_data.pop('doctor', None)
+        blob = promote(staged_file)
+        documents.append(DoctorDocument(
+            **doc_data,
+            filename=staged_file['name'],
+            content_type=staged_file['content_type'],
+            file_key=blob.key,
+            file_size=blob.size,
+            file_sha256=blob.sha256,
+        ))
+
+    qr_code_file = bank_details_data.pop('bank_qr_code_file', None)
+    qr_code_blob = store_upload(qr_code_file) if qr_code_file else None
+    bank_details_data.update(blob_columns('bank_qr_code', qr_code_blob))
+
+    try:
+        with transaction.atomic():
+            [doctor] = DoctorPersonalDetails.objects.bulk_create([DoctorPersonalDetails(**personal)])
+            [certification] = DoctorCertification.objects.bulk_create([DoctorCertification(doctor=doctor, **certification_data)])
+            for document in documents:
+                document.doctor = doctor
+            documents = DoctorDocument.objects.bulk_create(documents)
+            [bank_details] = DoctorBankDetails.objects.bulk_create([DoctorBankDetails(doctor=doctor, **bank_details_data)])
+
+            contact_number = doctor.contact_number
+            bulk_record_changes(
+                [(DoctorChange.DOCTOR, doctor, contact_number), (DoctorChange.CERTIFICATION, certification, contact_number)]
+                + [(DoctorChange.DOCUMENT, document, contact_number) for document in documents]
+                + [(DoctorChange.BANK_DETAILS, bank_details, contact_number)]
+            )
+            enqueue_many(
+                [file_check_job(certification)]
+                + [processing_job(document) for document in documents]
+                + [derivatives_job(blob, kind) for blob, kind in ((photo_blob, PHOTO), (qr_code_blob, GRAPHIC)) if blob]
+            )
+    except IntegrityError:
+        # Registered concurrently under the same contact number or email.
+        raise RegistrationError("A doctor with this contact number or email already exists.", status_code=status.HTTP_409_CONFLICT)
+
+    bump_doctor_version(contact_number)
+    for model in (DoctorPersonalDetails, DoctorCertification, DoctorDocument, DoctorBankDetails):
+        bump_list_version(model)
+    discard_draft(draft, steps)
+    return Registration(doctor, certification, documents, bank_details)
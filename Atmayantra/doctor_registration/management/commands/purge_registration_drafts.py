@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from doctor_registration.drafts import purge_expired_drafts
+
+
+class Command(BaseCommand):
+    help = "Deletes expired doctor registration drafts and the uploads they staged."
+
+    def handle(self, *args, **options):
+        removed = purge_expired_drafts()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired registration draft(s)."))
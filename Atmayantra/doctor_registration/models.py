@@ -0,0 +1,35 @@
+import uuid
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+class RegistrationDraft(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Registration draft {self.id}"
+
+class RegistrationDraftStep(models.Model):
+    class Step(models.TextChoices):
+        PERSONAL_DETAILS = 'personal_details', 'Personal details'
+        CERTIFICATION = 'certification', 'Certification'
+        DOCUMENT = 'document', 'Document'
+
+    draft = models.ForeignKey(RegistrationDraft, on_delete=models.CASCADE, related_name='steps')
+    step = models.CharField(max_length=20, choices=Step.choices)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # A draft holds one personal details and one certification step, but any number of documents.
+            models.UniqueConstraint(
+                fields=['draft', 'step'],
+                condition=~models.Q(step='document'),
+                name='unique_single_registration_step',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_step_display()} for draft {self.draft_id}"
@@ -0,0 +1,47 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+from doctor_documents.models import DoctorDocument
+from .models import RegistrationDraft, RegistrationDraftStep
+
+class RegistrationDraftStepSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RegistrationDraftStep
+        fields = ('id', 'step', 'data', 'updated_at')
+
+class RegistrationDraftSerializer(serializers.ModelSerializer):
+    steps = RegistrationDraftStepSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = RegistrationDraft
+        fields = ('id', 'created_at', 'expires_at', 'steps')
+
+class RegisteredDocumentSerializer(serializers.ModelSerializer):
+    file_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DoctorDocument
+        fields = ('id', 'doc_type', 'side', 'filename', 'content_type', 'file_size', 'processing_status', 'file_url')
+
+    def get_file_url(self, obj):
+        return reverse('document-file', kwargs={'contact_number': obj.doctor_id, 'pk': obj.pk}, request=self.context.get('request'))
+
+class RegistrationSerializer(serializers.Serializer):
+    """
+    Lean read model of a completed registration.
+
+    It is rendered from the rows `finalize_registration` just wrote, without
+    querying them again; the full profile is at the doctor's profile endpoint.
+    """
+    contact_number = serializers.CharField(source='doctor.contact_number')
+    full_name = serializers.CharField(source='doctor.full_name')
+    email = serializers.EmailField(source='doctor.email')
+    has_profile_photo = serializers.SerializerMethodField()
+    certification_status = serializers.CharField(source='certification.processing_status')
+    documents = RegisteredDocumentSerializer(many=True)
+    has_bank_qr_code = serializers.SerializerMethodField()
+
+    def get_has_profile_photo(self, obj):
+        return obj.doctor.profile_photo_key is not None
+
+    def get_has_bank_qr_code(self, obj):
+        return obj.bank_details.bank_qr_code_key is not None
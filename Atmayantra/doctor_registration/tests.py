@@ -0,0 +1,98 @@
+import tempfile
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from doctor_documents.models import DoctorDocument
+from doctor_personal_details.models import DoctorChange, DoctorPersonalDetails
+from filestore.staging import stage_upload
+from jobs.models import Job
+from .models import RegistrationDraft, RegistrationDraftStep
+
+Step = RegistrationDraftStep.Step
+
+PDF = b'%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n%%EOF\n'
+BANK_DETAILS = {
+    'account_holder_name': 'Asha',
+    'account_number': '1234567890',
+    'confirm_account_number': '1234567890',
+    'ifsc_code': 'ABCD0123456',
+    'account_type': 'savings',
+}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FinalizeRegistrationTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage = override_settings(
+            BLOB_STORAGE={'BACKEND': 'filestore.storage.LocalBlobStore', 'OPTIONS': {'location': f'{directory.name}/blobs'}},
+            UPLOAD_STAGING_ROOT=f'{directory.name}/staging',
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.client = APIClient()
+
+    def create_draft(self, contact_number, documents):
+        draft = RegistrationDraft.objects.create(expires_at=timezone.now() + timedelta(days=1))
+        RegistrationDraftStep.objects.create(draft=draft, step=Step.PERSONAL_DETAILS, data={
+            'contact_number': contact_number, 'full_name': 'Asha', 'specialization': 'Yoga', 'experience': 5,
+            'hospital': 'City Hospital', 'gender': 'F', 'email': f'{contact_number}@example.com', 'address': 'Address',
+            'profile_photo': None,
+        })
+        RegistrationDraftStep.objects.create(draft=draft, step=Step.CERTIFICATION, data={
+            'highest_degree': 'MD', 'year_of_graduation': '2010', 'year_of_experience': 10, 'yoga_certified': 'yes',
+            'certification_type': 'Board', 'issuing_authority': 'Council', 'specialization': 'Yoga',
+            'license_number': 'L-1', 'license': stage_upload(SimpleUploadedFile('license.pdf', PDF, content_type='application/pdf')),
+        })
+        RegistrationDraftStep.objects.bulk_create(
+            RegistrationDraftStep(draft=draft, step=Step.DOCUMENT, data={
+                'doc_type': 'degree', 'side': None,
+                'file': stage_upload(SimpleUploadedFile(f'degree-{number}.pdf', PDF + str(number).encode(), content_type='application/pdf')),
+            })
+            for number in range(documents)
+        )
+        return draft
+
+    def finalize(self, draft):
+        return self.client.post(f'/doctors_bankdetails/doctor-bank/?draft_id={draft.pk}', BANK_DETAILS, format='multipart')
+
+    def test_query_count_does_not_grow_with_documents(self):
+        for number, documents in enumerate((1, 50)):
+            with self.subTest(documents=documents):
+                draft = self.create_draft(f'900000000{number}', documents)
+                with self.assertNumQueries(14):
+                    response = self.finalize(draft)
+                self.assertEqual(response.status_code, 201, response.json())
+
+                data = response.json()['data']
+                self.assertEqual(len(data['documents']), documents)
+                self.assertEqual(data['documents'][0]['processing_status'], 'pending')
+                self.assertEqual(DoctorDocument.objects.filter(doctor_id=data['contact_number']).count(), documents)
+                self.assertEqual(DoctorChange.objects.filter(contact_number=data['contact_number'], resource=DoctorChange.DOCUMENT).count(), documents)
+                self.assertFalse(RegistrationDraft.objects.filter(pk=draft.pk).exists())
+
+        # One check per certification and document.
+        self.assertEqual(Job.objects.count(), 2 + 51)
+
+    def test_steps_are_validated_before_anything_is_written(self):
+        draft = self.create_draft('9000000001', 1)
+        DoctorPersonalDetails.objects.create(
+            contact_number='9000000001', full_name='Existing', specialization='Yoga', experience=1,
+            hospital='City Hospital', gender='F', email='other@example.com', address='Address',
+        )
+        step = draft.steps.get(step=Step.DOCUMENT)
+        step.data['file']['token'] = '0' * 32
+        step.save()
+
+        response = self.finalize(draft)
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['data']
+        self.assertEqual(set(errors), {'contact_number', 'files'})
+        self.assertIn('degree-0.pdf', errors['files'][0])
+        self.assertFalse(DoctorDocument.objects.exists())
+        self.assertTrue(RegistrationDraft.objects.filter(pk=draft.pk).exists())
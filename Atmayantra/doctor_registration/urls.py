@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import RegistrationDraftViewSet
+
+router = DefaultRouter()
+router.register(r'drafts', RegistrationDraftViewSet, basename='registration-draft')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
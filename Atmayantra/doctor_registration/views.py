@@ -0,0 +1,33 @@
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from .drafts import SESSION_KEY
+from .models import RegistrationDraft
+from .serializers import RegistrationDraftSerializer
+from Atmayantra.utils import api_response
+
+class RegistrationDraftViewSet(viewsets.GenericViewSet):
+    """Lets a client inspect and resume an unfinished doctor registration by draft id."""
+    queryset = RegistrationDraft.objects.prefetch_related('steps')
+    serializer_class = RegistrationDraftSerializer
+
+    def get_object(self):
+        try:
+            draft = self.get_queryset().filter(pk=self.kwargs['pk'], expires_at__gt=timezone.now()).first()
+        except ValidationError:
+            draft = None
+        if draft is None:
+            raise Http404("Registration draft not found or expired.")
+        return draft
+
+    def retrieve(self, request, pk=None):
+        draft = self.get_object()
+        return api_response(True, "Registration draft retrieved successfully.", self.get_serializer(draft).data)
+
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        draft = self.get_object()
+        request.session[SESSION_KEY] = str(draft.id)
+        return api_response(True, "Registration resumed. Continue with the next incomplete step.", self.get_serializer(draft).data)
@@ -0,0 +1,214 @@
+import mimetypes
+import re
+
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_etags, parse_http_date_safe, quote_etag
+
+from .storage import CHUNK_SIZE, get_blob_store, open_blob
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _guess_content_type(content_type, filename):
+    if content_type:
+        return content_type
+    if filename:
+        guessed, _ = mimetypes.guess_type(filename)
+        if guessed:
+            return guessed
+    return 'application/octet-stream'
+
+
+def _parse_range(header, size):
+    """
+    Parses a single `bytes=` range into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored (absent, malformed or
+    multi-range) and raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def _range_applies(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return etag is not None and not if_range.startswith('W/') and parse_etags(if_range) == [etag]
+    if_range_time = parse_http_date_safe(if_range)
+    return last_modified is not None and if_range_time is not None and int(last_modified) <= if_range_time
+
+
+def _iter_range(file_handle, start, length, chunk_size=CHUNK_SIZE):
+    try:
+        file_handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file_handle.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_handle.close()
+
+
+async def _aiter_range(file_handle, start, length, chunk_size=CHUNK_SIZE):
+    # Each read runs in a thread, so a slow disk never blocks the event loop,
+    # and the next chunk is only read once the client has taken the previous one.
+    read = sync_to_async(file_handle.read, thread_sensitive=False)
+    try:
+        await sync_to_async(file_handle.seek, thread_sensitive=False)(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_handle.close()
+
+
+def serve_blob(request, key=None, sha256=None, content_type=None, filename=None, legacy_base64=None, legacy_etag=None, legacy_modified=None, as_attachment=False, asynchronous=False):
+    """
+    Streams a stored file back to the client.
+
+    Emits ETag/Last-Modified, answers If-None-Match/If-Modified-Since with 304
+    before the file is opened, and serves a single `Range` as a 206 response.
+    Rows still holding a legacy base64 body are decoded in memory; their
+    validators come from the row, so a 304 never decodes the body.
+
+    Args:
+        request: The incoming request.
+        key (str, optional): Blob store key of the file.
+        sha256 (str, optional): Stored SHA-256 digest, used as the ETag.
+        content_type (str, optional): Stored content type; guessed from the filename if empty.
+        filename (str, optional): Name sent in the Content-Disposition header.
+        legacy_base64 (str, optional): Base64 body for rows not yet moved to the blob store.
+        legacy_etag (str, optional): ETag of the legacy body, derived from the row's primary key and version.
+        legacy_modified (datetime, optional): Last modification of the row holding the legacy body.
+        as_attachment (bool): Whether the client should download rather than display the file.
+        asynchronous (bool): Stream the body through an async iterator; see `aserve_blob`.
+
+    Returns:
+        HttpResponse: A 200, 206, 304, 412 or 416 response.
+    """
+    if key:
+        store = get_blob_store()
+        last_modified = int(store.modified_time(key))
+        etag = quote_etag(sha256 or key)
+    else:
+        last_modified = int(legacy_modified.timestamp()) if legacy_modified else None
+        etag = quote_etag(legacy_etag) if legacy_etag else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified.headers.setdefault('Cache-Control', 'private, no-cache')
+        return not_modified
+
+    if key:
+        file_handle = store.open(key)
+        size = store.size(key)
+    else:
+        file_handle = open_blob(legacy_base64=legacy_base64)
+        size = file_handle.getbuffer().nbytes
+    content_type = _guess_content_type(content_type, filename)
+
+    byte_range = None
+    if request.method in ('GET', 'HEAD') and _range_applies(request, etag, last_modified):
+        try:
+            byte_range = _parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            file_handle.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        iter_range = _aiter_range if asynchronous else _iter_range
+        response = StreamingHttpResponse(iter_range(file_handle, start, length), status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    elif asynchronous:
+        response = StreamingHttpResponse(_aiter_range(file_handle, 0, size), content_type=content_type)
+        response['Content-Length'] = str(size)
+    else:
+        response = FileResponse(file_handle, content_type=content_type)
+        response.block_size = CHUNK_SIZE
+        response['Content-Length'] = str(size)
+
+    # Blob files are named after their hash, so never let FileResponse derive a name.
+    disposition = content_disposition_header(as_attachment, filename) if filename else None
+    if disposition:
+        response['Content-Disposition'] = disposition
+    elif 'Content-Disposition' in response:
+        del response['Content-Disposition']
+
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def legacy_etag(prefix, pk, version):
+    """ETag of a legacy base64 body, which changes with the version of the row holding it."""
+    return f'{prefix}.{pk}.{version}'
+
+
+def serve_blob_field(request, instance, prefix, filename=None, as_attachment=False):
+    """
+    Serves a file stored in the `<prefix>_key/_content_type/_sha256` columns of a model.
+
+    The legacy `<prefix>` base64 column is only read when the row has no blob
+    key yet, so callers can `defer()` it.
+    """
+    key = getattr(instance, f'{prefix}_key')
+    legacy = {} if key else {
+        'legacy_base64': getattr(instance, prefix),
+        'legacy_etag': legacy_etag(prefix, instance.pk, instance.version),
+        'legacy_modified': instance.updated_at,
+    }
+    return serve_blob(
+        request,
+        key=key,
+        sha256=getattr(instance, f'{prefix}_sha256'),
+        content_type=getattr(instance, f'{prefix}_content_type'),
+        filename=filename,
+        as_attachment=as_attachment,
+        **legacy,
+    )
+
+
+async def aserve_blob(request, **kwargs):
+    """
+    `serve_blob` for async views.
+
+    Checking and opening the file happen in a thread. The body is an async
+    iterator, so under ASGI a slow client holds a suspended coroutine rather
+    than a worker thread while it downloads.
+    """
+    return await sync_to_async(serve_blob, thread_sensitive=False)(request, asynchronous=True, **kwargs)
+
@@ -0,0 +1,97 @@
+import io
+
+from django.db import IntegrityError, transaction
+from django.utils.cache import patch_vary_headers
+from PIL import Image, ImageOps
+
+from .downloads import serve_blob, serve_blob_field
+from .models import ImageDerivative
+from .storage import get_blob_store
+
+DERIVATIVE_SIZES = {'64': 64, '256': 256}
+ORIGINAL_SIZE = 'orig'
+IMAGE_SIZES = (*DERIVATIVE_SIZES, ORIGINAL_SIZE)
+
+# Photos are re-encoded lossily; QR codes must stay sharp enough to scan.
+PHOTO = 'photo'
+GRAPHIC = 'graphic'
+ENCODINGS = {
+    (PHOTO, 'webp'): ('WEBP', {'quality': 80, 'method': 4}),
+    (PHOTO, 'jpeg'): ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    (GRAPHIC, 'webp'): ('WEBP', {'lossless': True}),
+    (GRAPHIC, 'png'): ('PNG', {'optimize': True}),
+}
+FALLBACK_FORMATS = {PHOTO: 'jpeg', GRAPHIC: 'png'}
+
+
+def negotiate_format(request, kind):
+    """Picks WebP for clients that accept it and JPEG/PNG otherwise."""
+    if 'image/webp' in request.META.get('HTTP_ACCEPT', ''):
+        return 'webp'
+    return FALLBACK_FORMATS[kind]
+
+
+def _render(source, size, kind, image_format):
+    pil_format, options = ENCODINGS[(kind, image_format)]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        if pil_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGBA')
+        out = io.BytesIO()
+        image.save(out, pil_format, **options)
+    out.seek(0)
+    return out
+
+
+def get_derivative(source_key, source_sha256, size, kind, image_format):
+    """
+    Returns the `ImageDerivative` of a stored image, rendering it on first use.
+
+    Derivatives are keyed by the source's SHA-256, so replacing an image
+    yields new derivatives and the old ones are simply never looked up again.
+    """
+    lookup = {'source_sha256': source_sha256, 'size': size, 'format': image_format}
+    derivative = ImageDerivative.objects.filter(**lookup).first()
+    if derivative is not None:
+        return derivative
+
+    store = get_blob_store()
+    with store.open(source_key) as source:
+        rendered = _render(source, size, kind, image_format)
+    blob = store.save(rendered, content_type=f'image/{image_format}')
+    try:
+        with transaction.atomic():
+            return ImageDerivative.objects.create(key=blob.key, byte_size=blob.size, **lookup)
+    except IntegrityError:
+        # A concurrent request rendered the same derivative first.
+        return ImageDerivative.objects.get(**lookup)
+
+
+def serve_image_field(request, instance, prefix, kind=PHOTO):
+    """
+    Serves an image column at the size requested with `?size=64|256|orig`.
+
+    The original upload is served when no size is given, for legacy rows not
+    yet moved to the blob store, and for files Pillow cannot decode. Callers
+    validate `size` against `IMAGE_SIZES` first.
+    """
+    size = request.query_params.get('size', ORIGINAL_SIZE)
+    source_key = getattr(instance, f'{prefix}_key')
+    if size == ORIGINAL_SIZE or not source_key:
+        return serve_blob_field(request, instance, prefix)
+
+    source_sha256 = getattr(instance, f'{prefix}_sha256') or source_key
+    image_format = negotiate_format(request, kind)
+    try:
+        derivative = get_derivative(source_key, source_sha256, DERIVATIVE_SIZES[size], kind, image_format)
+    except (OSError, Image.DecompressionBombError):
+        return serve_blob_field(request, instance, prefix)
+    response = serve_blob(request, key=derivative.key, sha256=derivative.key, content_type=f'image/{image_format}')
+    patch_vary_headers(response, ('Accept',))
+    return response
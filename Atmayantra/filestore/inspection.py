@@ -0,0 +1,67 @@
+import re
+
+from PIL import Image
+
+from .storage import get_blob_store, iter_chunks
+from .upload_handlers import SNIFF_LENGTH, normalize_content_type, sniff_content_type
+
+# Page objects of a PDF, but not the /Pages tree nodes. Pages kept inside
+# compressed object streams are not visible to this scan.
+PDF_PAGE_RE = re.compile(rb'/Type\s{0,8}/Page(?![A-Za-z])')
+# Longer than any PDF_PAGE_RE match, so one split across two chunks is still found.
+PDF_PAGE_OVERLAP = 32
+# Writers may append a few bytes after the end-of-file marker.
+PDF_TRAILER_LENGTH = 1024
+
+
+class InvalidFile(Exception):
+    pass
+
+
+def _inspect_pdf(stream):
+    pages = 0
+    buffer = tail = b''
+    for chunk in iter_chunks(stream):
+        buffer += chunk
+        tail = (tail + chunk)[-PDF_TRAILER_LENGTH:]
+        cut = max(len(buffer) - PDF_PAGE_OVERLAP, 0)
+        pages += sum(1 for match in PDF_PAGE_RE.finditer(buffer) if match.start() < cut)
+        buffer = buffer[cut:]
+    pages += sum(1 for _ in PDF_PAGE_RE.finditer(buffer))
+
+    if b'%%EOF' not in tail:
+        raise InvalidFile("The PDF is truncated.")
+    return pages or None
+
+
+def _inspect_image(stream):
+    try:
+        with Image.open(stream) as image:
+            # Decodes every pixel, which catches truncated and corrupt files.
+            image.load()
+    except Exception as e:
+        raise InvalidFile(f"The image cannot be decoded: {e}")
+    return None
+
+
+def inspect_blob(key, content_type):
+    """
+    Reads a stored upload end to end and checks it is a well-formed file of `content_type`.
+
+    Returns the page count of a PDF, or None for images and PDFs whose pages
+    cannot be counted without decompressing them. Raises `InvalidFile`.
+    Uploads are only checked on their leading bytes on the request path; this
+    is the full check, run from a background job.
+    """
+    content_type = normalize_content_type(content_type)
+    with get_blob_store().open(key) as stream:
+        actual = sniff_content_type(stream.read(SNIFF_LENGTH))
+        if actual is None:
+            raise InvalidFile("The file is not a PDF, JPEG or PNG.")
+        # Files moved from legacy base64 columns may have no declared type.
+        if content_type and actual != content_type:
+            raise InvalidFile(f"The file content does not match its declared type {content_type}.")
+        stream.seek(0)
+        if actual == 'application/pdf':
+            return _inspect_pdf(stream)
+        return _inspect_image(stream)
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SEED = '''
+import io, os
+from doctor_documents.models import DoctorDocument
+from doctor_personal_details.models import DoctorPersonalDetails
+from filestore.storage import get_blob_store
+doctor = DoctorPersonalDetails.objects.create(
+    contact_number='9000000001', full_name='Benchmark', specialization='Yoga', experience=5,
+    hospital='City Hospital', gender='F', email='benchmark@example.com', address='Address',
+)
+blob = get_blob_store().save(io.BytesIO(os.urandom({size})))
+document = DoctorDocument.objects.create(
+    doctor=doctor, doc_type='degree', filename='degree.pdf', content_type='application/pdf',
+    file_key=blob.key, file_size=blob.size, file_sha256=blob.sha256,
+)
+print(document.pk)
+'''
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares how the WSGI and ASGI deployments (see gunicorn.conf.py) serve slow "
+        "clients. Each mode is started with gunicorn against a throwaway SQLite database "
+        "and blob store; slow clients download a document while a fast client keeps "
+        "requesting a one-byte range of it. Runs with DEBUG on so the server accepts plain HTTP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', default=['wsgi', 'asgi'], choices=['wsgi', 'asgi'])
+        parser.add_argument('--workers', type=int, default=2, help="Gunicorn workers per mode.")
+        parser.add_argument('--clients', type=int, default=16, help="Concurrent slow downloads.")
+        parser.add_argument('--size-mb', type=float, default=8, help="Size of the downloaded file.")
+        parser.add_argument('--rate-kb', type=int, default=2048, help="Read rate of each slow client, in KiB/s.")
+        parser.add_argument('--probe-interval', type=float, default=0.1, help="Seconds between fast requests.")
+        parser.add_argument('--timeout', type=float, default=120, help="Give up on a request after this many seconds.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        with tempfile.TemporaryDirectory() as directory:
+            self.env = {
+                **os.environ,
+                'DATABASE_URL': f"sqlite:///{Path(directory) / 'benchmark.sqlite3'}",
+                'BLOB_STORAGE_ROOT': str(Path(directory) / 'blobs'),
+                'CACHE_LOCATION': str(Path(directory) / 'cache'),
+                'DEBUG': 'True',
+            }
+            self.env.pop('ASYNC_VIEWS', None)
+            self._manage('migrate', '--noinput')
+            document_id = self._manage('shell', '--no-imports', '-c', SEED.format(size=int(options['size_mb'] * 1024 * 1024))).strip()
+            self.path = f'/doctors_Documents/documents/9000000001/{document_id}/file/'
+
+            results = {mode: self._run_mode(mode) for mode in options['modes']}
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"{options['clients']} clients reading {options['size_mb']:g} MiB at {options['rate_kb']} KiB/s, "
+            f"{options['workers']} workers"
+        )
+        header = f"{'mode':<6}{'done':>6}{'wall s':>9}{'MiB/s':>8}{'probes':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'failed':>8}"
+        self.stdout.write(header)
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<6}{result['completed']:>6}{result['wall']:>9.2f}{result['throughput']:>8.2f}"
+                f"{result['probes']:>8}{self._ms(result['p50']):>9}{self._ms(result['p95']):>9}{self._ms(result['max']):>9}"
+                f"{result['probe_failures']:>8}"
+            )
+
+    @staticmethod
+    def _ms(seconds):
+        return '-' if seconds is None else f'{seconds * 1000:.0f}'
+
+    def _manage(self, *args):
+        result = subprocess.run(
+            [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), *args],
+            env=self.env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr)
+        return result.stdout
+
+    def _run_mode(self, mode):
+        port = _free_port()
+        env = {**self.env, 'SERVER_MODE': mode, 'PORT': str(port), 'WEB_CONCURRENCY': str(self.options['workers'])}
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        try:
+            self._wait_for(port, server)
+            self.stdout.write(f"{mode}: running {self.options['clients']} slow clients...")
+            return asyncio.run(self._load(port))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def _wait_for(self, port, server):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"The server exited: {server.stderr.read()}")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("The server did not start within 30 seconds.")
+
+    async def _request(self, port, headers='', read_size=None, rate=None):
+        """Sends a GET for the document and reads the whole response; returns the bytes received."""
+        sock = socket.socket()
+        if rate:
+            # A small receive buffer makes the server's writes wait for the slow reader.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+        reader, writer = await asyncio.open_connection(sock=sock)
+        try:
+            writer.write(f'GET {self.path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n{headers}\r\n'.encode())
+            await writer.drain()
+            received = 0
+            while True:
+                chunk = await reader.read(read_size or 64 * 1024)
+                if not chunk:
+                    return received
+                received += len(chunk)
+                if rate:
+                    await asyncio.sleep(len(chunk) / rate)
+        finally:
+            writer.close()
+
+    async def _load(self, port):
+        options = self.options
+        rate = options['rate_kb'] * 1024
+        expected = int(options['size_mb'] * 1024 * 1024)
+        timeout = options['timeout']
+
+        async def slow_client():
+            received = await asyncio.wait_for(self._request(port, read_size=16 * 1024, rate=rate), timeout)
+            return received >= expected
+
+        latencies, failures = [], 0
+        started = time.monotonic()
+        downloads = asyncio.gather(*(slow_client() for _ in range(options['clients'])), return_exceptions=True)
+        # Let the slow clients take the workers before probing.
+        await asyncio.sleep(0.5)
+        while not downloads.done():
+            probe_started = time.monotonic()
+            try:
+                await asyncio.wait_for(self._request(port, headers='Range: bytes=0-0\r\n'), timeout)
+                latencies.append(time.monotonic() - probe_started)
+            except (asyncio.TimeoutError, OSError):
+                failures += 1
+            await asyncio.sleep(options['probe_interval'])
+        outcomes = await downloads
+        wall = time.monotonic() - started
+
+        completed = sum(1 for outcome in outcomes if outcome is True)
+        return {
+            'completed': completed,
+            'wall': wall,
+            'throughput': completed * expected / wall / (1024 * 1024),
+            'probes': len(latencies),
+            'p50': statistics.median(latencies) if latencies else None,
+            'p95': _percentile(latencies, 95),
+            'max': max(latencies) if latencies else None,
+            'probe_failures': failures,
+        }
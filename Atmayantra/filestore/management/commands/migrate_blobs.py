@@ -0,0 +1,180 @@
+import base64
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+
+from Atmayantra.response_cache import bump_doctor_version
+
+from doctor_certification.models import DoctorCertification
+from filestore.storage import get_blob_store
+from filestore.upload_handlers import sniff_content_type
+
+# (model, legacy base64 column, prefix of the blob metadata columns, path to the doctor's contact number)
+TARGETS = (
+    ('doctor_documents.DoctorDocument', 'file_data', 'file', 'doctor_id'),
+    ('doctor_personal_details.DoctorPersonalDetails', 'profile_photo', 'profile_photo', 'contact_number'),
+    ('doctor_bank_details.DoctorBankDetails', 'bank_qr_code', 'bank_qr_code', 'doctor_id'),
+    *(('doctor_certification.DoctorCertification', slot, slot, 'doctor__contact_number') for slot in DoctorCertification.FILE_SLOTS),
+)
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _store_encoded(encoded):
+    """Decodes one base64 body and writes it to the blob store. Runs in a worker process."""
+    data = base64.b64decode(encoded)
+    blob = get_blob_store().save(io.BytesIO(data))
+    return blob.key, blob.size, blob.sha256, sniff_content_type(data[:8])
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves legacy base64 file columns into the blob store in primary-key batches. "
+        "Progress is checkpointed so an interrupted run can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Rows read and updated per batch.")
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help="Decoder processes; 0 decodes in this process.")
+        parser.add_argument('--checkpoint', default=os.path.join(settings.MEDIA_ROOT, 'migrate_blobs.checkpoint.json'), help="File recording the last migrated primary key of each column.")
+        parser.add_argument('--reset', action='store_true', help="Ignore the checkpoint and rescan every row.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows and bytes would be moved.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self._report()
+            return
+
+        checkpoint_path = options['checkpoint']
+        checkpoint = {} if options['reset'] else self._load_checkpoint(checkpoint_path)
+        workers = options['workers']
+
+        # Worker processes must not inherit open database connections.
+        connections.close_all()
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 0 else None
+        totals = {'rows': 0, 'bytes': 0, 'failed': 0}
+        try:
+            for model_label, legacy, prefix, contact_path in TARGETS:
+                name = f'{model_label}.{legacy}'
+                last_pk = self._migrate(model_label, legacy, prefix, contact_path, checkpoint.get(name), pool, workers, options['batch_size'], totals,
+                                        lambda pk: self._save_checkpoint(checkpoint_path, checkpoint, name, pk))
+                self.stdout.write(f"{name}: done (last pk {last_pk}).")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {totals['rows']} file(s) and reclaimed {totals['bytes']} bytes of base64; {totals['failed']} row(s) failed."
+        ))
+
+    def _pending(self, model_label, legacy, prefix):
+        model = apps.get_model(model_label)
+        return model.objects.filter(**{f'{legacy}__isnull': False, f'{prefix}_key__isnull': True}).exclude(**{legacy: ''})
+
+    def _migrate(self, model_label, legacy, prefix, contact_path, last_pk, pool, workers, batch_size, totals, on_batch):
+        model = apps.get_model(model_label)
+        try:
+            model._meta.get_field(f'{prefix}_content_type')
+            has_content_type = True
+        except FieldDoesNotExist:
+            has_content_type = False
+
+        while True:
+            queryset = self._pending(model_label, legacy, prefix).order_by('pk')
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            rows = queryset.values_list('pk', contact_path, legacy)[:batch_size].iterator(chunk_size=batch_size)
+
+            results = []
+            in_flight = deque()
+            batch_last_pk = None
+            contact_numbers = {}
+            for pk, contact_number, encoded in rows:
+                batch_last_pk = pk
+                contact_numbers[pk] = contact_number
+                if pool is None:
+                    results.append(self._run_inline(pk, encoded))
+                    continue
+                in_flight.append((pk, len(encoded), pool.submit(_store_encoded, encoded)))
+                # Keep only a few base64 bodies in memory at a time.
+                if len(in_flight) >= workers * 2:
+                    results.append(self._collect(*in_flight.popleft()))
+            while in_flight:
+                results.append(self._collect(*in_flight.popleft()))
+
+            if batch_last_pk is None:
+                return last_pk
+
+            with transaction.atomic():
+                for pk, encoded_size, stored in results:
+                    if stored is None:
+                        totals['failed'] += 1
+                        continue
+                    key, size, sha256, content_type = stored
+                    values = {f'{prefix}_key': key, f'{prefix}_size': size, f'{prefix}_sha256': sha256, legacy: None}
+                    if has_content_type:
+                        values[f'{prefix}_content_type'] = content_type
+                    # Skip rows the live API replaced or cleared while this batch was decoding.
+                    updated = model.objects.filter(
+                        pk=pk, **{f'{legacy}__isnull': False, f'{prefix}_key__isnull': True}
+                    ).update(**values)
+                    if updated:
+                        totals['rows'] += 1
+                        totals['bytes'] += encoded_size
+                        # update() sends no signals, so cached doctor payloads are invalidated here.
+                        transaction.on_commit(lambda contact_number=contact_numbers[pk]: bump_doctor_version(contact_number))
+
+            last_pk = batch_last_pk
+            on_batch(last_pk)
+
+    def _run_inline(self, pk, encoded):
+        try:
+            return pk, len(encoded), _store_encoded(encoded)
+        except Exception as e:
+            self.stderr.write(f"pk {pk}: {e}")
+            return pk, len(encoded), None
+
+    def _collect(self, pk, encoded_size, future):
+        try:
+            return pk, encoded_size, future.result()
+        except Exception as e:
+            self.stderr.write(f"pk {pk}: {e}")
+            return pk, encoded_size, None
+
+    def _report(self):
+        total_rows = total_bytes = 0
+        for model_label, legacy, prefix, _ in TARGETS:
+            stats = self._pending(model_label, legacy, prefix).aggregate(rows=Count('pk'), encoded=Sum(Length(legacy)))
+            rows, encoded = stats['rows'], stats['encoded'] or 0
+            total_rows += rows
+            total_bytes += encoded
+            self.stdout.write(f"{model_label}.{legacy}: {rows} row(s), {encoded} bytes of base64 (~{encoded * 3 // 4} bytes of file data)")
+        self.stdout.write(self.style.SUCCESS(f"Dry run: {total_rows} file(s) would be moved, reclaiming {total_bytes} bytes."))
+
+    def _load_checkpoint(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_checkpoint(self, path, checkpoint, name, pk):
+        checkpoint[name] = pk
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from filestore.staging import purge_expired
+from filestore.uploads import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = "Deletes staged registration uploads and expired chunked upload sessions that were never committed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-hours', type=int, default=24, help="Age after which a staged upload is considered abandoned.")
+
+    def handle(self, *args, **options):
+        removed = purge_expired(options['max_age_hours'] * 3600)
+        sessions = purge_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} staged upload(s) and {sessions} upload session(s)."))
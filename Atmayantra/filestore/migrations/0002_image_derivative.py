@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filestore', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_sha256', models.CharField(max_length=64)),
+                ('size', models.PositiveSmallIntegerField()),
+                ('format', models.CharField(max_length=10)),
+                ('key', models.CharField(max_length=255)),
+                ('byte_size', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source_sha256', 'size', 'format'), name='unique_image_derivative')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filestore', '0002_image_derivative'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='writer_lease_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='writer_token',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+import uuid
+from django.db import models
+
+
+class ProcessingStatus(models.TextChoices):
+    """Where a record's uploaded files are in the background checks run after upload."""
+    PENDING = 'pending', 'Pending'
+    READY = 'ready', 'Ready'
+    FAILED = 'failed', 'Failed'
+
+class UploadSession(models.Model):
+    """A resumable upload that is assembled chunk by chunk in a local temp file."""
+    class Status(models.TextChoices):
+        OPEN = 'open', 'Open'
+        COMMITTED = 'committed', 'Committed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    # Optional SHA-256 of the whole file, checked when the upload is committed.
+    sha256 = models.CharField(max_length=64, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.OPEN)
+    # The request currently writing a chunk at `received`, and until when it may.
+    writer_token = models.UUIDField(null=True, blank=True)
+    writer_lease_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.filename})"
+
+
+class ImageDerivative(models.Model):
+    """A resized, re-encoded copy of a stored image, itself kept in the blob store."""
+    source_sha256 = models.CharField(max_length=64)
+    size = models.PositiveSmallIntegerField()
+    format = models.CharField(max_length=10)
+    key = models.CharField(max_length=255)
+    byte_size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source_sha256', 'size', 'format'], name='unique_image_derivative'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_sha256[:12]} @ {self.size}px {self.format}"
@@ -0,0 +1,41 @@
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+
+def defer_blob_fields(queryset, *fields):
+    """
+    Defers the legacy base64 columns of blob fields and annotates `has_<field>`.
+
+    The presence flag is computed in SQL, so serializers can tell whether a file
+    exists without pulling the column body into Python.
+    """
+    annotations = {
+        f'has_{field}': ExpressionWrapper(
+            Q(**{f'{field}_key__isnull': False}) | (Q(**{f'{field}__isnull': False}) & ~Q(**{field: ''})),
+            output_field=BooleanField(),
+        )
+        for field in fields
+    }
+    return queryset.defer(*fields).annotate(**annotations)
+
+
+def has_blob(instance, field):
+    """Returns whether a blob field holds a file, preferring the `has_<field>` annotation."""
+    flag = getattr(instance, f'has_{field}', None)
+    if flag is not None:
+        return bool(flag)
+    return bool(getattr(instance, f'{field}_key') or getattr(instance, field))
+
+
+def assign_related_blob_flags(instance, *paths):
+    """
+    Copies `has_<relation>__<field>` annotations onto the related objects.
+
+    `defer_blob_fields` can defer blob columns of `select_related` relations,
+    e.g. `certification__license`, but the annotation lands on the root row.
+    This moves it to where `has_blob` looks for it.
+    """
+    for path in paths:
+        relation, field = path.rsplit('__', 1)
+        related = getattr(instance, relation, None)
+        if related is not None:
+            setattr(related, f'has_{field}', getattr(instance, f'has_{path}'))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from rest_framework import serializers
+from .models import UploadSession
+from .upload_handlers import normalize_content_type
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ('id', 'filename', 'content_type', 'size', 'received', 'sha256', 'status', 'expires_at')
+        read_only_fields = ('id', 'received', 'status', 'expires_at')
+
+    def validate_content_type(self, value):
+        content_type = normalize_content_type(value)
+        if content_type not in settings.DOCUMENT_CONTENT_TYPES:
+            raise serializers.ValidationError(f"Unsupported file type. Allowed types: {', '.join(settings.DOCUMENT_CONTENT_TYPES)}.")
+        return content_type
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("File size must be positive.")
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"File size may not exceed {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes.")
+        return value
+
+    def validate_sha256(self, value):
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value.lower())):
+            raise serializers.ValidationError("Must be a hex encoded SHA-256 digest.")
+        return value
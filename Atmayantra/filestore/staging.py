@@ -0,0 +1,84 @@
+import os
+import time
+import uuid
+
+from django.conf import settings
+
+from .storage import get_blob_store, iter_chunks
+
+
+def _staging_root():
+    return os.fspath(settings.UPLOAD_STAGING_ROOT)
+
+
+def _staged_path(token):
+    if len(token) != 32 or not all(c in '0123456789abcdef' for c in token):
+        raise ValueError(f"Invalid staging token: {token!r}")
+    return os.path.join(_staging_root(), token)
+
+
+def stage_upload(uploaded_file):
+    """
+    Spools an upload to the temporary staging area.
+
+    Returns a small JSON-serializable reference that can be kept in the
+    session until the upload is promoted into permanent storage.
+    """
+    os.makedirs(_staging_root(), exist_ok=True)
+    token = uuid.uuid4().hex
+    size = 0
+    with open(_staged_path(token), 'wb') as out:
+        for chunk in iter_chunks(uploaded_file):
+            size += len(chunk)
+            out.write(chunk)
+    return {
+        'token': token,
+        'name': uploaded_file.name,
+        'content_type': getattr(uploaded_file, 'content_type', None),
+        'size': size,
+        'sha256': getattr(uploaded_file, 'sha256', None),
+    }
+
+
+def is_staged(staged):
+    """Tells whether a staged upload is still on disk, i.e. was not purged or discarded."""
+    try:
+        return os.path.isfile(_staged_path(staged['token']))
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def open_staged(staged):
+    return open(_staged_path(staged['token']), 'rb')
+
+
+def promote(staged):
+    """
+    Copies a staged upload into the blob store and returns the stored blob.
+
+    The staged file is kept until `discard` is called, so a finalization that
+    fails and rolls back can be retried.
+    """
+    with open_staged(staged) as f:
+        return get_blob_store().save(f, content_type=staged.get('content_type'), sha256=staged.get('sha256'))
+
+
+def discard(staged):
+    try:
+        os.remove(_staged_path(staged['token']))
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired(max_age):
+    """Deletes staged uploads older than `max_age` seconds and returns how many were removed."""
+    root = _staging_root()
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(root):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            removed += 1
+    return removed
@@ -0,0 +1,204 @@
+import base64
+import hashlib
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    """Metadata returned by a blob store after a successful write."""
+    key: str
+    size: int
+    sha256: str
+    content_type: str | None = None
+
+
+class BlobStore:
+    """
+    Interface every blob storage backend implements.
+
+    Blobs are immutable and addressed by the key returned from `save`. Deleting
+    a blob is left to explicit housekeeping because identical uploads share a key.
+    """
+
+    def save(self, stream, content_type=None, sha256=None):
+        """
+        Writes a stream and returns its `StoredBlob`.
+
+        `sha256` may carry a digest the caller already computed while receiving
+        the file, so backends can skip hashing it a second time.
+        """
+        raise NotImplementedError
+
+    def open(self, key):
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def size(self, key):
+        raise NotImplementedError
+
+    def modified_time(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+def iter_chunks(stream, chunk_size=CHUNK_SIZE):
+    """Yields the content of an uploaded file or plain file object in chunks."""
+    if hasattr(stream, 'chunks'):
+        yield from stream.chunks(chunk_size)
+        return
+    if hasattr(stream, 'seek'):
+        stream.seek(0)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Stores blobs on the local filesystem keyed by their SHA-256 digest.
+
+    Files live under `<location>/<aa>/<bb>/<digest>`, so identical uploads are
+    written once no matter how many rows reference them.
+    """
+
+    def __init__(self, location, chunk_size=CHUNK_SIZE):
+        self.location = os.fspath(location)
+        self.chunk_size = chunk_size
+
+    def path(self, key):
+        if len(key) != 64 or not all(c in '0123456789abcdef' for c in key):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return os.path.join(self.location, key[:2], key[2:4], key)
+
+    def save(self, stream, content_type=None, sha256=None):
+        if sha256 and os.path.exists(self.path(sha256)):
+            # Already stored: skip reading the upload entirely.
+            return StoredBlob(key=sha256, size=self.size(sha256), sha256=sha256, content_type=content_type)
+
+        tmp_dir = os.path.join(self.location, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = None if sha256 else hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter_chunks(stream, self.chunk_size):
+                    if digest is not None:
+                        digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+
+            key = sha256 or digest.hexdigest()
+            final_path = self.path(key)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return StoredBlob(key=key, size=size, sha256=key, content_type=content_type)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def modified_time(self, key):
+        return os.path.getmtime(self.path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def get_blob_store():
+    """Returns the blob store configured in `settings.BLOB_STORAGE`."""
+    config = settings.BLOB_STORAGE
+    backend = import_string(config['BACKEND'])
+    return backend(**config.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def _reset_blob_store(sender, setting, **kwargs):
+    if setting == 'BLOB_STORAGE':
+        get_blob_store.cache_clear()
+
+
+def store_upload(uploaded_file, content_type=None):
+    """
+    Streams an uploaded file into the blob store.
+
+    Uploads received through `VerifyingUploadHandler` carry their SHA-256, which
+    is passed on so the file is not hashed twice.
+    """
+    if content_type is None:
+        content_type = getattr(uploaded_file, 'content_type', None)
+    return get_blob_store().save(
+        uploaded_file, content_type=content_type, sha256=getattr(uploaded_file, 'sha256', None)
+    )
+
+
+def store_base64(encoded, content_type=None):
+    """Decodes a base64 string and writes the bytes to the blob store."""
+    return get_blob_store().save(io.BytesIO(base64.b64decode(encoded)), content_type=content_type)
+
+
+def blob_columns(prefix, blob):
+    """Maps a stored blob onto the `<prefix>_key/_size/_content_type/_sha256` model columns."""
+    return {
+        f'{prefix}_key': blob.key if blob else None,
+        f'{prefix}_size': blob.size if blob else None,
+        f'{prefix}_content_type': blob.content_type if blob else None,
+        f'{prefix}_sha256': blob.sha256 if blob else None,
+    }
+
+
+def open_blob(key=None, legacy_base64=None):
+    """
+    Opens a stored file for reading.
+
+    Rows written before the blob store existed still carry their content as a
+    base64 TextField; those are decoded in memory as a fallback.
+    """
+    if key:
+        return get_blob_store().open(key)
+    if legacy_base64:
+        return io.BytesIO(base64.b64decode(legacy_base64))
+    return None
+
+
+def read_blob_base64(key=None, legacy_base64=None):
+    """Returns the stored file as a base64 string, or None if there is none."""
+    if not key:
+        return legacy_base64 or None
+    with get_blob_store().open(key) as f:
+        return base64.b64encode(f.read()).decode('utf-8')
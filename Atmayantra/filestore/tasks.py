@@ -0,0 +1,28 @@
+from PIL import Image, UnidentifiedImageError
+
+from jobs.queue import JobError, enqueue, task
+from .images import DERIVATIVE_SIZES, FALLBACK_FORMATS, get_derivative
+
+
+@task('filestore.render_derivatives')
+def render_derivatives(key, sha256, kind):
+    """Renders every size of an image in each format it is served in, so no download waits for it."""
+    try:
+        for size in DERIVATIVE_SIZES.values():
+            for image_format in ('webp', FALLBACK_FORMATS[kind]):
+                get_derivative(key, sha256, size, kind, image_format)
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        # Rendering it again will not help; downloads fall back to the original.
+        raise JobError(str(e), retry=False)
+
+
+def derivatives_job(blob, kind):
+    """Returns the `(name, payload)` of the job rendering a newly stored image's derivatives."""
+    return 'filestore.render_derivatives', {'key': blob.key, 'sha256': blob.sha256, 'kind': kind}
+
+
+def schedule_derivatives(blob, kind):
+    """Queues the derivatives of a newly stored image."""
+    if blob is not None:
+        name, payload = derivatives_job(blob, kind)
+        enqueue(name, **payload)
@@ -0,0 +1,401 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.client import MULTIPART_CONTENT
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+
+from doctor_documents.models import DoctorDocument
+from doctor_personal_details.models import DoctorPersonalDetails
+from .downloads import serve_blob
+from .images import GRAPHIC, PHOTO
+from .models import ImageDerivative, UploadSession
+from .tasks import render_derivatives
+from .storage import LocalBlobStore, blob_columns, get_blob_store, read_blob_base64
+from .upload_handlers import UploadRejected, VerifyingUploadHandler
+from .uploads import CHUNK_WRITE_LEASE, _claim_offset, commit_session
+
+PDF = b'%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n%%EOF\n'
+
+
+def sha256(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def use_temporary_storage(test):
+    """Points the blob store and the upload staging area at a directory removed after the test."""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    storage = override_settings(
+        BLOB_STORAGE={'BACKEND': 'filestore.storage.LocalBlobStore', 'OPTIONS': {'location': f'{directory.name}/blobs'}},
+        UPLOAD_STAGING_ROOT=f'{directory.name}/staging',
+    )
+    storage.enable()
+    test.addCleanup(storage.disable)
+
+
+def create_doctor(contact_number):
+    return DoctorPersonalDetails.objects.create(
+        contact_number=contact_number, full_name='Asha Rao', specialization='Yoga', experience=5,
+        hospital='City Hospital', gender='F', email=f'{contact_number}@example.com', address='Address',
+    )
+
+
+class LocalBlobStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = LocalBlobStore(directory.name, chunk_size=16)
+
+    def test_save_and_open(self):
+        blob = self.store.save(io.BytesIO(PDF), content_type='application/pdf')
+        self.assertEqual((blob.key, blob.sha256, blob.size, blob.content_type), (sha256(PDF), sha256(PDF), len(PDF), 'application/pdf'))
+        self.assertTrue(self.store.path(blob.key).endswith(os.path.join(blob.key[:2], blob.key[2:4], blob.key)))
+        with self.store.open(blob.key) as f:
+            self.assertEqual(f.read(), PDF)
+        self.assertEqual(self.store.size(blob.key), len(PDF))
+        self.assertEqual(os.listdir(os.path.join(self.store.location, 'tmp')), [])
+
+    def test_identical_content_is_stored_once(self):
+        first = self.store.save(io.BytesIO(PDF))
+        second = self.store.save(io.BytesIO(PDF))
+        self.assertEqual(first.key, second.key)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.store.location)), 1)
+
+    def test_known_digest_skips_reading_the_stream(self):
+        blob = self.store.save(io.BytesIO(PDF))
+        unreadable = io.BytesIO()
+        unreadable.read = None
+        self.assertEqual(self.store.save(unreadable, sha256=blob.sha256).size, len(PDF))
+
+    def test_keys_cannot_escape_the_store(self):
+        with self.assertRaises(ValueError):
+            self.store.open('../' + '0' * 61)
+
+    def test_delete(self):
+        blob = self.store.save(io.BytesIO(PDF))
+        self.store.delete(blob.key)
+        self.assertFalse(self.store.exists(blob.key))
+        self.store.delete(blob.key)
+
+
+class ServeBlobTests(TestCase):
+    def setUp(self):
+        use_temporary_storage(self)
+        self.content = bytes(range(256)) * 4
+        self.blob = get_blob_store().save(io.BytesIO(self.content))
+        self.etag = f'"{self.blob.sha256}"'
+        self.last_modified = http_date(get_blob_store().modified_time(self.blob.key))
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        request = self.factory.get('/file', headers=headers)
+        return serve_blob(request, key=self.blob.key, sha256=self.blob.sha256, content_type='application/octet-stream', filename='file.bin')
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_response(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+        self.assertEqual((response['ETag'], response['Last-Modified']), (self.etag, self.last_modified))
+        self.assertEqual((response['Accept-Ranges'], response['Content-Length']), ('bytes', str(len(self.content))))
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="file.bin"')
+
+    def test_ranges(self):
+        for header, start, end in (('bytes=10-19', 10, 19), ('bytes=1000-', 1000, 1023), ('bytes=-4', 1020, 1023), ('bytes=1020-5000', 1020, 1023)):
+            with self.subTest(header=header):
+                response = self.get(range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{len(self.content)}')
+                self.assertEqual(self.body(response), self.content[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=1024-', 'bytes=20-10', 'bytes=-0'):
+            with self.subTest(header=header):
+                response = self.get(range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_unusable_range_headers_are_ignored(self):
+        for header in ('bytes=0-1,5-6', 'items=0-1', 'bytes=-'):
+            with self.subTest(header=header):
+                self.assertEqual(self.get(range=header).status_code, 200)
+
+    def test_if_range(self):
+        self.assertEqual(self.get(range='bytes=0-9', if_range=self.etag).status_code, 206)
+        self.assertEqual(self.get(range='bytes=0-9', if_range=self.last_modified).status_code, 206)
+        # A stale validator means the client's partial copy is outdated: send everything.
+        self.assertEqual(self.get(range='bytes=0-9', if_range='"stale"').status_code, 200)
+        self.assertEqual(self.get(range='bytes=0-9', if_range=f'W/{self.etag}').status_code, 200)
+        self.assertEqual(self.get(range='bytes=0-9', if_range=http_date(0)).status_code, 200)
+
+    def test_conditional_requests(self):
+        self.assertEqual(self.get(if_none_match=self.etag).status_code, 304)
+        self.assertEqual(self.get(if_modified_since=self.last_modified).status_code, 304)
+        self.assertEqual(self.get(if_none_match='"other"').status_code, 200)
+
+    def test_legacy_base64_rows(self):
+        legacy = base64.b64encode(self.content).decode()
+        request = self.factory.get('/file', headers={'range': 'bytes=0-3'})
+        response = serve_blob(request, legacy_base64=legacy, legacy_etag='file.1.2', filename='file.bin')
+        self.assertEqual((response.status_code, self.body(response)), (206, self.content[:4]))
+        self.assertEqual(response['ETag'], '"file.1.2"')
+        self.assertEqual(read_blob_base64(self.blob.key), legacy)
+
+        # The ETag comes from the row, so a 304 never decodes the body.
+        request = self.factory.get('/file', headers={'if-none-match': '"file.1.2"'})
+        with mock.patch('filestore.downloads.open_blob') as open_blob:
+            response = serve_blob(request, legacy_base64=legacy, legacy_etag='file.1.2', filename='file.bin')
+        self.assertEqual(response.status_code, 304)
+        open_blob.assert_not_called()
+
+
+class VerifyingUploadHandlerTests(SimpleTestCase):
+    rules = {
+        'file': {'max_size': 1024, 'content_types': ['application/pdf', 'image/png']},
+        'import_file': {'max_size': 1024, 'content_types': None},
+    }
+
+    def upload(self, field, content, content_type='application/pdf'):
+        request = RequestFactory().post('/upload', {field: SimpleUploadedFile('upload', content, content_type=content_type)}, content_type=MULTIPART_CONTENT)
+        request.upload_handlers = [VerifyingUploadHandler(request, rules=self.rules)]
+        return request.FILES[field]
+
+    def assertRejected(self, status_code, field, content, content_type='application/pdf'):
+        with self.assertRaises(UploadRejected) as rejected:
+            self.upload(field, content, content_type)
+        self.assertEqual(rejected.exception.status_code, status_code)
+
+    def test_accepted_upload_carries_its_digest(self):
+        upload = self.upload('file', PDF, content_type='application/x-pdf')
+        self.assertEqual((upload.read(), upload.size, upload.sha256), (PDF, len(PDF), sha256(PDF)))
+        self.assertEqual(upload.content_type, 'application/pdf')
+
+    def test_oversized_upload_is_rejected_with_413(self):
+        self.assertRejected(413, 'file', PDF + b'0' * 1024)
+
+    def test_wrong_type_is_rejected_with_415(self):
+        self.assertRejected(415, 'file', b'\xff\xd8\xff\xe0 a JPEG', content_type='image/jpeg')
+        self.assertRejected(415, 'file', b'plain text, not a PDF')
+        self.assertRejected(415, 'file', b'%PDF')
+        # Allowed content must also be what the client declared.
+        self.assertRejected(415, 'file', PDF, content_type='image/png')
+
+    def test_fields_without_type_rules_accept_any_content(self):
+        self.assertEqual(self.upload('import_file', b'id,name\n1,Asha\n', content_type='text/csv').sha256, sha256(b'id,name\n1,Asha\n'))
+        self.assertRejected(413, 'import_file', b'0' * 2048, content_type='text/csv')
+
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_viewsets_answer_rejections_in_the_response_envelope(self):
+        photo = SimpleUploadedFile('photo.png', b'plain text, not a PNG', content_type='image/png')
+        response = self.client.post('/doctors_personal_details/doctors/', {'profile_photo_file': photo})
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertIn('profile_photo_file', response.json()['message'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        use_temporary_storage(self)
+
+    def start(self, content, content_type='application/pdf', **extra):
+        response = self.client.post('/uploads/sessions/', {'filename': 'file.pdf', 'content_type': content_type, 'size': len(content), **extra})
+        self.assertEqual(response.status_code, 201, response.json())
+        return response.json()['data']['id']
+
+    def put_chunk(self, upload_id, offset, chunk, checksum=None):
+        return self.client.put(
+            f'/uploads/sessions/{upload_id}/chunk/?offset={offset}', chunk,
+            content_type='application/octet-stream', HTTP_X_CHUNK_SHA256=checksum or sha256(chunk),
+        )
+
+    def test_first_chunk_must_match_the_declared_type(self):
+        upload_id = self.start(b'\x89PNG\r\n\x1a\n' + PDF, content_type='application/pdf')
+        response = self.put_chunk(upload_id, 0, b'\x89PNG\r\n\x1a\n' + PDF)
+        self.assertEqual(response.status_code, 415)
+
+        # Content without any known signature is rejected too, not waved through.
+        upload_id = self.start(b'plain text, not a PDF')
+        response = self.put_chunk(upload_id, 0, b'plain text, not a PDF')
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(self.client.get(f'/uploads/sessions/{upload_id}/').json()['data']['received'], 0)
+
+        upload_id = self.start(PDF)
+        response = self.put_chunk(upload_id, 0, PDF[:3])
+        self.assertEqual(response.status_code, 400)
+
+    def test_chunks_are_resumed_from_the_received_offset(self):
+        content = PDF * 3
+        upload_id = self.start(content, sha256=sha256(content))
+        self.assertEqual(self.put_chunk(upload_id, 0, content[:20]).json()['data']['offset'], 20)
+
+        # A chunk that skips ahead or repeats bytes is refused with the offset to resume from.
+        response = self.put_chunk(upload_id, 40, content[40:60])
+        self.assertEqual((response.status_code, response.json()['data']), (409, {'offset': 20}))
+        response = self.put_chunk(upload_id, 0, content[:20])
+        self.assertEqual(response.status_code, 409)
+
+        # A corrupted chunk is not counted.
+        response = self.put_chunk(upload_id, 20, content[20:40], checksum=sha256(b'something else'))
+        self.assertEqual((response.status_code, response.json()['data']), (422, {'offset': 20}))
+        self.assertEqual(self.client.get(f'/uploads/sessions/{upload_id}/').json()['data']['received'], 20)
+
+        response = self.put_chunk(upload_id, 20, content[20:])
+        self.assertEqual(response.json()['data'], {'offset': len(content), 'size': len(content), 'complete': True})
+        session = UploadSession.objects.get(pk=upload_id)
+        with commit_session(session) as blob:
+            self.assertEqual(blob.sha256, sha256(content))
+        with get_blob_store().open(blob.key) as f:
+            self.assertEqual(f.read(), content)
+
+    def test_offset_is_claimed_before_the_chunk_is_written(self):
+        upload_id = self.start(PDF)
+        session = UploadSession.objects.get(pk=upload_id)
+        token = _claim_offset(session, 0)
+
+        # A second request for the same offset cannot write while the first holds it.
+        response = self.put_chunk(upload_id, 0, PDF)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(UploadSession.objects.get(pk=upload_id).writer_token, token)
+
+        # Once the lease lapses the offset can be claimed again.
+        UploadSession.objects.filter(pk=upload_id).update(writer_lease_until=timezone.now() - CHUNK_WRITE_LEASE)
+        response = self.put_chunk(upload_id, 0, PDF)
+        self.assertEqual(response.status_code, 200)
+        session.refresh_from_db()
+        self.assertEqual((session.received, session.writer_token), (len(PDF), None))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ImageDerivativeTests(TestCase):
+    url = '/doctors_personal_details/doctors/9000000001/photo/'
+
+    def setUp(self):
+        use_temporary_storage(self)
+        self.doctor = create_doctor('9000000001')
+        self.set_photo(self.image_bytes('PNG', (600, 300)))
+
+    def image_bytes(self, image_format, size):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'teal').save(buffer, format=image_format)
+        return buffer.getvalue()
+
+    def set_photo(self, content):
+        blob = get_blob_store().save(io.BytesIO(content), content_type='image/png')
+        for attr, value in blob_columns('profile_photo', blob).items():
+            setattr(self.doctor, attr, value)
+        self.doctor.save()
+        return blob
+
+    def get(self, accept, **params):
+        response = self.client.get(self.url, params, HTTP_ACCEPT=accept)
+        body = b''.join(response.streaming_content) if response.status_code == 200 else b''
+        return response, body
+
+    def test_format_follows_the_accept_header(self):
+        for accept, content_type, pil_format in (('image/avif,image/webp,*/*', 'image/webp', 'WEBP'), ('image/png,image/*;q=0.8,*/*;q=0.5', 'image/jpeg', 'JPEG'), ('*/*', 'image/jpeg', 'JPEG')):
+            with self.subTest(accept=accept):
+                response, body = self.get(accept, size='64')
+                self.assertEqual(response['Content-Type'], content_type)
+                self.assertIn('Accept', response['Vary'])
+                with Image.open(io.BytesIO(body)) as image:
+                    self.assertEqual((image.format, image.size), (pil_format, (64, 32)))
+
+    def test_original_is_served_without_a_size(self):
+        response, body = self.get('image/webp,*/*', size='orig')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        with Image.open(io.BytesIO(body)) as image:
+            self.assertEqual(image.size, (600, 300))
+        self.assertEqual(self.get('image/webp,*/*', size='1024')[0].status_code, 400)
+
+    def test_derivatives_are_rendered_once(self):
+        first, _ = self.get('image/webp,*/*', size='256')
+        with mock.patch('filestore.images._render') as render:
+            second, _ = self.get('image/webp,*/*', size='256')
+        render.assert_not_called()
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual(ImageDerivative.objects.count(), 1)
+
+    def test_background_job_renders_every_variant(self):
+        blob = self.set_photo(self.image_bytes('JPEG', (300, 300)))
+        render_derivatives(blob.key, blob.sha256, PHOTO)
+        self.assertEqual(
+            sorted(ImageDerivative.objects.filter(source_sha256=blob.sha256).values_list('size', 'format')),
+            [(64, 'jpeg'), (64, 'webp'), (256, 'jpeg'), (256, 'webp')],
+        )
+        render_derivatives(blob.key, blob.sha256, GRAPHIC)
+        self.assertTrue(ImageDerivative.objects.filter(source_sha256=blob.sha256, format='png').exists())
+
+    def test_undecodable_image_falls_back_to_the_original(self):
+        self.set_photo(b'\x89PNG\r\n\x1a\n truncated')
+        response, body = self.get('image/webp,*/*', size='64')
+        self.assertEqual((response.status_code, body), (200, b'\x89PNG\r\n\x1a\n truncated'))
+        self.assertFalse(ImageDerivative.objects.exists())
+
+
+class MigrateBlobsTests(TransactionTestCase):
+    # The command closes database connections before starting its decoder pool.
+
+    def setUp(self):
+        use_temporary_storage(self)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, 'checkpoint.json')
+        create_doctor('9000000001')
+        self.contents = [PDF + str(number).encode() for number in range(3)]
+        self.documents = [
+            DoctorDocument.objects.create(
+                doctor_id='9000000001', doc_type='degree', filename=f'{number}.pdf', content_type='application/pdf',
+                file_data=base64.b64encode(content).decode(),
+            )
+            for number, content in enumerate(self.contents)
+        ]
+
+    def migrate(self, *args):
+        out = io.StringIO()
+        call_command('migrate_blobs', '--workers', '0', '--batch-size', '2', '--checkpoint', self.checkpoint, *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_legacy_columns_are_moved_into_the_blob_store(self):
+        output = self.migrate()
+        self.assertIn("Moved 3 file(s)", output)
+        for document, content in zip(self.documents, self.contents):
+            document.refresh_from_db()
+            self.assertIsNone(document.file_data)
+            self.assertEqual((document.file_key, document.file_size, document.file_sha256), (sha256(content), len(content), sha256(content)))
+            with get_blob_store().open(document.file_key) as f:
+                self.assertEqual(f.read(), content)
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)['doctor_documents.DoctorDocument.file_data'], self.documents[-1].pk)
+
+    def test_run_resumes_after_the_checkpoint(self):
+        with open(self.checkpoint, 'w') as f:
+            json.dump({'doctor_documents.DoctorDocument.file_data': self.documents[0].pk}, f)
+        self.assertIn("Moved 2 file(s)", self.migrate())
+        self.assertEqual(list(DoctorDocument.objects.filter(file_key__isnull=True).values_list('pk', flat=True)), [self.documents[0].pk])
+
+        # Rows behind the checkpoint are only picked up again with --reset.
+        self.assertIn("Moved 0 file(s)", self.migrate())
+        self.assertIn("Moved 1 file(s)", self.migrate('--reset'))
+        self.assertFalse(DoctorDocument.objects.filter(file_key__isnull=True).exists())
+
+    def test_dry_run_changes_nothing(self):
+        output = self.migrate('--dry-run')
+        encoded = sum(len(base64.b64encode(content)) for content in self.contents)
+        self.assertIn(f"doctor_documents.DoctorDocument.file_data: 3 row(s), {encoded} bytes of base64", output)
+        self.assertIn("Dry run: 3 file(s) would be moved", output)
+        self.assertEqual(DoctorDocument.objects.filter(file_key__isnull=True).count(), 3)
+        self.assertFalse(os.path.exists(self.checkpoint))
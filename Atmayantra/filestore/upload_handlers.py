@@ -0,0 +1,139 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+MAGIC_NUMBERS = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+)
+CONTENT_TYPE_ALIASES = {
+    'image/jpg': 'image/jpeg',
+    'image/pjpeg': 'image/jpeg',
+    'application/x-pdf': 'application/pdf',
+}
+SNIFF_LENGTH = 8
+
+
+def sniff_content_type(head):
+    """Returns the content type implied by a file's leading bytes, or None if unrecognised."""
+    for magic, content_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return content_type
+    return None
+
+
+def normalize_content_type(content_type):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    return CONTENT_TYPE_ALIASES.get(content_type, content_type)
+
+
+class UploadRejected(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Upload rejected."
+
+    def __init__(self, detail, status_code=None):
+        super().__init__(detail)
+        if status_code is not None:
+            self.status_code = status_code
+
+
+class VerifiedUploadedFile(TemporaryUploadedFile):
+    """A disk-spooled upload whose size, SHA-256 and content type were checked while streaming."""
+    sha256 = None
+
+    def __deepcopy__(self, memo):
+        # QueryDict.copy() deep-copies its values; share the spooled file instead of its open handle.
+        return self
+
+
+class VerifyingUploadHandler(FileUploadHandler):
+    """
+    Checks uploads in a single streaming pass.
+
+    While each file is read from the request it enforces the field's size limit,
+    sniffs its magic bytes against the allowed and declared content types,
+    computes its SHA-256 and spools it to disk. A bad upload is rejected on the
+    chunk that reveals the problem instead of after the whole body is buffered.
+
+    Rules come from `settings.DOCTOR_UPLOAD_RULES`, keyed by form field name;
+    fields without a rule get `settings.DOCTOR_UPLOAD_DEFAULT_RULE`.
+    """
+
+    def __init__(self, request=None, rules=None):
+        super().__init__(request)
+        self.rules = settings.DOCTOR_UPLOAD_RULES if rules is None else rules
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        rule = self.rules.get(field_name, settings.DOCTOR_UPLOAD_DEFAULT_RULE)
+        self.max_size = rule['max_size']
+        self.allowed_types = rule.get('content_types')
+        if content_length is not None and content_length > self.max_size:
+            self._reject_size()
+
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+        self.sniffed = False
+        self.file = VerifiedUploadedFile(file_name, content_type, 0, charset, content_type_extra)
+
+    def _reject_size(self):
+        raise UploadRejected(
+            f"{self.field_name} may not be larger than {self.max_size} bytes.",
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+
+    def _check_type(self):
+        sniffed = sniff_content_type(self.head)
+        declared = normalize_content_type(self.content_type)
+        if self.allowed_types is not None and (sniffed is None or sniffed not in self.allowed_types):
+            raise UploadRejected(
+                f"Invalid file type for {self.field_name}. Allowed types: {', '.join(self.allowed_types)}.",
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        # Only fields that accept any type, like spreadsheet imports, let unrecognised content through.
+        if sniffed is not None and declared != sniffed:
+            raise UploadRejected(
+                f"{self.field_name} is declared as {declared or 'unknown'} but its content is {sniffed}.",
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        if sniffed is not None:
+            self.file.content_type = sniffed
+        self.sniffed = True
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self._reject_size()
+        if not self.sniffed:
+            self.head += raw_data[:SNIFF_LENGTH - len(self.head)]
+            if len(self.head) >= SNIFF_LENGTH:
+                self._check_type()
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not self.sniffed:
+            self._check_type()
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.digest.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+
+class VerifiedUploadMixin:
+    """Installs `VerifyingUploadHandler` on a viewset before the request body is parsed."""
+    upload_rules = None
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [VerifyingUploadHandler(request, rules=self.upload_rules)]
+        return super().initialize_request(request, *args, **kwargs)
@@ -0,0 +1,217 @@
+import hashlib
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+
+from .models import UploadSession
+from .storage import CHUNK_SIZE, get_blob_store, iter_chunks
+from .upload_handlers import SNIFF_LENGTH, normalize_content_type, sniff_content_type
+
+UPLOAD_SESSION_LIFETIME = timedelta(days=1)
+# How long a request may take to write its chunk before another may claim the offset.
+CHUNK_WRITE_LEASE = timedelta(minutes=10)
+
+
+class UploadError(Exception):
+    """Raised when a chunk or commit cannot be accepted; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST, data=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.data = data
+
+
+def _chunks_root():
+    return os.path.join(os.fspath(settings.UPLOAD_STAGING_ROOT), 'chunked')
+
+
+def session_path(session):
+    return os.path.join(_chunks_root(), session.id.hex)
+
+
+def start_session(filename, content_type, size, sha256=None):
+    """Creates an upload session and its empty temp file."""
+    session = UploadSession.objects.create(
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        sha256=sha256.lower() if sha256 else None,
+        expires_at=timezone.now() + UPLOAD_SESSION_LIFETIME,
+    )
+    os.makedirs(_chunks_root(), exist_ok=True)
+    open(session_path(session), 'wb').close()
+    return session
+
+
+def get_open_session(upload_id):
+    """Returns the open, unexpired upload session with this id, or None."""
+    try:
+        return UploadSession.objects.filter(
+            pk=upload_id, status=UploadSession.Status.OPEN, expires_at__gt=timezone.now()
+        ).first()
+    except ValidationError:
+        return None
+
+
+def _check_magic(session, head):
+    sniffed = sniff_content_type(head)
+    if sniffed is None or sniffed != normalize_content_type(session.content_type):
+        raise UploadError(
+            f"Upload is declared as {session.content_type} but its content is {sniffed or 'not a recognised file type'}.",
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+
+
+def _offset_conflict(session):
+    session.refresh_from_db(fields=['received'])
+    return UploadError("Chunk offset does not match the bytes received so far.", status.HTTP_409_CONFLICT, {'offset': session.received})
+
+
+def _claim_offset(session, offset):
+    """
+    Claims the right to write at `offset` and returns the claim's token.
+
+    The claim is a conditional UPDATE, like claiming a job, so two requests
+    sending the same chunk never write into the temp file at the same time.
+    It lapses after `CHUNK_WRITE_LEASE` in case the request died mid-chunk.
+    """
+    now = timezone.now()
+    token = uuid.uuid4()
+    claimed = UploadSession.objects.filter(
+        Q(writer_lease_until__isnull=True) | Q(writer_lease_until__lte=now),
+        pk=session.pk, received=offset, status=UploadSession.Status.OPEN,
+    ).update(writer_token=token, writer_lease_until=now + CHUNK_WRITE_LEASE)
+    if not claimed:
+        raise _offset_conflict(session)
+    return token
+
+
+def write_chunk(session, offset, stream, length, expected_sha256):
+    """
+    Streams one chunk from `stream` into the session's temp file at `offset`.
+
+    The chunk must start exactly at the number of bytes received so far and its
+    SHA-256 must match `expected_sha256`; otherwise the received offset is left
+    unchanged and the client can retry from it. The offset is claimed before
+    anything is written, so a concurrent request for the same offset gets a 409
+    instead of interleaving its bytes with this one.
+
+    Returns:
+        int: The new number of bytes received.
+    """
+    if offset != session.received:
+        raise UploadError("Chunk offset does not match the bytes received so far.", status.HTTP_409_CONFLICT, {'offset': session.received})
+    if length <= 0:
+        raise UploadError("Chunk is empty.")
+    if length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError("Chunk is too large.", status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    if offset + length > session.size:
+        raise UploadError("Chunk extends past the declared file size.", status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+    if offset == 0 and length < min(SNIFF_LENGTH, session.size):
+        raise UploadError(f"The first chunk must be at least {SNIFF_LENGTH} bytes long.")
+    if not expected_sha256:
+        raise UploadError("The X-Chunk-SHA256 header is required.")
+
+    token = _claim_offset(session, offset)
+    claim = UploadSession.objects.filter(pk=session.pk, writer_token=token)
+    try:
+        digest = hashlib.sha256()
+        written = 0
+        with open(session_path(session), 'r+b') as out:
+            out.seek(offset)
+            while written < length:
+                data = stream.read(min(CHUNK_SIZE, length - written))
+                if not data:
+                    break
+                if offset == 0 and written == 0:
+                    _check_magic(session, data)
+                digest.update(data)
+                out.write(data)
+                written += len(data)
+
+        if written != length:
+            raise UploadError("Chunk body is shorter than its Content-Length.", data={'offset': offset})
+        if digest.hexdigest() != expected_sha256.lower():
+            raise UploadError("Chunk checksum mismatch.", status.HTTP_422_UNPROCESSABLE_ENTITY, {'offset': offset})
+    except BaseException:
+        claim.update(writer_token=None, writer_lease_until=None)
+        raise
+
+    # Fails only if the lease ran out and another request took the offset over.
+    updated = claim.update(received=offset + written, writer_token=None, writer_lease_until=None)
+    if not updated:
+        raise _offset_conflict(session)
+    session.received = offset + written
+    return session.received
+
+
+@contextmanager
+def commit_session(session):
+    """
+    Moves a fully received upload into the blob store.
+
+    Used as a context manager that yields the stored `StoredBlob` inside a
+    transaction, in which the caller writes the rows referencing it. The
+    session is marked committed in that same transaction. If the block
+    raises, the session stays open and a blob this commit added to the store
+    is deleted again. The whole-file checksum is verified before anything is
+    stored.
+    """
+    if session.received != session.size:
+        raise UploadError("Upload is incomplete.", status.HTTP_409_CONFLICT, {'offset': session.received, 'size': session.size})
+
+    path = session_path(session)
+    with open(path, 'r+b') as f:
+        f.truncate(session.size)
+        digest = hashlib.sha256()
+        for chunk in iter_chunks(f):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    if session.sha256 and sha256 != session.sha256:
+        raise UploadError("File checksum mismatch.", status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    store = get_blob_store()
+    blob, added = None, False
+    try:
+        with transaction.atomic():
+            # Claimed before storing, so a concurrent commit of the same session stores nothing.
+            updated = UploadSession.objects.filter(pk=session.pk, status=UploadSession.Status.OPEN).update(status=UploadSession.Status.COMMITTED)
+            if not updated:
+                raise UploadError("Upload was already committed.", status.HTTP_409_CONFLICT)
+            added = not store.exists(sha256)
+            with open(path, 'rb') as f:
+                blob = store.save(f, content_type=session.content_type, sha256=sha256)
+            yield blob
+    except BaseException:
+        if blob is not None and added:
+            store.delete(blob.key)
+        raise
+    session.status = UploadSession.Status.COMMITTED
+    discard_session(session)
+
+
+def discard_session(session):
+    try:
+        os.remove(session_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired_sessions():
+    """Deletes expired upload sessions together with their temp files."""
+    expired = UploadSession.objects.filter(expires_at__lte=timezone.now())
+    count = 0
+    for session in expired.iterator():
+        discard_session(session)
+        session.delete()
+        count += 1
+    return count
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.http import Http404
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from .models import UploadSession
+from .serializers import UploadSessionSerializer
+from .uploads import UploadError, discard_session, get_open_session, start_session, write_chunk
+from Atmayantra.utils import api_response
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads.
+
+    Create a session with the file's name, content type, size and optional
+    SHA-256, PUT the body in chunks to `chunk/?offset=<n>` with an
+    `X-Chunk-SHA256` header, and poll the session for the received offset.
+    A complete upload is committed into a document or certification slot by
+    the doctor endpoints.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+
+    def get_object(self):
+        session = get_open_session(self.kwargs['pk'])
+        if session is None:
+            raise Http404("Upload session not found, expired or already committed.")
+        return session
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return api_response(False, "Invalid data provided.", serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
+        session = start_session(**serializer.validated_data)
+        data = {**self.get_serializer(session).data, 'max_chunk_size': settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE}
+        return api_response(True, "Upload session created.", data, status_code=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        return api_response(True, "Upload progress retrieved successfully.", self.get_serializer(session).data)
+
+    def destroy(self, request, *args, **kwargs):
+        session = self.get_object()
+        discard_session(session)
+        session.delete()
+        return api_response(True, "Upload session cancelled.")
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        session = self.get_object()
+        try:
+            offset = int(request.query_params.get('offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return api_response(False, "An integer offset query parameter is required.", status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # The chunk body is streamed straight to disk without going through DRF parsers.
+            received = write_chunk(session, offset, request.stream, length, request.META.get('HTTP_X_CHUNK_SHA256'))
+        except UploadError as e:
+            return api_response(False, e.message, e.data, status_code=e.status_code)
+
+        return api_response(True, "Chunk received.", {'offset': received, 'size': session.size, 'complete': received == session.size})
@@ -0,0 +1,29 @@
+"""
+Gunicorn settings, read from the working directory the Procfile starts in.
+
+SERVER_MODE picks how the app is served:
+- `wsgi` (default): sync workers running Atmayantra.wsgi. Each worker serves
+  one request at a time, so a slow client holds a whole worker until its
+  download finishes.
+- `asgi`: uvicorn workers running Atmayantra.asgi, which routes downloads and
+  the OTP endpoints to async views. A worker keeps serving other requests
+  while slow clients download; sync views run in its thread pool.
+
+Compare both with `manage.py benchmark_downloads`.
+"""
+import os
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'Atmayantra.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'Atmayantra.wsgi:application'
+    worker_class = 'sync'
+else:
+    raise RuntimeError(f"SERVER_MODE must be 'wsgi' or 'asgi', not {SERVER_MODE!r}.")
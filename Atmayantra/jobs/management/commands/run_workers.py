@@ -0,0 +1,68 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import purge_finished
+from jobs.worker import work, worker_main
+
+# How often finished jobs past their retention are deleted.
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs in a pool of worker processes, retrying failures "
+        "with backoff. SIGTERM or Ctrl-C lets each process finish its current job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None, help="Worker processes (default: JOB_WORKER_PROCESSES). 1 runs jobs in this process.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds a worker waits when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Run the due jobs and exit.")
+
+    def handle(self, *args, **options):
+        processes = options['processes'] or settings.JOB_WORKER_PROCESSES
+        interval, once = options['interval'], options['once']
+
+        if processes <= 1:
+            self.stop = threading.Event()
+            self._handle_signals()
+            purge_finished()
+            work(self.stop, interval, once)
+            return
+
+        # Spawned rather than forked, so no process inherits the parent's
+        # database connections; each sets Django up on its own.
+        context = multiprocessing.get_context('spawn')
+        self.stop = context.Event()
+        self._handle_signals()
+        pool = [self._start(context, index, interval, once) for index in range(processes)]
+        self.stdout.write(f"Started {processes} worker processes.")
+
+        last_purge = 0
+        while any(process.is_alive() for process in pool):
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                purge_finished()
+                last_purge = time.monotonic()
+            for index, process in enumerate(pool):
+                process.join(timeout=interval / processes)
+                if process.exitcode and not self.stop.is_set():
+                    self.stderr.write(f"{process.name} exited with code {process.exitcode}; restarting it.")
+                    pool[index] = self._start(context, index, interval, once)
+
+    def _start(self, context, index, interval, once):
+        process = context.Process(target=worker_main, args=(self.stop, interval, once), name=f'job-worker-{index}')
+        process.start()
+        return process
+
+    def _handle_signals(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+    def _stop(self, signum, frame):
+        # Jobs in hand are finished rather than left claimed until their lease runs out.
+        self.stop.set()
@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """
+    A unit of background work, such as checking an uploaded file.
+
+    Requests only insert rows, inside their own transaction, so a job exists
+    exactly when the data it refers to was committed. `jobs.queue` claims and
+    runs them from the `run_workers` process pool.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    # The name the task was registered under with `jobs.queue.task`.
+    name = models.CharField(max_length=100)
+    # Keyword arguments for the task.
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField()
+    # Set by the worker that claimed the row; the claim lapses at `lease_until`.
+    claim_token = models.UUIDField(null=True, blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_due_idx'),
+            models.Index(fields=['claim_token'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
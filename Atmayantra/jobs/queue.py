@@ -0,0 +1,149 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+Status = Job.Status
+
+TASKS = {}
+
+# Due jobs looked at per claim. Workers racing for the oldest job fall back
+# to the next one instead of going back to the database.
+CLAIM_CANDIDATES = 10
+
+
+class JobError(Exception):
+    """Raised by a task to fail its job; with `retry=False` it is not retried."""
+
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        self.retry = retry
+
+
+def task(name):
+    """
+    Registers a function as the task run for jobs called `name`.
+
+    The function receives the job's payload as keyword arguments. A job whose
+    lease runs out is run again, so tasks must be safe to repeat.
+    """
+    def decorator(func):
+        if name in TASKS:
+            raise ValueError(f"A task named {name!r} is already registered.")
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, **payload):
+    """
+    Queues a job for the `run_workers` pool and returns it.
+
+    This is a single INSERT in the caller's transaction: the job only becomes
+    visible to workers once that commits, and disappears if it rolls back.
+    """
+    return enqueue_many([(name, payload)])[0]
+
+
+def enqueue_many(jobs):
+    """Queues `(name, payload)` pairs with one INSERT, like `enqueue`; returns the jobs."""
+    now = timezone.now()
+    rows = []
+    for name, payload in jobs:
+        if name not in TASKS:
+            raise LookupError(f"No task named {name!r} is registered.")
+        rows.append(Job(name=name, payload=payload, run_after=now))
+    return Job.objects.bulk_create(rows)
+
+
+def _retry_delay(attempts):
+    # Exponential backoff: base, 2 x base, 4 x base, ... capped.
+    return min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+
+
+def claim_next():
+    """
+    Claims the oldest due job and returns it, or None if there is none.
+
+    Claiming is a conditional UPDATE that stamps a fresh token, so workers
+    running side by side never claim the same row, on any database. A claim
+    lapses after `JOB_LEASE_SECONDS`, so jobs held by a worker that died are
+    picked up again.
+    """
+    now = timezone.now()
+    due = Q(status=Status.PENDING, run_after__lte=now) | Q(status=Status.RUNNING, lease_until__lte=now)
+    candidates = Job.objects.filter(due).order_by('run_after', 'pk').values_list('pk', flat=True)[:CLAIM_CANDIDATES]
+    for pk in list(candidates):
+        token = uuid.uuid4()
+        claimed = Job.objects.filter(due, pk=pk).update(
+            status=Status.RUNNING,
+            claim_token=token,
+            lease_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run_next():
+    """
+    Claims one job, runs its task and records the outcome. Returns the job's
+    new status, or None if no job was due.
+
+    A task that raises is retried with exponential backoff up to
+    `JOB_MAX_ATTEMPTS`, unless it raised `JobError` with `retry=False`. Every
+    update is limited to this claim, so a worker whose lease ran out cannot
+    overwrite the outcome recorded by the worker that took over.
+    """
+    job = claim_next()
+    if job is None:
+        return None
+
+    claimed = Job.objects.filter(pk=job.pk, claim_token=job.claim_token)
+    done = {'claim_token': None, 'lease_until': None}
+    func = TASKS.get(job.name)
+    try:
+        if func is None:
+            raise JobError(f"No task named {job.name!r} is registered.", retry=False)
+        func(**job.payload)
+    except Exception as e:
+        retry = getattr(e, 'retry', True) and job.attempts < settings.JOB_MAX_ATTEMPTS
+        if retry:
+            logger.warning("Job %s failed on attempt %s, retrying: %s", job, job.attempts, e)
+            claimed.update(
+                status=Status.PENDING,
+                run_after=timezone.now() + timedelta(seconds=_retry_delay(job.attempts)),
+                last_error=str(e),
+                **done,
+            )
+            return Status.PENDING
+        logger.exception("Giving up on job %s after %s attempt(s)", job, job.attempts)
+        claimed.update(status=Status.FAILED, last_error=str(e), finished_at=timezone.now(), **done)
+        return Status.FAILED
+
+    claimed.update(status=Status.DONE, last_error='', finished_at=timezone.now(), **done)
+    return Status.DONE
+
+
+def run_pending():
+    """Runs due jobs in this process until none is left; returns how many ran."""
+    count = 0
+    while run_next() is not None:
+        count += 1
+    return count
+
+
+def purge_finished(older_than_days=None):
+    """Deletes done and failed jobs older than the retention period; returns how many."""
+    days = settings.JOB_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status__in=[Status.DONE, Status.FAILED], finished_at__lt=cutoff).delete()
+    return deleted
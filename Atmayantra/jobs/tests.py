@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import JobError, Status, claim_next, enqueue, run_next, run_pending, task
+
+calls = []
+
+
+@task('tests.record')
+def record(**payload):
+    calls.append(payload)
+
+
+@task('tests.flaky')
+def flaky(retry=True):
+    raise JobError("Temporarily unavailable", retry=retry)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_with_their_payload(self):
+        job = enqueue('tests.record', document_id=7)
+        enqueue('tests.record', document_id=8)
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, [{'document_id': 7}, {'document_id': 8}])
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.claim_token), (Status.DONE, 1, None))
+        self.assertIsNone(run_next())
+
+    def test_unknown_tasks_are_rejected(self):
+        with self.assertRaises(LookupError):
+            enqueue('tests.missing')
+
+        Job.objects.create(name='tests.removed', run_after=timezone.now())
+        self.assertEqual(run_next(), Status.FAILED)
+
+    def test_claimed_jobs_are_not_claimed_twice(self):
+        enqueue('tests.record')
+        first = claim_next()
+        self.assertIsNotNone(first)
+        self.assertIsNone(claim_next())
+
+        # Once the lease lapses, another worker takes over.
+        Job.objects.update(lease_until=timezone.now() - timedelta(seconds=1))
+        second = claim_next()
+        self.assertEqual(second.pk, first.pk)
+        self.assertNotEqual(second.claim_token, first.claim_token)
+        self.assertEqual(second.attempts, 2)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_BASE_SECONDS=30)
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        job = enqueue('tests.flaky')
+        self.assertEqual(run_next(), Status.PENDING)
+        job.refresh_from_db()
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(job.last_error, "Temporarily unavailable")
+        self.assertIsNone(run_next())
+
+        Job.objects.update(run_after=timezone.now())
+        self.assertEqual(run_next(), Status.FAILED)
+
+    def test_permanent_failures_are_not_retried(self):
+        enqueue('tests.flaky', retry=False)
+        self.assertEqual(run_next(), Status.FAILED)
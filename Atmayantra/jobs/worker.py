@@ -0,0 +1,36 @@
+"""
+The loop each `run_workers` process runs.
+
+This module is imported by freshly spawned processes before Django is set
+up, so it must not import models at the top level.
+"""
+import signal
+
+
+def work(stop, interval=1.0, once=False):
+    """Runs jobs until `stop` is set, waiting `interval` seconds whenever the queue is empty."""
+    from django.db import close_old_connections
+
+    from .queue import run_next
+
+    while not stop.is_set():
+        # Like a request, each job starts on a usable connection.
+        close_old_connections()
+        if run_next() is not None:
+            continue
+        if once:
+            break
+        stop.wait(interval)
+    close_old_connections()
+
+
+def worker_main(stop, interval, once):
+    """Entry point of a pool process."""
+    import django
+    django.setup()
+
+    # Ctrl-C reaches the whole process group; the parent handles it by
+    # setting `stop`, and each process finishes the job in hand.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    work(stop, interval, once)
@@ -0,0 +1,139 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .gateways import get_gateway
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+Channel = Notification.Channel
+Status = Notification.Status
+
+
+def _new_notification(channel, recipient, body, ttl):
+    now = timezone.now()
+    return Notification(
+        channel=channel,
+        recipient=recipient,
+        body=body,
+        next_attempt_at=now,
+        expires_at=now + timedelta(seconds=ttl) if ttl else None,
+    )
+
+
+def enqueue(channel, recipient, body, ttl=None):
+    """
+    Queues a message for the `send_notifications` worker and returns it.
+
+    This is a single INSERT; the provider is never called on the request path.
+    With `ttl`, the message is dropped if it cannot be delivered within that
+    many seconds.
+    """
+    notification = _new_notification(channel, recipient, body, ttl)
+    notification.save()
+    return notification
+
+
+async def aenqueue(channel, recipient, body, ttl=None):
+    """Async `enqueue`."""
+    notification = _new_notification(channel, recipient, body, ttl)
+    await notification.asave()
+    return notification
+
+
+def _retry_delay(attempts):
+    # Exponential backoff: base, 2 x base, 4 x base, ... capped.
+    return min(settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.NOTIFICATION_RETRY_MAX_SECONDS)
+
+
+def claim_batch(batch_size=None):
+    """
+    Claims up to `batch_size` due notifications and returns them with their claim token.
+
+    Claiming is one conditional UPDATE that stamps a fresh token, so workers
+    running side by side never claim the same row, on any database. A claim
+    lapses after `NOTIFICATION_LEASE_SECONDS`, so rows held by a worker that
+    died are picked up again.
+    """
+    now = timezone.now()
+    due = Q(status=Status.PENDING, next_attempt_at__lte=now) | Q(status=Status.SENDING, lease_until__lte=now)
+    ids = list(
+        Notification.objects.filter(due).order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size or settings.NOTIFICATION_BATCH_SIZE]
+    )
+    if not ids:
+        return None, []
+
+    token = uuid.uuid4()
+    Notification.objects.filter(due, pk__in=ids).update(
+        status=Status.SENDING,
+        claim_token=token,
+        lease_until=now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS),
+        attempts=F('attempts') + 1,
+    )
+    return token, list(Notification.objects.filter(claim_token=token))
+
+
+def process_batch(batch_size=None):
+    """
+    Claims one batch, hands it to the gateway in a single `send_many` call and
+    records the outcome. Returns the number of notifications sent, retried
+    and failed.
+
+    Failed sends are retried with exponential backoff up to
+    `NOTIFICATION_MAX_ATTEMPTS`; messages past their `expires_at` are dropped
+    unsent. Every update is limited to this claim, so a worker whose lease ran
+    out cannot overwrite the outcome recorded by the worker that took over.
+    """
+    token, batch = claim_batch(batch_size)
+    counts = {'sent': 0, 'retried': 0, 'failed': 0}
+    if not batch:
+        return counts
+
+    now = timezone.now()
+    claimed = Notification.objects.filter(claim_token=token)
+    expired = [n.pk for n in batch if n.expires_at and n.expires_at <= now]
+    sendable = [n for n in batch if n.pk not in expired]
+
+    try:
+        failures = get_gateway().send_many(sendable) if sendable else {}
+    except Exception as e:
+        # The provider is unreachable as a whole; retry the batch.
+        logger.exception("Notification gateway failed")
+        failures = {n.pk: e for n in sendable}
+
+    done = {'claim_token': None, 'lease_until': None, 'body': ''}
+    sent = [n.pk for n in sendable if n.pk not in failures]
+    counts['sent'] = claimed.filter(pk__in=sent).update(status=Status.SENT, sent_at=now, last_error='', **done)
+    counts['failed'] += claimed.filter(pk__in=expired).update(status=Status.FAILED, last_error="Expired before it could be delivered.", **done)
+
+    for notification in sendable:
+        error = failures.get(notification.pk)
+        if error is None:
+            continue
+        retry = getattr(error, 'retry', True) and notification.attempts < settings.NOTIFICATION_MAX_ATTEMPTS
+        if retry:
+            counts['retried'] += claimed.filter(pk=notification.pk).update(
+                status=Status.PENDING,
+                next_attempt_at=now + timedelta(seconds=_retry_delay(notification.attempts)),
+                last_error=str(error),
+                claim_token=None,
+                lease_until=None,
+            )
+        else:
+            counts['failed'] += claimed.filter(pk=notification.pk).update(status=Status.FAILED, last_error=str(error), **done)
+            logger.warning("Giving up on notification %s after %s attempt(s): %s", notification.pk, notification.attempts, error)
+    return counts
+
+
+def purge_delivered(older_than_days=None):
+    """Deletes sent and failed notifications older than the retention period; returns how many."""
+    days = settings.NOTIFICATION_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Notification.objects.filter(status__in=[Status.SENT, Status.FAILED], created_at__lt=cutoff).delete()
+    return deleted
+
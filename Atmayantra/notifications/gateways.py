@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayError(Exception):
+    """
+    Raised when a message could not be handed to the provider.
+
+    `retry=False` marks permanent failures, such as an invalid number, which
+    are not attempted again.
+    """
+
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        self.retry = retry
+
+
+class NotificationGateway:
+    """Interface every SMS/email delivery backend implements."""
+
+    def send(self, notification):
+        """Delivers one notification or raises `GatewayError`."""
+        raise NotImplementedError
+
+    def send_many(self, notifications):
+        """
+        Delivers a batch and returns `{pk: error}` for the notifications that failed.
+
+        Providers with a bulk API should override this to send the batch in one call.
+        """
+        failures = {}
+        for notification in notifications:
+            try:
+                self.send(notification)
+            except GatewayError as e:
+                failures[notification.pk] = e
+        return failures
+
+
+class FileGateway(NotificationGateway):
+    """Appends every message to a local file as a JSON line. Stands in for a provider in development."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+
+    def send_many(self, notifications):
+        with open(self.path, 'a', encoding='utf-8') as out:
+            for notification in notifications:
+                out.write(json.dumps({
+                    'id': notification.pk,
+                    'channel': notification.channel,
+                    'recipient': notification.recipient,
+                    'body': notification.body,
+                    'sent_at': timezone.now().isoformat(),
+                }) + '\n')
+        return {}
+
+    def send(self, notification):
+        self.send_many([notification])
+
+
+class InMemoryGateway(NotificationGateway):
+    """Collects sent messages in `InMemoryGateway.outbox`, like Django's locmem email backend. For tests."""
+    outbox = []
+
+    def send(self, notification):
+        self.outbox.append({'channel': notification.channel, 'recipient': notification.recipient, 'body': notification.body})
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    """Returns the gateway configured in `settings.NOTIFICATION_GATEWAY`."""
+    config = settings.NOTIFICATION_GATEWAY
+    backend = import_string(config['BACKEND'])
+    return backend(**config.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def _reset_gateway(sender, setting, **kwargs):
+    if setting == 'NOTIFICATION_GATEWAY':
+        get_gateway.cache_clear()
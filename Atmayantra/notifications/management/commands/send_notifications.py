@@ -0,0 +1,40 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.dispatch import process_batch, purge_delivered
+
+# How often the worker deletes delivered notifications past their retention.
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = "Delivers queued SMS and email notifications in batches, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Notifications claimed per batch (default: NOTIFICATION_BATCH_SIZE).")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the due notifications and exit.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        last_purge = 0
+        while not self.stopping:
+            counts = process_batch(options['batch_size'])
+            if any(counts.values()):
+                self.stdout.write(f"Sent {counts['sent']}, retrying {counts['retried']}, failed {counts['failed']}.")
+                continue
+            if options['once']:
+                break
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                purge_delivered()
+                last_purge = time.monotonic()
+            time.sleep(options['interval'])
+
+    def _stop(self, signum, frame):
+        # Finish the batch in hand rather than leaving it claimed until its lease runs out.
+        self.stopping = True
@@ -0,0 +1,44 @@
+from django.db import models
+
+
+class Notification(models.Model):
+    """
+    An outbound SMS or email waiting in the delivery queue.
+
+    Requests only insert rows; `notifications.dispatch` claims and sends them
+    from the `send_notifications` worker.
+    """
+    class Channel(models.TextChoices):
+        SMS = 'sms', 'SMS'
+        EMAIL = 'email', 'Email'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENDING = 'sending', 'Sending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    channel = models.CharField(max_length=10, choices=Channel.choices)
+    recipient = models.CharField(max_length=255)
+    # Cleared once sent, since it may hold an OTP.
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    # A message that could not be delivered by then is dropped, e.g. an OTP past its lifetime.
+    expires_at = models.DateTimeField(null=True, blank=True)
+    # Set by the worker that claimed the row; the claim lapses at `lease_until`.
+    claim_token = models.UUIDField(null=True, blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx'),
+            models.Index(fields=['claim_token'], name='notification_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.channel} to {self.recipient} ({self.status})'
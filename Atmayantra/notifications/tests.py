@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .dispatch import Channel, Status, claim_batch, enqueue, process_batch
+from .gateways import GatewayError, InMemoryGateway, NotificationGateway
+from .models import Notification
+
+
+class FlakyGateway(NotificationGateway):
+    """Fails every send; `retry` decides whether the failures are temporary."""
+    retry = True
+
+    def send(self, notification):
+        raise GatewayError("Provider unavailable", retry=self.retry)
+
+
+IN_MEMORY = {'BACKEND': 'notifications.gateways.InMemoryGateway'}
+FLAKY = {'BACKEND': 'notifications.tests.FlakyGateway'}
+
+
+@override_settings(NOTIFICATION_GATEWAY=IN_MEMORY)
+class NotificationDispatchTests(TestCase):
+    def setUp(self):
+        InMemoryGateway.outbox.clear()
+
+    def test_batch_is_sent_and_bodies_are_cleared(self):
+        for number in range(3):
+            enqueue(Channel.SMS, f'900000000{number}', f'Code {number}')
+        with self.assertNumQueries(4):
+            counts = process_batch()
+        self.assertEqual(counts, {'sent': 3, 'retried': 0, 'failed': 0})
+        self.assertEqual([message['body'] for message in InMemoryGateway.outbox], ['Code 0', 'Code 1', 'Code 2'])
+        self.assertEqual(set(Notification.objects.values_list('status', 'body')), {(Status.SENT, '')})
+        self.assertEqual(process_batch(), {'sent': 0, 'retried': 0, 'failed': 0})
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        enqueue(Channel.SMS, '9000000001', 'Code')
+        token, batch = claim_batch()
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(claim_batch(), (None, []))
+
+        # Once the lease lapses, another worker takes over.
+        Notification.objects.update(lease_until=timezone.now() - timedelta(seconds=1))
+        other_token, batch = claim_batch()
+        self.assertEqual(len(batch), 1)
+        self.assertNotEqual(token, other_token)
+
+    @override_settings(NOTIFICATION_GATEWAY=FLAKY, NOTIFICATION_MAX_ATTEMPTS=2, NOTIFICATION_RETRY_BASE_SECONDS=30)
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        notification = enqueue(Channel.SMS, '9000000001', 'Code')
+        self.assertEqual(process_batch(), {'sent': 0, 'retried': 1, 'failed': 0})
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Status.PENDING)
+        self.assertGreater(notification.next_attempt_at, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(process_batch(), {'sent': 0, 'retried': 0, 'failed': 0})
+
+        Notification.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(process_batch(), {'sent': 0, 'retried': 0, 'failed': 1})
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts, notification.last_error), (Status.FAILED, 2, "Provider unavailable"))
+
+    @override_settings(NOTIFICATION_GATEWAY=FLAKY)
+    def test_permanent_failures_are_not_retried(self):
+        FlakyGateway.retry = False
+        self.addCleanup(setattr, FlakyGateway, 'retry', True)
+        enqueue(Channel.SMS, '9000000001', 'Code')
+        self.assertEqual(process_batch(), {'sent': 0, 'retried': 0, 'failed': 1})
+
+    def test_expired_messages_are_dropped(self):
+        enqueue(Channel.SMS, '9000000001', 'Code', ttl=60)
+        Notification.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(process_batch(), {'sent': 0, 'retried': 0, 'failed': 1})
+        self.assertEqual(InMemoryGateway.outbox, [])